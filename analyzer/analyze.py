@@ -1,18 +1,28 @@
-import csv
-import json
 import logging
 import os
 import time
-from collections import defaultdict
-from typing import List
+from typing import Iterator, List, Set, Tuple
 
 from pathlib import Path
 
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER
 from analyzer.checks.metrics import MetricCheck, privacy_missing_paragraph, privacy_missing_third_party, \
     tracking_service_ip_not_anonymized
 from analyzer.checks.metrics.privacy_statement_missing import PrivacyStatementMissingCheck
-from analyzer.exceptions import InvalidMetricCheckException, ToDo
+from analyzer.crawler_meta import CrawlerMetaFollower, CrawlerMetaReader
+from analyzer.domain_checker import DomainChecker
+from analyzer.exceptions import ToDo
+from analyzer.parallel import check_domains_in_parallel
+from analyzer.page_store import PageStore
+from analyzer.pipeline import DomainPipeline
+from analyzer.profiler import Profiler
+from analyzer.result_cache import ResultCache
+from analyzer.result_store import ResultStore
+from analyzer.results_database import ResultsDatabase
+from analyzer.results_writer import ResultsWriter
+from analyzer.sampling import StratifiedSample
+from analyzer.sharding import Shard, find_shards
 from analyzer.types_definitions import CrawlerMetaData
 
 logger = logging.getLogger(__name__)
@@ -24,117 +34,263 @@ class Analyzer:
                                 + privacy_missing_third_party.ALL_METRICS \
                                 + privacy_missing_paragraph.ALL_METRICS
 
-    def __init__(self, crawler_metadata_filepath: str, checks: List[MetricCheck] = None, *args, **kwargs):
+    def __init__(self, crawler_metadata_filepath: str, checks: List[MetricCheck] = None, write_results: bool = True,
+                 result_cache: ResultCache = None, html_parser: str = DEFAULT_HTML_PARSER, profiler: Profiler = None,
+                 shard: Shard = None, max_page_bytes: int = None, check_time_budget: float = None,
+                 domain_time_budget: float = None, page_store: PageStore = None,
+                 results_database: ResultsDatabase = None, sample: StratifiedSample = None,
+                 crawler_meta_grouped: bool = False, *args, **kwargs):
         self.crawler_metadata_filepath = crawler_metadata_filepath
-        self.crawler_meta_data = self._import_crawler_meta(path=os.path.abspath(crawler_metadata_filepath))
-        self.results: List[CheckResult] = list()
+        # Meta data known to be grouped by domain is streamed without holding back any domain
+        self.crawler_meta = CrawlerMetaReader(os.path.abspath(crawler_metadata_filepath), grouped=crawler_meta_grouped)
+        self._crawler_meta_data: CrawlerMetaData = None
+        self.results = ResultStore()
         self.number_of_processed_domains = 0
+        self.write_results = write_results
+
+        # Only the domains of the shard are analyzed, its output files get the shard as suffix
+        self.shard = shard
+        # Only the sampled domains are analyzed and the statistics are estimates, output files get `.sample` as suffix
+        self.sample = sample
+        if sample is not None and shard is not None:
+            raise ValueError('A sample can not be sharded')
+        meta_base_path = Path(crawler_metadata_filepath).parent
+        self.results_writer = ResultsWriter(
+            results_csv_path=self._output_path(meta_base_path / 'analyzer-results.csv'),
+            checkpoint_path=self._output_path(meta_base_path / 'analyzer-checkpoint.txt'),
+        )
+        self.profile_path = self._output_path(meta_base_path / 'analyzer-profile.json')
+        self._number_of_written_results = 0
+        self._unwritten_domains: List[str] = list()
+        # Results are written to the database as well, if given
+        self.results_database = results_database
+        self._number_of_stored_results = 0
 
         if checks:
             self.checks = checks
+        # Reuses results of earlier runs for unchanged pages
+        self.result_cache = result_cache
+        self.html_parser = html_parser
+        # Times checks and domains when given
+        self.profiler = profiler
+        # Bounds for pathological domains, see DomainChecker
+        self.max_page_bytes = max_page_bytes
+        self.check_time_budget = check_time_budget
+        self.domain_time_budget = domain_time_budget
+        # Where the crawled pages are read from, by default the files next to crawler.json
+        self.page_store = page_store
+        self.domain_checker = DomainChecker(self.checks, crawler_metadata_filepath, result_cache=result_cache,
+                                            html_parser=html_parser, profiler=profiler, max_page_bytes=max_page_bytes,
+                                            check_time_budget=check_time_budget,
+                                            domain_time_budget=domain_time_budget, page_store=page_store)
 
     @staticmethod
     def _import_crawler_meta(path: str) -> CrawlerMetaData:
-        """
+        """Reads the meta data of all crawled domains into memory.
 
-        :param path:
-        :param overwrite:
-        :return:
+        :param path: filepath to crawler.json (or its JSON-Lines variant)
+        :return: crawled pages grouped by domain and page type
         """
-        with open(path) as meta_file:
-            raw_json = json.loads(meta_file.read())
-            grouped_by_domain = defaultdict(lambda: defaultdict(list))
-            for page in raw_json.get('crawledPages'):
-                grouped_by_domain[page.get('originalDomain', None)][page.get('pageType', None)].append(page)
-            return grouped_by_domain
+        return CrawlerMetaReader(path).load()
+
+    @property
+    def crawler_meta_data(self) -> CrawlerMetaData:
+        # Only loaded on demand, a scan streams the domains from `crawler_meta`
+        if self._crawler_meta_data is None:
+            self._crawler_meta_data = self._import_crawler_meta(path=os.path.abspath(self.crawler_metadata_filepath))
+        return self._crawler_meta_data
+
+    @property
+    def number_of_domains(self) -> int:
+        return self.crawler_meta.number_of_domains
+
+    def _output_path(self, path: Path) -> Path:
+        if self.sample is not None:
+            return path.with_name(f'{path.stem}.sample{path.suffix}')
+        return self.shard.path_of(path) if self.shard is not None else path
 
     def failed_checks(self, identifier=None) -> List[CheckResult]:
         """Returns checks with PassType FAILED (excluding PRECONDITION_FAILED)
         """
-        if identifier:
-            return [
-                r for r in self.results
-                if r.identifier == identifier and r.passed is CheckResult.PassType.FAILED
-            ]
-        else:
-            return [
-                r for r in self.results
-                if r.passed is CheckResult.PassType.FAILED
-            ]
+        return self.results.filter(identifier=identifier or None, passed=CheckResult.PassType.FAILED)
 
     def failed_precondition(self, identifier=None) -> List[CheckResult]:
-        if identifier:
-            return [
-                r for r in self.results
-                if r.identifier == identifier and r.passed is CheckResult.PassType.PRECONDITION_FAILED
-            ]
-        else:
-            return [
-                r for r in self.results
-                if r.passed is CheckResult.PassType.PRECONDITION_FAILED
-            ]
+        return self.results.filter(identifier=identifier or None, passed=CheckResult.PassType.PRECONDITION_FAILED)
 
-    def run(self, specific_domain: str = None):
+    def run(self, specific_domain: str = None, workers: int = 1, resume: bool = False, prefetch: int = 0,
+            follow: CrawlerMetaFollower = None):
+        """Checks all domains (or only `specific_domain`).
+
+        :param workers: number of processes checking domains in parallel
+        :param resume: skip the domains which were completed by an interrupted run
+        :param prefetch: read the pages of this many domains ahead while checking (requires workers=1)
+        :param follow: analyze the domains of a crawl which is still running as soon as the follower completes them
+        """
+        if workers > 1 and prefetch:
+            raise ValueError('Prefetching pages is only supported with a single worker')
+        if self.sample is not None and follow is not None:
+            raise ValueError('The domains of a followed crawl can not be sampled')
         start_time = time.time()
-        if specific_domain is True:
+        if specific_domain is not None:
             page_types = self.crawler_meta_data.get(specific_domain)
+            if page_types is None:
+                raise ValueError(f'{specific_domain} is not in {self.crawler_metadata_filepath}')
             self._checks_for_domain(specific_domain, page_types)
+            self.number_of_processed_domains += 1
         else:
             logger.info(f'Scan started')
-            logger.info(f'Number of domains: {len(self.crawler_meta_data)}')
+            if follow is not None:
+                logger.info(f'Following {follow.path} while it is written by the crawler')
+            if self.shard is not None:
+                logger.info(f'Analyzing shard {self.shard.index} of {self.shard.count}')
+            if self.sample is not None and not self.sample.selected:
+                self.sample.select(self.crawler_meta.iter_domains())
             logger.info(f'{len(self.checks)} activated checks: {", ".join([check.IDENTIFIER for check in self.checks])}')
-            for domain, page_types in self.crawler_meta_data.items():
-                self._checks_for_domain(domain, page_types)
+            if workers > 1:
+                logger.info(f'Analyzing domains with {workers} worker processes')
+            if prefetch:
+                logger.info(f'Prefetching the pages of {prefetch} domains')
+            if resume:
+                self.results.extend(self.results_writer.resume())
+                self._number_of_written_results = len(self.results)
+                self.number_of_processed_domains = len(self.results_writer.completed_domains)
+            for domain, results in self._iter_domain_results(workers, skip=self.results_writer.completed_domains,
+                                                             prefetch=prefetch, follow=follow):
+                self.results.extend(results)
+                self._unwritten_domains.append(domain)
                 self.number_of_processed_domains += 1
                 if self.number_of_processed_domains % 50 == 0:
                     logger.info(f'Number of processed domains: {self.number_of_processed_domains}')
-                    self.write_results_to_file()
+                    if self.write_results:
+                        self.write_results_to_file()
+
+        if workers == 1:
+            logger.info(f'Results settled by preconditions: {self.domain_checker.number_of_settled_results}')
+        if self.result_cache is not None:
+            if workers == 1:
+                logger.info(f'Result cache hits: {self.result_cache.hits}, misses: {self.result_cache.misses}')
+            self.result_cache.evict()
 
         logger.info(f'\nScan finished after {round(time.time() - start_time, 2)} seconds')
-        logger.info(f'Number of domains: {len(self.crawler_meta_data)}')
+        # The statistics of a shard are relative to its own domains; a followed crawl may have ended early
+        if self.sample is not None and specific_domain is None:
+            self.log_sample_statistics()
+        elif self.shard is not None or follow is not None or specific_domain is not None:
+            self.log_statistics(self.number_of_processed_domains)
+        else:
+            self.log_statistics(self.number_of_domains)
+
+        if self.profiler is not None:
+            logger.info(f'Profile:\n{self.profiler.report()}')
+            if self.write_results:
+                logger.info(f'Writing profile to {str(self.profile_path)}')
+                self.profiler.dump(self.profile_path)
+
+    def log_statistics(self, number_of_domains: int) -> None:
+        logger.info(f'Number of domains: {number_of_domains}')
         logger.info(f'{len(self.checks)} activated checks: {", ".join([check.IDENTIFIER for check in self.checks])}')
 
         # Print statistics
         for check in self.checks:
-            failed = self.failed_checks(identifier=check.IDENTIFIER)
-            precon_failed = self.failed_precondition(identifier=check.IDENTIFIER)
-            logger.info(f'{check.IDENTIFIER} (precon failed, failed):\t{len(precon_failed)/len(self.crawler_meta_data)}\t{len(failed)/len(self.crawler_meta_data)}')
+            failed = self.results.count(identifier=check.IDENTIFIER, passed=CheckResult.PassType.FAILED)
+            precon_failed = self.results.count(identifier=check.IDENTIFIER, passed=CheckResult.PassType.PRECONDITION_FAILED)
+            logger.info(f'{check.IDENTIFIER} (precon failed, failed):\t{precon_failed/number_of_domains}\t{failed/number_of_domains}')
 
-    def write_results_to_file(self) -> None:
-        meta_base_path = Path(self.crawler_metadata_filepath).parent
-        results_csv_path: Path = meta_base_path / 'analyzer-results.csv'
-        logger.info(f'Writing results to {str(results_csv_path)}')
-
-        with results_csv_path.open('w+', encoding='utf-8') as results_file:
-            field_names = ['originalDomain', 'testIdentifier', 'passed', 'passType', 'severity', 'description']
-            writer = csv.DictWriter(
-                results_file,
-                delimiter=',',
-                quotechar='"',
-                quoting=csv.QUOTE_MINIMAL,
-                fieldnames=field_names
+    def log_sample_statistics(self) -> None:
+        """Logs the rates of all domains estimated from the sampled ones, with 95% confidence intervals.
+        """
+        checked_domains = {result.domain for result in self.results}
+        logger.info(f'Number of domains: {self.sample.number_of_domains}, estimated from a sample of '
+                    f'{len(checked_domains)} stratified by {self.sample.stratify_by}')
+        logger.info(f'{len(self.checks)} activated checks: {", ".join([check.IDENTIFIER for check in self.checks])}')
+
+        for check in self.checks:
+            failed = self.sample.estimate(
+                (result.domain for result in self.failed_checks(check.IDENTIFIER)), checked_domains
+            )
+            precon_failed = self.sample.estimate(
+                (result.domain for result in self.failed_precondition(check.IDENTIFIER)), checked_domains
+            )
+            logger.info(f'{check.IDENTIFIER} (precon failed, failed):\t{precon_failed}\t{failed}')
+
+    def merge_shard_results(self, shard_count: int = None) -> None:
+        """Combines the results of the shards of a sharded run into the results file and logs the statistics.
+
+        Only domains in the checkpoint of their shard are merged, like when resuming a shard.
+        :param shard_count: number of shards of the run, needed if the results of several sharded runs are present
+        """
+        shards = find_shards(self.results_writer.results_csv_path)
+        if shard_count is not None:
+            shards = [shard for shard in shards if shard.count == shard_count]
+        elif len({shard.count for shard in shards}) > 1:
+            raise ValueError('Results of runs with different numbers of shards are present, specify the shard count')
+        if not shards:
+            raise FileNotFoundError(f'No shard results next to {str(self.results_writer.results_csv_path)}')
+
+        domains: List[str] = list()
+        for shard in shards:
+            shard_writer = ResultsWriter(
+                results_csv_path=shard.path_of(self.results_writer.results_csv_path),
+                checkpoint_path=shard.path_of(self.results_writer.checkpoint_path),
             )
-            writer.writeheader()
-            for result in self.results:
-                writer.writerow({
-                    'originalDomain': result.domain,
-                    'testIdentifier': result.identifier,
-                    'passed': result.passed.passed,
-                    'passType': result.passed.value,
-                    'severity': result.severity,
-                    'description': result.description,
-                })
+            logger.info(f'Merging results of shard {shard.index} of {shard.count}')
+            self.results.extend(shard_writer.completed_results())
+            domains.extend(sorted(shard_writer.completed_domains))
+        self.number_of_processed_domains = len(domains)
+
+        self.results_writer.start()
+        self.results_writer.append(self.results, domains)
+        self._number_of_written_results = len(self.results)
+        self._store_results_in_database()
+        logger.info(f'Merged {len(self.results)} results of {len(domains)} domains into '
+                    f'{str(self.results_writer.results_csv_path)}')
+        self.log_statistics(self.number_of_domains)
+
+    def write_results_to_file(self) -> None:
+        """Appends the results of all domains which were completed since the last call to the results file (and to the
+        results database, if given).
+        """
+        logger.info(f'Writing results to {str(self.results_writer.results_csv_path)}')
+        self.results_writer.append(self.results[self._number_of_written_results:], self._unwritten_domains)
+        self._number_of_written_results = len(self.results)
+        self._unwritten_domains = list()
+        self._store_results_in_database()
+
+    def _store_results_in_database(self) -> None:
+        """Inserts the results since the last call into the results database, as part of a run started on first use.
+        """
+        if self.results_database is None:
+            return
+        if self.results_database.run_id is None:
+            shard = f'{self.shard.index}/{self.shard.count}' if self.shard is not None else None
+            self.results_database.start_run(os.path.abspath(self.crawler_metadata_filepath), shard=shard)
+        self.results_database.append(self.results[self._number_of_stored_results:])
+        self._number_of_stored_results = len(self.results)
 
     def _checks_for_domain(self, domain: str, page_types):
-        for check_class in self.checks:
-            check = check_class(domain, page_types, self.crawler_metadata_filepath)  # noqa
-            if not isinstance(check, MetricCheck):
-                raise InvalidMetricCheckException(f'{check.__class__} is no valid MetricCheck')
-            try:
-                result: CheckResult = check.check()
-                self.results.append(result)
-            except Exception as e:
-                logger.error(f'{domain} {check.IDENTIFIER} CHECK FAILED', exc_info=True)
-            else:
-                if result.passed is False:
-                    logger.debug(f'{domain} {result.identifier} {result.passed}', extra={'domain': domain, 'check': check.IDENTIFIER})
+        self.results.extend(self.domain_checker.check_domain(domain, page_types))
+        self._unwritten_domains.append(domain)
+
+    def _iter_domain_results(self, workers: int = 1, skip: Set[str] = frozenset(), prefetch: int = 0,
+                             follow: CrawlerMetaFollower = None) -> Iterator[Tuple[str, List[CheckResult]]]:
+        source = follow.iter_domains() if follow is not None else self.crawler_meta.iter_domains()
+        domains = (
+            (domain, page_types) for domain, page_types in source
+            if domain not in skip and (self.shard is None or self.shard.includes(domain))
+            and (self.sample is None or self.sample.includes(domain))
+        )
+        if workers > 1:
+            yield from check_domains_in_parallel(
+                domains, self.checks, self.crawler_metadata_filepath, workers=workers,
+                result_cache_path=self.result_cache.path if self.result_cache is not None else None,
+                html_parser=self.html_parser, profiler=self.profiler, max_page_bytes=self.max_page_bytes,
+                check_time_budget=self.check_time_budget, domain_time_budget=self.domain_time_budget,
+                page_store=self.page_store,
+                # Followed domains complete one by one, they shouldn't wait for others to fill a chunk
+                chunksize=1 if follow is not None else 10,
+            )
+        elif prefetch:
+            yield from DomainPipeline(domains, self.domain_checker, prefetch=prefetch)
+        else:
+            for domain, page_types in domains:
+                yield domain, self.domain_checker.check_domain(domain, page_types)
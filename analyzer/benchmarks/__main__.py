@@ -0,0 +1,64 @@
+"""
+Benchmark suite of the analyzer: `python -m analyzer.benchmarks generate` and `python -m analyzer.benchmarks run`
+"""
+import json
+import logging
+import os
+import sys
+
+import click
+
+from analyzer.benchmarks.generator import PRESETS, CrawlOutputGenerator
+from analyzer.benchmarks.runner import compare_to_baseline, load_baseline, run_benchmark, store_baseline
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER, HTML_PARSERS
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baseline.json')
+
+
+@click.group()
+def cli():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s\t%(name)s\t%(message)s')
+
+
+@click.command()
+@click.option('--size', default='1k', type=click.Choice(list(PRESETS)), help='number of generated domains')
+@click.option('--output', default='../bench-output', help='directory the crawl output is written to')
+@click.option('--seed', default=42, help='seed of the random generator')
+def generate(size, output, seed):
+    """ This command generates a synthetic crawl output. """
+    os.makedirs(output, exist_ok=True)
+    meta_data_path = CrawlOutputGenerator(output, PRESETS[size], seed=seed).generate()
+    click.echo(f'Generated {PRESETS[size]} domains, meta data at {meta_data_path}')
+
+
+@click.command()
+@click.option('--crawler-json', default='../bench-output/crawler.json', help='filepath to crawler.json')
+@click.option('--workers', default=1, type=click.IntRange(min=1), help='number of worker processes')
+@click.option('--html-parser', default=DEFAULT_HTML_PARSER, type=click.Choice(sorted(HTML_PARSERS)))
+@click.option('--baseline', default=DEFAULT_BASELINE_PATH, help='filepath to the baseline to compare against')
+@click.option('--save-baseline', default=False, is_flag=True, help='store this run as the new baseline')
+@click.option('--tolerance', default=0.2, help='relative deterioration which counts as regression')
+def run(crawler_json, workers, html_parser, baseline, save_baseline, tolerance):
+    """ This command benchmarks the analyzer on a (synthetic) crawl output. """
+    report = run_benchmark(crawler_json, workers=workers, html_parser=html_parser)
+    click.echo(json.dumps(report, indent=2, sort_keys=True))
+
+    if save_baseline:
+        store_baseline(report, baseline)
+        click.echo(f'Stored baseline at {baseline}')
+    elif os.path.exists(baseline):
+        regressions = compare_to_baseline(report, load_baseline(baseline), tolerance=tolerance)
+        for regression in regressions:
+            click.echo(f'REGRESSION: {regression}', err=True)
+        if regressions:
+            sys.exit(1)
+        click.echo('No regressions compared to the baseline')
+    else:
+        click.echo(f'No baseline at {baseline}, store one with --save-baseline')
+
+
+cli.add_command(generate)
+cli.add_command(run)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,188 @@
+"""
+Generates synthetic crawler output (crawler.json plus html pages) for benchmarking the analyzer
+"""
+import base64
+import json
+import logging
+import os
+import random
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+PRESETS = {'100': 100, '1k': 1000, '10k': 10000, '40k': 40000}
+
+TLDS = ['de', 'de', 'de', 'de', 'com', 'at', 'ch', 'eu', 'net', 'org']
+WORDS = [
+    'Angebot', 'Unternehmen', 'Produkte', 'Service', 'Kunden', 'Qualität', 'Beratung', 'Team', 'Region', 'Handwerk',
+    'Lösungen', 'Erfahrung', 'Projekte', 'Termin', 'Standort', 'Leistungen', 'Partner', 'Nachhaltigkeit', 'modern',
+    'individuell', 'zuverlässig', 'schnell', 'günstig', 'persönlich', 'unsere', 'Ihre', 'wir', 'bieten', 'mit', 'und',
+    'für', 'die', 'der', 'das', 'seit', 'Jahren', 'in', 'Deutschland', 'gerne', 'erreichen', 'Sie', 'uns',
+]
+
+# Paragraphs of a german privacy policy; the detector phrases are the ones the paragraph checks look for
+PRIVACY_PARAGRAPHS = {
+    'information-request': ('Recht auf Auskunft', 'Sie haben das Recht, gemäß Art. 15 DSGVO Auskunft über Ihre von uns '
+                                                  'verarbeiteten personenbezogenen Daten zu verlangen.'),
+    'deletion': ('Recht auf Löschung', 'Sie haben das Recht, gemäß Art. 17 DSGVO die Löschung Ihrer bei uns '
+                                       'gespeicherten personenbezogenen Daten zu verlangen.'),
+    'revocation': ('Widerruf Ihrer Einwilligung', 'Sie haben gemäß Art. 7 Abs. 3 DSGVO das Recht, Ihre einmal '
+                                                  'erteilte Einwilligung jederzeit gegenüber uns zu widerrufen.'),
+    'object': ('Widerspruchsrecht', 'Sofern Ihre personenbezogenen Daten auf Grundlage von berechtigten Interessen '
+                                    'verarbeitet werden, haben Sie das Recht, gemäß Art. 21 DSGVO Widerspruch '
+                                    'einzulegen.'),
+    'complaint': ('Beschwerderecht', 'Sie haben gemäß Art. 77 DSGVO das Recht, sich bei einer Aufsichtsbehörde zu '
+                                     'beschweren.'),
+    'portability': ('Recht auf Datenübertragbarkeit', 'Sie haben das Recht, Daten, die wir auf Grundlage Ihrer '
+                                                      'Einwilligung verarbeiten, in einem gängigen Format zu '
+                                                      'erhalten.'),
+    'non-eu-transmission': ('Datenübermittlung in Drittstaaten', 'Eine Übermittlung in ein Drittland erfolgt nur '
+                                                                 'unter den Voraussetzungen der Art. 44 ff. DSGVO.'),
+    'rectification': ('Recht auf Berichtigung', 'Sie haben das Recht, gemäß Art. 16 DSGVO unverzüglich die '
+                                                'Berichtigung unrichtiger Daten zu verlangen.'),
+}
+FILLER_PARAGRAPHS = [
+    'Der Schutz Ihrer persönlichen Daten ist uns ein besonderes Anliegen. Wir verarbeiten Ihre Daten daher '
+    'ausschließlich auf Grundlage der gesetzlichen Bestimmungen.',
+    'Personenbezogene Daten sind alle Daten, mit denen Sie persönlich identifiziert werden können. Die nachfolgenden '
+    'Hinweise geben einen einfachen Überblick darüber, was mit Ihren Daten passiert.',
+    'Beim Besuch unserer Website werden durch den auf Ihrem Endgerät zum Einsatz kommenden Browser automatisch '
+    'Informationen an den Server unserer Website gesendet und temporär in einem Logfile gespeichert.',
+    'Die Rechtsgrundlage für die Datenverarbeitung ist Art. 6 Abs. 1 S. 1 lit. f DSGVO. Unser berechtigtes Interesse '
+    'folgt aus den oben aufgelisteten Zwecken zur Datenerhebung.',
+    'Wir setzen auf unserer Seite Cookies ein. Hierbei handelt es sich um kleine Dateien, die Ihr Browser automatisch '
+    'erstellt und die auf Ihrem Endgerät gespeichert werden, wenn Sie unsere Seite besuchen.',
+]
+
+# Trackers with the probability of being used, their index page snippet and how the privacy policy mentions them
+TRACKERS = {
+    'googleanalytics': (0.5, "<script>ga('create', 'UA-{id}-1', 'auto');{anonymize}ga('send', 'pageview');</script>",
+                        'Diese Website benutzt Google Analytics, einen Webanalysedienst der Google LLC.'),
+    'matomo': (0.1, '<script src="https://stats.{domain}/piwik.js"></script>',
+               'Wir nutzen den Open-Source-Webanalysedienst Matomo (ehemals Piwik).'),
+    'facebook-pixel': (0.2, "<script>!function(f){{f.fbq=f.fbq||function(){{}}}}(window);fbq('init', '{id}');"
+                            "</script><script src=\"https://connect.facebook.net/en_US/fbevents.js\"></script>",
+                       'Wir verwenden das Besucheraktions-Pixel von Facebook Inc., 1601 S. California Ave.'),
+    'twitter': (0.1, '<script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>',
+                'Auf unseren Seiten sind Funktionen des Dienstes Twitter eingebunden, angeboten von der Twitter Inc.'),
+    'hubspot': (0.03, '<script async src="//js.hs-scripts.com/{id}.js"></script>',
+                'Wir nutzen HubSpot, einen Dienst der Hubspot Inc., für Marketing-Zwecke.'),
+    'adsense': (0.1, '<script async src="https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js"></script>'
+                     '<ins class="adsbygoogle" data-ad-client="ca-pub-{id}"></ins>',
+                'Diese Website nutzt Google AdSense, einen Dienst zum Einbinden von Werbeanzeigen der Google LLC.'),
+    'disqus': (0.05, '<div id="disqus_thread"></div><script src="https://{id}.disqus.com/embed.js" async></script>',
+               'Für die Kommentarfunktion nutzen wir Disqus, einen Dienst der Disqus Inc.'),
+    'instagram': (0.05, '<blockquote class="instagram-media" data-instgrm-version="14"></blockquote>'
+                        '<script async src="//www.instagram.com/embed.js"></script>',
+                  'Auf unseren Seiten sind Funktionen des Dienstes Instagram eingebunden, angeboten von der Meta '
+                  'Platforms Ireland Ltd.'),
+    'intercom': (0.03, "<script>window.intercomSettings = {{app_id: '{id}'}};</script>"
+                       '<script async src="https://widget.intercom.io/widget/{id}"></script>',
+                 'Für den Kundenchat nutzen wir Intercom, einen Dienst der Intercom R&D Unlimited Company.'),
+}
+
+
+class CrawlOutputGenerator:
+    """Writes a synthetic crawl with the layout of the crawler output (`<domain>/<pageType>/<n>/index.html`).
+
+    Domains get a random mix of trackers, and most of them a privacy policy which mentions a random subset of the
+    required paragraphs and of the used trackers. Page sizes are in the range of real pages: index pages are padded
+    with markup and inline images, policies with german filler text. The output is deterministic for a given seed.
+    """
+
+    def __init__(self, output_dir: str, number_of_domains: int, seed: int = 42):
+        self.output_dir = output_dir
+        self.number_of_domains = number_of_domains
+        self.random = random.Random(seed)
+
+    def generate(self) -> str:
+        """Writes the crawl and returns the path of the crawler.json.
+        """
+        crawled_pages: List[Dict] = list()
+        for i in range(self.number_of_domains):
+            domain = f'{self._word().lower()}-{self._word().lower()}{i}.{self.random.choice(TLDS)}'
+            crawled_pages.extend(self._generate_domain(domain))
+            if (i + 1) % 1000 == 0:
+                logger.info(f'Generated {i + 1} domains')
+
+        meta_data_path = os.path.join(self.output_dir, 'crawler.json')
+        with open(meta_data_path, 'w', encoding='utf-8') as meta_file:
+            json.dump({'crawledPages': crawled_pages}, meta_file, indent=2, ensure_ascii=False)
+        return meta_data_path
+
+    def _generate_domain(self, domain: str) -> List[Dict]:
+        trackers = [name for name, (probability, _, _) in TRACKERS.items() if self.random.random() < probability]
+        pages = [self._write_page(domain, 'index', 1, self._index_html(domain, trackers))]
+        if self.random.random() < 0.5:
+            pages.append(self._write_page(domain, 'contact', 1, self._contact_html(domain)))
+        if self.random.random() < 0.7:
+            number_of_policies = 2 if self.random.random() < 0.1 else 1
+            for n in range(1, number_of_policies + 1):
+                pages.append(self._write_page(domain, 'privacy', n, self._privacy_html(domain, trackers)))
+        return pages
+
+    def _write_page(self, domain: str, page_type: str, n: int, html: str) -> Dict:
+        html_file_path = os.path.join(domain, page_type, str(n), 'index.html')
+        abspath = os.path.join(self.output_dir, html_file_path)
+        os.makedirs(os.path.dirname(abspath), exist_ok=True)
+        with open(abspath, 'w', encoding='utf-8') as html_file:
+            html_file.write(html)
+        return {
+            'originalDomain': domain,
+            'actualDomain': f'www.{domain}',
+            'pageType': page_type,
+            'url': f'https://www.{domain}/{page_type if page_type != "index" else ""}',
+            'htmlFilePath': html_file_path,
+        }
+
+    def _word(self) -> str:
+        return self.random.choice(WORDS)
+
+    def _sentence(self, length: int = 12) -> str:
+        return ' '.join(self._word() for _ in range(length)).capitalize() + '.'
+
+    def _document(self, title: str, head: str, body: str) -> str:
+        return f'<!DOCTYPE html>\n<html lang="de">\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n' \
+               f'{head}\n</head>\n<body>\n<header><nav><ul>' \
+               + ''.join(f'<li><a href="/{self._word().lower()}">{self._word()}</a></li>' for _ in range(8)) \
+               + f'</ul></nav></header>\n<main>\n{body}\n</main>\n' \
+               f'<footer><a href="/impressum">Impressum</a> <a href="/datenschutz">Datenschutz</a></footer>\n' \
+               f'</body>\n</html>\n'
+
+    def _index_html(self, domain: str, trackers: List[str]) -> str:
+        head = ''
+        for tracker in trackers:
+            anonymize = "ga('set', 'anonymizeIp', true);" if self.random.random() < 0.6 else ''
+            head += TRACKERS[tracker][1].format(domain=domain, id=self.random.randint(100000, 999999),
+                                                anonymize=anonymize)
+        sections = []
+        for _ in range(self.random.randint(10, 60)):
+            sections.append(
+                f'<section class="teaser"><div class="container"><h2>{self._sentence(4)}</h2>'
+                f'<p>{" ".join(self._sentence() for _ in range(self.random.randint(2, 8)))}</p></div></section>'
+            )
+        if self.random.random() < 0.3:
+            # Inline images inflate some index pages considerably
+            image = base64.b64encode(self.random.getrandbits(8 * 30000).to_bytes(30000, 'little')).decode('ascii')
+            sections.append(f'<img alt="" src="data:image/png;base64,{image}">')
+        return self._document(f'{self._word()} {self._word()} - {domain}', head, '\n'.join(sections))
+
+    def _contact_html(self, domain: str) -> str:
+        body = f'<h1>Kontakt</h1><p>{self._sentence()}</p><p>E-Mail: info@{domain}<br>Telefon: 0123 456789</p>'
+        return self._document(f'Kontakt - {domain}', '', body)
+
+    def _privacy_html(self, domain: str, trackers: List[str]) -> str:
+        paragraphs = [f'<h1>Datenschutzerklärung</h1><p>{self.random.choice(FILLER_PARAGRAPHS)}</p>']
+        for heading, text in PRIVACY_PARAGRAPHS.values():
+            if self.random.random() < 0.75:
+                paragraphs.append(f'<h2>{heading}</h2><p>{text}</p>')
+            for _ in range(self.random.randint(1, 6)):
+                paragraphs.append(f'<p>{self.random.choice(FILLER_PARAGRAPHS)}</p>')
+        if self.random.random() < 0.5:
+            paragraphs.append('<h2>Datenschutzbeauftragter</h2><p>Unseren Datenschutzbeauftragten erreichen Sie '
+                              + (f'per E-Mail unter datenschutz@{domain}.</p>' if self.random.random() < 0.8
+                                 else 'über unsere Postanschrift.</p>'))
+        for tracker in trackers:
+            if self.random.random() < 0.7:
+                paragraphs.append(f'<p>{TRACKERS[tracker][2]}</p>')
+        return self._document(f'Datenschutz - {domain}', '', '\n'.join(paragraphs))
@@ -0,0 +1,75 @@
+"""
+Measures the throughput of `Analyzer.run` and compares it against a stored baseline
+"""
+import json
+import logging
+import resource
+import time
+from typing import Dict, List
+
+from analyzer.analyze import Analyzer
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER
+from analyzer.profiler import Profiler
+
+logger = logging.getLogger(__name__)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux; worker processes are accounted as children
+    peak_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak_rss_kb / 1024, 1)
+
+
+def run_benchmark(crawler_metadata_filepath: str, workers: int = 1, html_parser: str = DEFAULT_HTML_PARSER) -> Dict:
+    """Analyzes the crawl and returns domains/sec, time per check and peak RSS.
+    """
+    profiler = Profiler()
+    analyzer = Analyzer(crawler_metadata_filepath=crawler_metadata_filepath, write_results=False,
+                        html_parser=html_parser, profiler=profiler)
+
+    start = time.perf_counter()
+    analyzer.run(workers=workers)
+    seconds = time.perf_counter() - start
+
+    return {
+        'domains': analyzer.number_of_processed_domains,
+        'workers': workers,
+        'html_parser': html_parser,
+        'seconds': round(seconds, 3),
+        'domains_per_second': round(analyzer.number_of_processed_domains / seconds, 2),
+        'check_seconds': {identifier: round(s, 4) for identifier, s in profiler.check_seconds.items()},
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+    """Returns a description of every metric which is more than `tolerance` worse than in the baseline.
+    """
+    regressions: List[str] = list()
+    if report['domains_per_second'] < baseline['domains_per_second'] * (1 - tolerance):
+        regressions.append(f'domains/sec dropped from {baseline["domains_per_second"]} '
+                           f'to {report["domains_per_second"]}')
+    if report['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f'peak RSS grew from {baseline["peak_rss_mb"]} MB to {report["peak_rss_mb"]} MB')
+    for identifier, seconds in report['check_seconds'].items():
+        # Time per check is normalized by the number of domains, so baselines of other crawl sizes are comparable
+        baseline_seconds = baseline.get('check_seconds', {}).get(identifier)
+        if not baseline_seconds:
+            continue
+        per_domain = seconds / report['domains']
+        baseline_per_domain = baseline_seconds / baseline['domains']
+        if per_domain > baseline_per_domain * (1 + tolerance):
+            regressions.append(f'{identifier} got slower from {baseline_per_domain * 1000:.3f} ms '
+                               f'to {per_domain * 1000:.3f} ms per domain')
+    return regressions
+
+
+def load_baseline(path: str) -> Dict:
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def store_baseline(report: Dict, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(report, baseline_file, indent=2, sort_keys=True)
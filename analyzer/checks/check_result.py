@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
 
+from analyzer.checks.severity import Severity
+
 
 @dataclass
 class CheckResult:
@@ -28,5 +30,21 @@ class CheckResult:
     description: str
     severity: 'Severity'
 
+    def to_tuple(self) -> tuple:
+        """Compact representation (enums replaced by their values) for sending results between processes.
+        """
+        return self.domain, self.identifier, self.passed.value, self.description, self.severity.value
+
+    @classmethod
+    def from_tuple(cls, values: tuple) -> 'CheckResult':
+        domain, identifier, passed, description, severity = values
+        return cls(
+            domain=domain,
+            identifier=identifier,
+            passed=cls.PassType(passed),
+            description=description,
+            severity=Severity(severity),
+        )
+
     def __str__(self):
         return f'{self.domain} - {self.identifier}: {self.passed}'
@@ -1,18 +1,137 @@
-from typing import List
+from functools import lru_cache
+import mmap
+import re
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Union
 
+# Raw page content, e.g. a memory-mapped page file
+ByteContent = Union[bytes, mmap.mmap]
 
-def page_uses_service(html: str, detector_strings: List[str]) -> bool:
+
+@lru_cache(maxsize=None)
+def _byte_patterns(detector_strings: Tuple[str, ...]) -> Tuple[bytes, ...]:
+    return tuple(detector.encode('utf-8') for detector in detector_strings)
+
+
+def page_uses_service(html: Union[str, ByteContent], detector_strings: List[str]) -> bool:
     """Returns True if the given provider is detected in `html`.
+
+    `html` may also be the undecoded bytes of the page. The detectors are plain ASCII, so searching the bytes gives the
+    same result as searching the decoded text (decoding errors never swallow ASCII characters).
     """
-    for detector in detector_strings:
-        if detector in html:
+    if isinstance(html, str):
+        for detector in detector_strings:
+            if detector in html:
+                return True
+        return False
+    for pattern in _byte_patterns(tuple(detector_strings)):
+        if html.find(pattern) != -1:
             return True
     return False
 
 
+def _trie_regex(patterns: Iterable[bytes]) -> bytes:
+    """Regex matching any of `patterns`, structured as a trie: at every position of the scanned content only the
+    branch of the next byte is followed, independent of the number of patterns. Optional groups are greedy, so the
+    longest pattern matching at a position is captured.
+    """
+    trie: Dict = dict()
+    for pattern in patterns:
+        node = trie
+        for byte in pattern:
+            node = node.setdefault(byte, dict())
+        node[None] = True
+
+    def to_regex(node: Dict) -> bytes:
+        branches = [
+            re.escape(bytes([byte])) + to_regex(child)
+            for byte, child in sorted(item for item in node.items() if item[0] is not None)
+        ]
+        if not branches:
+            return b''
+        regex = branches[0] if len(branches) == 1 else b'(?:' + b'|'.join(branches) + b')'
+        if None in node:
+            # A pattern ends here, longer ones continue
+            regex = b'(?:' + regex + b')?'
+        return regex
+
+    return to_regex(trie)
+
+
+class ServiceDetector:
+    """Detects all services of a catalog (name -> detector strings) in a single scan of the page.
+
+    All detector strings are compiled into one trie-structured regex, so the cost of a scan hardly grows with the size
+    of the catalog. After every match the scan continues at the next position (not after the match), so overlapping
+    occurrences are found as well and the result equals calling `page_uses_service` for every service of the catalog.
+    """
+
+    def __init__(self, catalog: Dict[str, List[str]]):
+        self.catalog = catalog
+        services_by_pattern: Dict[bytes, set] = dict()
+        for name, detector_strings in catalog.items():
+            for pattern in _byte_patterns(tuple(detector_strings)):
+                services_by_pattern.setdefault(pattern, set()).add(name)
+        # Every pattern which matches at a position is a prefix of the (longest) captured match
+        self._services_by_match: Dict[bytes, FrozenSet[str]] = {
+            pattern: frozenset(
+                service for other, services in services_by_pattern.items() if pattern.startswith(other)
+                for service in services
+            ) for pattern in services_by_pattern
+        }
+        self._regex = re.compile(_trie_regex(services_by_pattern))
+
+    def detect(self, html: Union[str, ByteContent]) -> FrozenSet[str]:
+        """Names of all services whose detector strings occur in `html` (decoded or raw bytes).
+        """
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        detected = set()
+        match = self._regex.search(html)
+        while match is not None and len(detected) < len(self.catalog):
+            detected.update(self._services_by_match[match.group()])
+            match = self._regex.search(html, match.start() + 1)
+        return frozenset(detected)
+
+
+# Names of the services in the catalog
+GOOGLE_ANALYTICS_SERVICE = 'googleanalytics'
+GOOGLE_ANALYTICS_ANONYMIZATION_SERVICE = 'googleanalytics-anonymization'
+MATOMO_SERVICE = 'matomo'
+HUBSPOT_SERVICE = 'hubspot'
+TWITTER_SERVICE = 'twitter'
+FACEBOOK_SERVICE = 'facebook-pixel'
+ADSENSE_SERVICE = 'adsense'
+DISQUS_SERVICE = 'disqus'
+INSTAGRAM_SERVICE = 'instagram'
+INTERCOM_SERVICE = 'intercom'
+
 GOOGLE_ANALYTICS = ["ga('send'", 'ga("send"', "gtag(", "_gaq.push("]
+GOOGLE_ANALYTICS_ANONYMIZATION = ['anonymize_ip', 'anonymizeIp']  # gtag, ga
 MATOMO = ['piwik.php', 'piwik.js']
 HUBSPOT = ["js.hs-scripts.com", "js.hs-analytics.net"]
 
 TWITTER = ["platform.twitter.com/widgets.js"]
 FACEBOOK = ["fbq(", 'src="https://www.facebook.com/tr?id=', "https://connect.facebook.net"]
+ADSENSE = ["pagead2.googlesyndication.com", "adsbygoogle"]
+DISQUS = [".disqus.com/embed.js", "disqus_thread"]
+INSTAGRAM = ["instagram.com/embed.js", 'class="instagram-media"']
+INTERCOM = ["widget.intercom.io", "js.intercomcdn.com", "intercomSettings"]
+
+# Everything detected on a page in one scan, by name
+CATALOG: Dict[str, List[str]] = {
+    GOOGLE_ANALYTICS_SERVICE: GOOGLE_ANALYTICS,
+    GOOGLE_ANALYTICS_ANONYMIZATION_SERVICE: GOOGLE_ANALYTICS_ANONYMIZATION,
+    MATOMO_SERVICE: MATOMO,
+    HUBSPOT_SERVICE: HUBSPOT,
+    TWITTER_SERVICE: TWITTER,
+    FACEBOOK_SERVICE: FACEBOOK,
+    ADSENSE_SERVICE: ADSENSE,
+    DISQUS_SERVICE: DISQUS,
+    INSTAGRAM_SERVICE: INSTAGRAM,
+    INTERCOM_SERVICE: INTERCOM,
+}
+
+
+@lru_cache(maxsize=None)
+def catalog_detector() -> ServiceDetector:
+    return ServiceDetector(CATALOG)
@@ -0,0 +1,83 @@
+import logging
+from typing import Dict, FrozenSet, List, NamedTuple, Set
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.page_cache import PageCache, lazy_property
+from analyzer.checks.phrase_matcher import PhraseMatcher
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+PRIVACY_PAGE_EXISTS = 'privacy-page-exists'
+_SERVICE_USED = 'service-used:'
+
+
+def service_used(service: str) -> str:
+    """Fact that the index page uses `service` of the detectors catalog.
+    """
+    return f'{_SERVICE_USED}{service}'
+
+
+class Precondition(NamedTuple):
+    """A fact which has to hold for a check to be run; otherwise its result is `otherwise` with `description`.
+    """
+    fact: str
+    otherwise: CheckResult.PassType
+    description: str = ''
+
+
+class DomainFacts:
+    """Facts about a domain which several checks depend on. Each one is computed at most once per domain.
+
+    Whether a privacy page exists is known from the crawler meta data alone, used services need a scan of the index
+    page bytes; neither parses any html.
+    """
+
+    def __init__(self, page_types: CrawlerDomainMetaData, page_cache: PageCache, phrase_matcher: PhraseMatcher = None,
+                 checks: List = None):
+        self.page_types = page_types
+        self.page_cache = page_cache
+        self.phrase_matcher = phrase_matcher
+        # The MetricCheck classes run for the domain, they decide which phrases are searched for
+        self.checks = checks
+        self._values: Dict[str, bool] = dict()
+
+    def __getitem__(self, fact: str) -> bool:
+        if fact not in self._values:
+            self._values[fact] = self._compute(fact)
+        return self._values[fact]
+
+    def _compute(self, fact: str) -> bool:
+        if fact == PRIVACY_PAGE_EXISTS:
+            return 'privacy' in self.page_types
+        if fact.startswith(_SERVICE_USED):
+            return fact[len(_SERVICE_USED):] in self.page_cache.pages_of('index')[0].detected_services
+        raise KeyError(f'Unknown fact {fact}')
+
+    @lazy_property
+    def phrase_keys(self) -> FrozenSet[str]:
+        """Keys of the phrase matcher which are searched for: those of the checks whose preconditions hold, all of them
+        if the checks are not known.
+        """
+        if self.phrase_matcher is None:
+            return frozenset()
+        if self.checks is None:
+            return frozenset(self.phrase_matcher.phrases_by_key)
+        return frozenset(
+            check.IDENTIFIER for check in self.checks
+            if check.IDENTIFIER in self.phrase_matcher
+            and all(self[precondition.fact] for precondition in check.preconditions())
+        )
+
+    @lazy_property
+    def privacy_phrase_matches(self) -> Set[str]:
+        """Keys of `phrase_keys` whose phrases occur in the text of any privacy page.
+
+        Pages are only parsed until all keys were found, further privacy pages not at all.
+        """
+        matches: Set[str] = set()
+        for page in self.page_cache.pages_of('privacy'):
+            if len(matches) == len(self.phrase_keys):
+                break
+            matches.update(page.phrase_matches(self.phrase_matcher, self.phrase_keys - matches))
+        return matches
@@ -0,0 +1,300 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from analyzer.time_budget import check_time_budget
+
+# Tags which bs4 closes right away, they never contain text
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta', 'param',
+    'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+}
+# Text within these tags is not visible and therefore not part of the body text
+INVISIBLE_TEXT_ELEMENTS = {'script', 'style', 'template', 'rt', 'rp'}
+PRESERVE_WHITESPACE_ELEMENTS = {'pre', 'textarea'}
+_DELETE_ASCII_SPACES = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+# Characters (or bytes) of a page which are decoded and parsed at once by an incremental html parser; time budgets are
+# checked in between
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Data URIs in attribute values and css, they never contain text
+_DATA_URI_PATTERN = re.compile(r'''((?:=\s*["']?|url\(\s*["']?)data:)[^"'\s>)]*''', re.IGNORECASE)
+_SCRIPT_STYLE_START_PATTERN = re.compile(r'<(script|style)\b', re.IGNORECASE)
+_SCRIPT_STYLE_END_PATTERNS = {
+    name: re.compile(rf'</{name}\s*>', re.IGNORECASE) for name in ('script', 'style')
+}
+
+logger = logging.getLogger(__name__)
+
+
+def shrink_html(html: str, max_length: int) -> str:
+    """Shortens `html` to at most `max_length` characters for text checks, losing as little text as possible.
+
+    Data URIs are dropped first, they are never part of the text. If that's not enough, the contents of scripts and
+    styles are dropped and as a last resort the html is cut off.
+    """
+    if len(html) <= max_length:
+        return html
+    html = _DATA_URI_PATTERN.sub(r'\1', html)
+    if len(html) > max_length:
+        html = _drop_script_and_style_contents(html)
+    if len(html) > max_length:
+        html = html[:max_length]
+    return html
+
+
+def _drop_script_and_style_contents(html: str) -> str:
+    """Drops everything between the start and end tags of scripts and styles.
+
+    Scans the html once: every start tag is followed by a search for its end tag, which continues after it. An unclosed
+    script or style is kept with everything after it, like a browser treats the rest of the page as its content.
+    """
+    kept: List[str] = []
+    position = 0
+    while True:
+        start = _SCRIPT_STYLE_START_PATTERN.search(html, position)
+        if start is None:
+            break
+        start_tag_end = html.find('>', start.end())
+        if start_tag_end == -1:
+            break
+        end = _SCRIPT_STYLE_END_PATTERNS[start.group(1).lower()].search(html, start_tag_end + 1)
+        if end is None:
+            break
+        kept.append(html[position:start_tag_end + 1])
+        position = end.start()
+    kept.append(html[position:])
+    return ''.join(kept)
+
+
+@dataclass
+class PageText:
+    """Everything the checks need from the html of a page.
+    """
+    strings: List[str] = field(default_factory=list)  # all strings of the document, including comments and scripts
+    body_text: Optional[str] = None  # visible text of the body or None if there is no body
+    titles: List[str] = field(default_factory=list)
+    script_srcs: List[str] = field(default_factory=list)
+
+
+class TextSoFar(NamedTuple):
+    """Text of a page which is parsed chunk by chunk. Both lists grow while parsing continues.
+    """
+    strings: List[str]  # strings which are complete
+    body_parts: Optional[List[str]]  # parts of the body text, None until the body started (or if there is none)
+    titles: List[str]  # titles which are complete
+
+
+class HtmlParser:
+    NAME: str
+    # The text equals that of an `IncrementalExtraction`, so a page can be parsed only as far as needed
+    INCREMENTAL = False
+
+    def extract(self, page) -> PageText:
+        """Extracts the text of a ParsedPage.
+        """
+        raise NotImplementedError
+
+
+class BeautifulSoupHtmlParser(HtmlParser):
+    """Builds the full BeautifulSoup tree of the page (which is kept for checks that need it).
+
+    Outside of the main thread, time budgets can't interrupt building the tree (see `check_time_budget`).
+    """
+    NAME = 'bs4'
+
+    def extract(self, page) -> PageText:
+        soup = page.soup
+        return PageText(
+            strings=soup.find_all(string=True),
+            body_text=soup.body.text if soup.body is not None else None,
+            titles=[title.string for title in soup.find_all('title') if title.string is not None],
+            script_srcs=[script['src'] for script in soup.find_all('script', src=True)],
+        )
+
+
+class _TextExtractor(HTMLParser):
+    """Collects strings, body text, titles and script sources while parsing, without building a tree.
+
+    Tags are tracked on a stack of names only. The handling of end tags, whitespace-only strings and invisible text
+    follows the html.parser tree builder of bs4, so that the extracted text is the same.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.page_text = PageText()
+        self._stack: List[str] = list()
+        self._data: List[str] = list()
+        self._body_parts: Optional[List[str]] = None
+        self._body_index: Optional[int] = None
+        self._title: Optional[Dict] = None
+
+    def _in_body(self) -> bool:
+        return self._body_index is not None and len(self._stack) > self._body_index \
+            and self._stack[self._body_index] == 'body'
+
+    def _end_data(self, is_text: bool = True) -> None:
+        """Adds the collected data as one string; `is_text` is False for comments and declarations.
+        """
+        if not self._data:
+            return
+        data = ''.join(self._data)
+        self._data = list()
+        if not data.translate(_DELETE_ASCII_SPACES) and not PRESERVE_WHITESPACE_ELEMENTS.intersection(self._stack):
+            data = '\n' if '\n' in data else ' '
+        self.page_text.strings.append(data)
+        if self._title is not None and len(self._stack) == self._title['depth']:
+            self._title['children'].append(data)
+        if is_text and self._in_body():
+            container = next((tag for tag in reversed(self._stack) if tag in INVISIBLE_TEXT_ELEMENTS), None)
+            if container is None:
+                self._body_parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_data()
+        if self._title is not None and len(self._stack) == self._title['depth']:
+            self._title['children'].append(None)
+        if tag == 'script':
+            src = dict(attrs).get('src')
+            if src is not None:
+                self.page_text.script_srcs.append(src)
+        if tag in VOID_ELEMENTS:
+            return
+        self._stack.append(tag)
+        if tag == 'body' and self._body_index is None:
+            self._body_index = len(self._stack) - 1
+            self._body_parts = list()
+        elif tag == 'title' and self._title is None:
+            self._title = {'depth': len(self._stack), 'children': list()}
+
+    def handle_startendtag(self, tag, attrs):
+        # An element which is opened and closed right away
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._end_data()
+        if tag not in self._stack:
+            return
+        while self._stack:
+            popped = self._stack.pop()
+            if self._title is not None and len(self._stack) < self._title['depth']:
+                self._end_title()
+            if popped == tag:
+                break
+
+    @property
+    def body_parts(self) -> Optional[List[str]]:
+        """Parts of the body text of the strings which are complete, None if the body didn't start yet.
+        """
+        return self._body_parts
+
+    def _end_title(self) -> None:
+        # Like `Tag.string`, a title only has a string if it has a single child which is a string
+        children = self._title['children']
+        if len(children) == 1 and children[0] is not None:
+            self.page_text.titles.append(children[0])
+        self._title = None
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._end_data()
+        self._data.append(data)
+        self._end_data(is_text=False)
+
+    def handle_decl(self, decl):
+        self._end_data()
+        self._data.append(decl[len('DOCTYPE '):] if decl.upper().startswith('DOCTYPE ') else decl)
+        self._end_data(is_text=False)
+
+    def handle_pi(self, data):
+        self._end_data()
+        self._data.append(data)
+        self._end_data(is_text=False)
+
+    def unknown_decl(self, data):
+        self._end_data()
+        if data.upper().startswith('CDATA['):
+            # CDATA sections are text, other declarations are not
+            self._data.append(data[len('CDATA['):])
+            self._end_data()
+        else:
+            self._data.append(data)
+            self._end_data(is_text=False)
+
+    def close(self):
+        super().close()
+        self._end_data()
+        if self._title is not None:
+            self._end_title()
+        if self._body_parts is not None:
+            self.page_text.body_text = ''.join(self._body_parts)
+
+
+class IncrementalExtraction:
+    """Extracts the text of html which is parsed chunk by chunk, so that a caller can stop parsing as soon as it found
+    what it is looking for and continue later on. The text is the same as that of the `StreamingHtmlParser`.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._extractor = _TextExtractor()
+        self.finished = False
+
+    def text_so_far(self) -> TextSoFar:
+        """Text of the html parsed so far. Strings only count once they are complete, the body text is the joined
+        `body_parts`.
+        """
+        page_text = self._extractor.page_text
+        return TextSoFar(page_text.strings, self._extractor.body_parts, page_text.titles)
+
+    def advance(self) -> None:
+        """Parses the next chunk, after the last one the document is closed.
+
+        If parsing raises (e.g. `TimeBudgetExceeded`), the state of the extraction is unknown and it must not be used
+        anymore.
+        """
+        check_time_budget()
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._extractor.close()
+            self.finished = True
+        else:
+            self._extractor.feed(chunk)
+
+    def finish(self) -> PageText:
+        """Parses the rest of the html.
+        """
+        while not self.finished:
+            self.advance()
+        return self._extractor.page_text
+
+
+class StreamingHtmlParser(HtmlParser):
+    """Strips the tags while parsing, which is considerably faster than building the BeautifulSoup tree.
+
+    Checks which only look for phrases stop parsing a page once they found all of them (see `ParsedPage.parse_steps`).
+    """
+    NAME = 'stream'
+    INCREMENTAL = True
+
+    def extract(self, page) -> PageText:
+        html = page.html
+        return IncrementalExtraction(
+            html[start:start + PARSE_CHUNK_SIZE] for start in range(0, len(html), PARSE_CHUNK_SIZE)
+        ).finish()
+
+
+HTML_PARSERS: Dict[str, HtmlParser] = {
+    parser.NAME: parser for parser in [BeautifulSoupHtmlParser(), StreamingHtmlParser()]
+}
+DEFAULT_HTML_PARSER = BeautifulSoupHtmlParser.NAME
+
+
+def get_html_parser(name: str = DEFAULT_HTML_PARSER) -> HtmlParser:
+    return HTML_PARSERS[name]
@@ -1,24 +1,54 @@
 import logging
-import os
 import re
 from abc import ABC, abstractmethod
-from typing import Dict, List
-
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from typing import List, Optional, Pattern, Tuple, Union
 
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import DomainFacts, Precondition
+from analyzer.checks.page_cache import PageCache, ParsedPage
+from analyzer.checks.phrase_matcher import PhraseMatcher
 from analyzer.checks.severity import Severity
 from analyzer.types_definitions import CrawlerDomainMetaData
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _compile_phrase(phrase: str) -> Pattern:
+    # Detector phrases are regular expressions and match case insensitive
+    return re.compile(phrase, re.IGNORECASE)
+
+
 class MetricCheck(ABC):
+    # Has to be increased whenever the logic or detectors of a check change, otherwise cached results are reused
+    VERSION: int = 1
+    # Page types the check reads, cached results are invalidated when one of their pages changes (None: all pages)
+    PAGE_TYPES: Optional[Tuple[str, ...]] = None
 
-    def __init__(self, domain: str, page_types: CrawlerDomainMetaData, meta_data_filepath: str, *args, **kwargs):
+    def __init__(self, domain: str, page_types: CrawlerDomainMetaData, meta_data_filepath: str,
+                 page_cache: PageCache = None, phrase_matcher: PhraseMatcher = None, facts: DomainFacts = None,
+                 *args, **kwargs):
         self.domain = domain
         self.page_types = page_types
         self.meta_data_filepath = meta_data_filepath
+        # The analyzer shares one cache across all checks of a domain. Checks instantiated on their own get their own.
+        self.page_cache = page_cache if page_cache is not None else PageCache(meta_data_filepath, page_types)
+        self.phrase_matcher = phrase_matcher
+        # Facts shared by all checks of a domain
+        self.facts = facts if facts is not None else DomainFacts(page_types, self.page_cache, phrase_matcher)
+
+    @classmethod
+    def text_phrases(cls) -> List[str]:
+        """Phrases the check searches for in the text of a page. They get registered at the shared PhraseMatcher.
+        """
+        return []
+
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        """Facts the check depends on. If one of them does not hold, the result is settled without running the check.
+        """
+        return []
 
     def _get_check_result(self, passed: CheckResult.PassType, description: str = '') -> CheckResult:
         return CheckResult(
@@ -29,26 +59,38 @@ class MetricCheck(ABC):
             description=description
         )
 
+    def get_pages_of(self, page_type: str) -> List[ParsedPage]:
+        return self.page_cache.pages_of(page_type)
+
     def get_html_strings_of(self, page_type: str) -> List[str]:
-        html_strings: List[str] = list()
-        for page in self.page_types.get(page_type, []):
-            html_abspath = os.path.join(os.path.dirname(self.meta_data_filepath), page['htmlFilePath'])
-            with open(html_abspath, 'rb') as f:
-                # don't fail on encoding issues, but replace the faulty characters
-                html = f.read().decode('utf-8', errors='replace')
-                html_strings.append(html)
-        return html_strings
-
-    def phrase_in_html_body(self, phrase: str, html: str) -> bool:
-        # ToDo: Don't instantiate bs for every call, share it across checks based on the html content / hash
-        soup = BeautifulSoup(html, 'html.parser')
-        # We're compiling a regex here, otherwise bs4 would only return for *exact* matches.
-        return soup.find(text=re.compile(phrase, re.IGNORECASE)) is not None
-
-    def phrase_in_page_title(selfself, phrase: str, html: str) -> bool:
-        soup = BeautifulSoup(html, 'html.parser')
-        # We're compiling a regex here, otherwise bs4 would only return for *exact* matches.
-        return soup.find('title', text=re.compile(phrase, re.IGNORECASE)) is not None
+        return [page.html for page in self.get_pages_of(page_type)]
+
+    def phrase_in_html_body(self, phrase: str, page: Union[ParsedPage, str]) -> bool:
+        if isinstance(page, str):
+            page = ParsedPage.from_html(page)
+        return _compile_phrase(phrase).search(page.text) is not None
+
+    def text_mentions_phrases(self, page: ParsedPage) -> bool:
+        """Returns True if one of the `text_phrases` of the check occurs in the text of `page`.
+        """
+        if self.phrase_matcher is not None and self.IDENTIFIER in self.phrase_matcher:
+            return self.IDENTIFIER in page.phrase_matches(self.phrase_matcher)
+        return any(self.phrase_in_html_body(phrase, page) for phrase in self.text_phrases())
+
+    def privacy_pages_mention_phrases(self) -> bool:
+        """Returns True if one of the `text_phrases` of the check occurs in the text of any privacy page.
+        """
+        if self.IDENTIFIER in self.facts.phrase_keys:
+            return self.IDENTIFIER in self.facts.privacy_phrase_matches
+        return any(self.text_mentions_phrases(page) for page in self.get_pages_of('privacy'))
+
+    def phrase_in_page_title(self, phrase: str, page: Union[ParsedPage, str]) -> bool:
+        """Returns True if `phrase` occurs in a title of the head of `page` (see `ParsedPage.head_titles`).
+        """
+        if isinstance(page, str):
+            page = ParsedPage.from_html(page)
+        regex = _compile_phrase(phrase)
+        return any(regex.search(title) for title in page.head_titles)
 
     @property
     @abstractmethod
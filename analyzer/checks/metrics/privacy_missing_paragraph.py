@@ -2,39 +2,38 @@ import logging
 from abc import abstractmethod
 from typing import List
 
-from bs4 import BeautifulSoup
-
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import PRIVACY_PAGE_EXISTS, Precondition
 from analyzer.checks.metrics import MetricCheck
+from analyzer.checks.proximity import ProximityIndex, proximity_scanner
 from analyzer.checks.severity import Severity
 
 logger = logging.getLogger(__name__)
 
+NO_PRIVACY_STATEMENT = 'There seems to be no privacy statement at all.'
+
 
 class BasePrivacyMissingParagraphCheck(MetricCheck):
+    PAGE_TYPES = ('privacy',)
+
     def check(self) -> CheckResult:
-        if 'privacy' not in self.page_types:
-            return self._get_check_result(
-                CheckResult.PassType.PRECONDITION_FAILED, 'There seems to be no privacy statement at all.'
-            )
+        if not self.facts[PRIVACY_PAGE_EXISTS]:
+            return self._get_check_result(CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)
 
         # It might be that the crawler identified multiple privacy statement pages.
         # We're testing all and return "passed" if one of them passes
-        for html in self.get_html_strings_of(page_type='privacy'):
-            mention = self._html_mentions_phrase(html)
-            if mention:
-                return self._get_check_result(passed=CheckResult.PassType.PASSED)
+        if self.privacy_pages_mention_phrases():
+            return self._get_check_result(passed=CheckResult.PassType.PASSED)
         logger.debug(f'{self.domain} {self.IDENTIFIER} failed')
         return self._get_check_result(passed=CheckResult.PassType.FAILED)
 
-    def _html_mentions_phrase(self, html: str) -> bool:
-        """Returns True if the given provider is mentioned in `html`.
-        """
-        for detector in self._detector_strings:
-            match = self.phrase_in_html_body(detector, html)
-            if match:
-                return True
-        return False
+    @classmethod
+    def text_phrases(cls) -> List[str]:
+        return cls._detector_strings
+
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        return [Precondition(PRIVACY_PAGE_EXISTS, CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)]
 
     @property
     @abstractmethod
@@ -84,17 +83,13 @@ class GDPRNonEuTransmissionMissingCheck(BasePrivacyMissingParagraphCheck, Metric
     _detector_strings = ['Drittstaat', 'Drittland',  'Mitgliedstaat', 'Datenübermittlung in Drittstaaten', 'Datenübertragung in Drittstaaten', 'Art. 44', 'Artikel 44']
 
     def check(self) -> CheckResult:
-        if 'privacy' not in self.page_types:
-            return self._get_check_result(
-                CheckResult.PassType.PRECONDITION_FAILED, 'There seems to be no privacy statement at all.'
-            )
+        if not self.facts[PRIVACY_PAGE_EXISTS]:
+            return self._get_check_result(CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)
 
         # It might be that the crawler identified multiple privacy statement pages.
         # We're testing all and return "passed" if one of them passes
-        for html in self.get_html_strings_of(page_type='privacy'):
-            mention = self._html_mentions_phrase(html)
-            if mention:
-                return self._get_check_result(passed=CheckResult.PassType.PASSED)
+        if self.privacy_pages_mention_phrases():
+            return self._get_check_result(passed=CheckResult.PassType.PASSED)
         logger.debug(f'{self.domain} {self.IDENTIFIER} uncertain')
         return self._get_check_result(passed=CheckResult.PassType.UNCERTAIN, description='Uncertain because we cannot tell whether transmissions occured')
 
@@ -108,37 +103,69 @@ class GDPRRectificationMissingCheck(BasePrivacyMissingParagraphCheck, MetricChec
 class ProtectionOfficerMissingContactDetailsCheck(MetricCheck):
     IDENTIFIER = 'privacy-missing-officer-contact-details'
     SEVERITY = Severity.MEDIUM
+    PAGE_TYPES = ('privacy',)
+    # 2: every mention of an officer is examined, not only the first one
+    VERSION = 2
 
-    _email__detector_strings = ['E-Mail', 'Email', 'Mail', '@']
+    _email__detector_strings = ['E-Mail', 'Email', 'Mail']
+    _at__detector_strings = ['@']
     _phone__detector_strings = ['Telefon', 'Mobil']
     _officer__detector_strings = ['Datenschutzbeauftragter', 'verantwortliche Datenschutzbeauftragte', 'Datenschutzbeauftragten']
+    # Contact details are searched from this many characters before to this many characters after a mentioned officer
+    _contact_details_before = 200
+    _contact_details_after = 1500
+
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        return [Precondition(PRIVACY_PAGE_EXISTS, CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)]
+
+    @classmethod
+    def _term_classes(cls):
+        return (
+            ('officer', tuple(cls._officer__detector_strings)),
+            ('email', tuple(cls._email__detector_strings)),
+            ('at', tuple(cls._at__detector_strings)),
+            ('phone', tuple(cls._phone__detector_strings)),
+        )
+
+    def _officer_has_contact_details(self, index: ProximityIndex) -> bool:
+        return index.any_near('officer', ['email', 'at', 'phone'], before=self._contact_details_before,
+                              after=self._contact_details_after)
 
     def check(self) -> CheckResult:
-        if 'privacy' not in self.page_types:
-            return self._get_check_result(
-                CheckResult.PassType.PRECONDITION_FAILED, 'There seems to be no privacy statement at all.'
-            )
+        if not self.facts[PRIVACY_PAGE_EXISTS]:
+            return self._get_check_result(CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)
 
         found_officer = False
-        for html in self.get_html_strings_of(page_type='privacy'):
-            soup = BeautifulSoup(html, 'html.parser')
-            if soup.body is None:
+        scanner = proximity_scanner(self._term_classes())
+        for page in self.get_pages_of(page_type='privacy'):
+            growing_index = None
+            number_of_body_parts = 0
+            for text in page.parse_steps():
+                if text.body_parts is None:
+                    continue
+                if growing_index is None:
+                    growing_index = scanner.growing_index()
+                # Every mention of the data protection officer, only the body text parsed since the last step is scanned
+                growing_index.append(''.join(text.body_parts[number_of_body_parts:]))
+                number_of_body_parts = len(text.body_parts)
+                # Contact details of an officer mentioned early in a large page are found before all of it is parsed;
+                # only occurrences which more text can't change count
+                if self._officer_has_contact_details(growing_index.settled):
+                    return self._get_check_result(
+                        CheckResult.PassType.PASSED, 'The stated data protection officer has contact details'
+                    )
+            if growing_index is None:
                 continue
 
-            # Check whether there is a section about the data protection officer
-            txt: str = soup.body.text
-            for detector in self._officer__detector_strings:
-                position_data_protection_officer = txt.find(detector)
-                if position_data_protection_officer != -1:
-                    # There is an officer -> Check whether we find an email or phone number within the next lines
-                    found_officer = True
-                    lookup_text_range = txt[position_data_protection_officer-200:position_data_protection_officer+1500]
-                    for s in self._email__detector_strings + self._phone__detector_strings:
-                        found = lookup_text_range.find(s)
-                        if found != -1:
-                            return self._get_check_result(
-                                CheckResult.PassType.PASSED, 'The stated data protection officer has contact details'
-                            )
+            index = growing_index.complete()
+            if index['officer']:
+                found_officer = True
+                # There is an officer -> Check whether we find an email or phone number within the next lines
+                if self._officer_has_contact_details(index):
+                    return self._get_check_result(
+                        CheckResult.PassType.PASSED, 'The stated data protection officer has contact details'
+                    )
         # If we get here, we didn't find a candidate at all or only candidates without contact details
         if found_officer is True:
             # We found an officer without contact details
@@ -4,53 +4,62 @@ from typing import List
 
 from analyzer.checks import detectors
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import PRIVACY_PAGE_EXISTS, Precondition, service_used
 from analyzer.checks.metrics import MetricCheck
+from analyzer.checks.page_cache import ParsedPage
 from analyzer.checks.severity import Severity
 
 logger = logging.getLogger(__name__)
 
+NO_PRIVACY_STATEMENT = 'The tested third party is used in the index page but there seems to be no privacy statement ' \
+                       'at all.'
+
 
 class BasePrivacyMissingThirdPartyCheck(ABC):
     SEVERITY = Severity.LOW
+    PAGE_TYPES = ('index', 'privacy')
 
     def check(self) -> CheckResult:
-        # first determine whether the html of the index page uses the given third party service
-        idx_html = self.get_html_strings_of(page_type='index')[0]
-        uses_service = detectors.page_uses_service(idx_html, self._detector_strings)
-        if not uses_service:
+        # first determine whether the html of the index page uses the given third party service;
+        # the services are detected once per page for all checks
+        if not self.facts[service_used(self.SERVICE)]:
             # Index page does not use the given third party service -> no need to mention it in the privacy statement
             return self._get_check_result(CheckResult.PassType.NOT_APPLICABLE)
 
-        if 'privacy' not in self.page_types:
+        if not self.facts[PRIVACY_PAGE_EXISTS]:
             # Index page uses service but there is no privacy statement -> service not mentioned in privacy statement
             logger.debug(f'{self.domain} {self.IDENTIFIER} is used without having a privacy policy!')
-            return self._get_check_result(
-                CheckResult.PassType.PRECONDITION_FAILED,
-                'The tested third party is used in the index page but there seems to be no privacy statement at all.'
-            )
+            return self._get_check_result(CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT)
 
         # It might be that the crawler identified multiple privacy statement pages.
         # We're testing all and return "passed" if one of them passes
-        for html in self.get_html_strings_of(page_type='privacy'):
-            mention = self.html_mentions_service(html)
-            if mention:
-                logger.debug(f'{self.domain} passed!')
-                return self._get_check_result(passed=CheckResult.PassType.PASSED)
+        if self.privacy_pages_mention_phrases():
+            logger.debug(f'{self.domain} passed!')
+            return self._get_check_result(passed=CheckResult.PassType.PASSED)
         logger.debug(f'{self.domain} {self.IDENTIFIER} failed')
         return self._get_check_result(passed=CheckResult.PassType.FAILED)
 
-    def html_mentions_service(self, html: str) -> bool:
-        """Returns True if the given provider is mentioned in `html`.
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        return [
+            Precondition(service_used(cls.SERVICE), CheckResult.PassType.NOT_APPLICABLE),
+            Precondition(PRIVACY_PAGE_EXISTS, CheckResult.PassType.PRECONDITION_FAILED, NO_PRIVACY_STATEMENT),
+        ]
+
+    @classmethod
+    def text_phrases(cls) -> List[str]:
+        return cls._mention_detector_strings
+
+    def html_mentions_service(self, page: ParsedPage) -> bool:
+        """Returns True if the given provider is mentioned in `page`.
         """
-        for detector in self._mention_detector_strings:
-            match = self.phrase_in_html_body(detector, html)
-            if match:
-                return True
-        return False
+        return self.text_mentions_phrases(page)
 
     @property
     @abstractmethod
-    def _detector_strings(self) -> List[str]:
+    def SERVICE(self) -> str:
+        """Name of the service in `detectors.CATALOG`
+        """
         raise NotImplementedError
 
     @property
@@ -61,39 +70,66 @@ class BasePrivacyMissingThirdPartyCheck(ABC):
 
 class PrivacyMissingGoogleAnalyticsCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
     IDENTIFIER = 'privacy-missing-thirdparty-googleanalytics'
-    _detector_strings = detectors.GOOGLE_ANALYTICS
+    SERVICE = detectors.GOOGLE_ANALYTICS_SERVICE
     _mention_detector_strings = ['Google Analytics', 'Google Tag Manager']
 
 
 class PrivacyMissingFacebookPixelCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
     IDENTIFIER = 'privacy-missing-thirdparty-facebook-pixel'
-    _detector_strings = detectors.FACEBOOK
+    SERVICE = detectors.FACEBOOK_SERVICE
     _mention_detector_strings = ['Facebook Inc']
 
 
 class PrivacyMissingTwitterCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
     IDENTIFIER = 'privacy-missing-thirdparty-twitter'
-    _detector_strings = detectors.TWITTER
+    SERVICE = detectors.TWITTER_SERVICE
     _mention_detector_strings = ['Twitter Inc']
 
 
 class PrivacyMissingMatomoCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
     IDENTIFIER = 'privacy-missing-thirdparty-matomo'
-    _detector_strings = detectors.MATOMO
+    SERVICE = detectors.MATOMO_SERVICE
     _mention_detector_strings = ['Piwik', 'Matomo']
 
 
 class PrivacyMissingHubspotCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
     IDENTIFIER = 'privacy-missing-thirdparty-hubspot'
-    _detector_strings = detectors.HUBSPOT
+    SERVICE = detectors.HUBSPOT_SERVICE
     _mention_detector_strings = ['Hubspot Inc']
 
 
-# ToDo: Implement more third party integrations: AdSense, Disqus, Instagram, Interecom, ...
+class PrivacyMissingAdSenseCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
+    IDENTIFIER = 'privacy-missing-thirdparty-adsense'
+    SERVICE = detectors.ADSENSE_SERVICE
+    _mention_detector_strings = ['AdSense']
+
+
+class PrivacyMissingDisqusCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
+    IDENTIFIER = 'privacy-missing-thirdparty-disqus'
+    SERVICE = detectors.DISQUS_SERVICE
+    _mention_detector_strings = ['Disqus']
+
+
+class PrivacyMissingInstagramCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
+    IDENTIFIER = 'privacy-missing-thirdparty-instagram'
+    SERVICE = detectors.INSTAGRAM_SERVICE
+    _mention_detector_strings = ['Instagram']
+
+
+class PrivacyMissingIntercomCheck(BasePrivacyMissingThirdPartyCheck, MetricCheck):
+    IDENTIFIER = 'privacy-missing-thirdparty-intercom'
+    SERVICE = detectors.INTERCOM_SERVICE
+    _mention_detector_strings = ['Intercom']
+
+
 ALL_METRICS = [
     PrivacyMissingGoogleAnalyticsCheck,
     PrivacyMissingMatomoCheck,
     PrivacyMissingFacebookPixelCheck,
     PrivacyMissingTwitterCheck,
     PrivacyMissingHubspotCheck,
+    PrivacyMissingAdSenseCheck,
+    PrivacyMissingDisqusCheck,
+    PrivacyMissingInstagramCheck,
+    PrivacyMissingIntercomCheck,
 ]
\ No newline at end of file
@@ -1,8 +1,8 @@
 import logging
-
-from bs4 import BeautifulSoup
+from typing import List
 
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import PRIVACY_PAGE_EXISTS, Precondition
 from analyzer.checks.metrics import MetricCheck
 from analyzer.checks.severity import Severity
 
@@ -12,20 +12,31 @@ logger = logging.getLogger(__name__)
 class PrivacyStatementMissingCheck(MetricCheck):
     IDENTIFIER = 'privacy-statement-missing'
     SEVERITY = Severity.CRITICAL
+    PAGE_TYPES = ('privacy',)
     _title_detector_strings = ['Datenschutz', 'Privatsphäre', 'Privacy']
 
+    @classmethod
+    def text_phrases(cls) -> List[str]:
+        return cls._title_detector_strings
+
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        return [Precondition(PRIVACY_PAGE_EXISTS, CheckResult.PassType.FAILED)]
+
     def check(self) -> CheckResult:
         # logger.debug(f'{self.domain} crawled page_types: {list(self.page_types.items())}')
 
-        privacy_page_type_exists = 'privacy' in self.page_types
-        if not privacy_page_type_exists:
+        if not self.facts[PRIVACY_PAGE_EXISTS]:
             return self._get_check_result(CheckResult.PassType.FAILED)
 
-        # Check whether "Datenschutz" is present in the page body
-        for html in self.get_html_strings_of(page_type='privacy'):
+        # Titles are in the head, so they are known before most of a page is parsed
+        for page in self.get_pages_of(page_type='privacy'):
             for phrase in self._title_detector_strings:
-                res = self.phrase_in_page_title(phrase, html) or self.phrase_in_html_body(phrase, html)
-                if res is True:
+                if self.phrase_in_page_title(phrase, page):
                     return self._get_check_result(CheckResult.PassType.PASSED)
 
+        # Check whether "Datenschutz" is present in the page body
+        if self.privacy_pages_mention_phrases():
+            return self._get_check_result(CheckResult.PassType.PASSED)
+
         return self._get_check_result(CheckResult.PassType.UNCERTAIN)
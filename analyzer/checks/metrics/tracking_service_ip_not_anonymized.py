@@ -1,56 +1,55 @@
 import logging
-import os
 from abc import ABC, abstractmethod
+from typing import List
 
 from analyzer.checks import detectors
 from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import Precondition, service_used
 from analyzer.checks.metrics import MetricCheck
+from analyzer.checks.page_cache import ParsedPage
 from analyzer.checks.severity import Severity
 
 logger = logging.getLogger(__name__)
 
 
 class BaseTrackingServiceIPNotAnonymizedCheck(ABC):
+    PAGE_TYPES = ('index',)
 
     def check(self) -> CheckResult:
         # logger.debug(f'{self.domain} crawled pages: {list(self.page_types)}')
-        idx_html_path = self.page_types['index'][0]['htmlFilePath']  # ToDo: Error handling
-        idx_html_abspath = os.path.join(os.path.dirname(self.meta_data_filepath), idx_html_path)
-        with open(idx_html_abspath, 'rb') as f:
-            # don't fail on encoding issues, but replace the faulty characters
-            html = f.read().decode('utf-8', errors='replace')
-            result: CheckResult.PassType
-            if self._page_uses_service(html):
-                result = CheckResult.PassType.FAILED if self._service_anonymization_not_implemented(html) \
-                    else CheckResult.PassType.PASSED
-            else:
-                result = CheckResult.PassType.NOT_APPLICABLE
+        # The services are detected in the raw bytes of the page, once for all checks; it never gets decoded
+        page = self.get_pages_of(page_type='index')[0]  # ToDo: Error handling
+        result: CheckResult.PassType
+        if self.facts[service_used(self.SERVICE)]:
+            result = CheckResult.PassType.FAILED if self._service_anonymization_not_implemented(page) \
+                else CheckResult.PassType.PASSED
+        else:
+            result = CheckResult.PassType.NOT_APPLICABLE
         return self._get_check_result(result)
 
+    @classmethod
+    def preconditions(cls) -> List[Precondition]:
+        return [Precondition(service_used(cls.SERVICE), CheckResult.PassType.NOT_APPLICABLE)]
+
+    @property
     @abstractmethod
-    def _page_uses_service(self, html):
-        raise NotImplementedError()
+    def SERVICE(self) -> str:
+        """Name of the tracking service in `detectors.CATALOG`
+        """
+        raise NotImplementedError
 
     @abstractmethod
-    def _service_anonymization_not_implemented(self, html):
+    def _service_anonymization_not_implemented(self, page: ParsedPage):
         raise NotImplementedError()
 
 
 class GoogleAnalyticsIPNotAnonymizedCheck(BaseTrackingServiceIPNotAnonymizedCheck, MetricCheck):
     IDENTIFIER = 'ip-not-anonymized-googleanalytics'
     SEVERITY = Severity.MEDIUM
+    SERVICE = detectors.GOOGLE_ANALYTICS_SERVICE
 
-    def _page_uses_service(self, html: str) -> bool:
-        return detectors.page_uses_service(html, detectors.GOOGLE_ANALYTICS)
-
-    def _service_anonymization_not_implemented(self, html):
-        anonymize_detectors = ['anonymize_ip', 'anonymizeIp', ]  # gtag, ga,
-        has_anon = False
-        for detector in anonymize_detectors:
-            if detector in html:
-                has_anon = True
-                break
-        return not has_anon
+    def _service_anonymization_not_implemented(self, page: ParsedPage):
+        return detectors.GOOGLE_ANALYTICS_ANONYMIZATION_SERVICE not in page.detected_services
 
 ALL_METRICS = [
     GoogleAnalyticsIPNotAnonymizedCheck,
@@ -0,0 +1,258 @@
+import codecs
+import hashlib
+import logging
+import mmap
+import os
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set
+
+from bs4 import BeautifulSoup
+
+from analyzer.checks.detectors import ByteContent, catalog_detector
+from analyzer.checks.html_parsers import PARSE_CHUNK_SIZE, HtmlParser, IncrementalExtraction, PageText, TextSoFar, \
+    get_html_parser, shrink_html
+from analyzer.checks.phrase_matcher import PhraseMatcher
+from analyzer.page_store import DirectoryPageStore, PageStore
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+
+class lazy_property:
+    """Computes the decorated method on first access and stores the result on the instance.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class ParsedPage:
+    """A crawled page whose representations (raw bytes, decoded html, soup, text) are computed at most once.
+    """
+
+    def __init__(self, path: Optional[str] = None, raw: Optional[bytes] = None, html_parser: HtmlParser = None,
+                 max_bytes: int = None, page_store: PageStore = None, html_path: Optional[str] = None):
+        if path is None and raw is None:
+            raise ValueError('Either path or raw has to be given')
+        self.path = path
+        # The page is read from `page_store` by its htmlFilePath, by default from the file at `path`
+        self.page_store = page_store if page_store is not None else DirectoryPageStore('')
+        self.html_path = html_path if html_path is not None else path
+        self.html_parser = html_parser if html_parser is not None else get_html_parser()
+        # Larger pages get shrunk before their text is extracted (services are still detected in all bytes)
+        self.max_bytes = max_bytes
+        self.truncated = False
+        if raw is not None:
+            self.raw = raw
+
+    @classmethod
+    def from_html(cls, html: str, html_parser: HtmlParser = None) -> 'ParsedPage':
+        page = cls(raw=html.encode('utf-8'), html_parser=html_parser)
+        page.html = html
+        return page
+
+    @lazy_property
+    def raw(self) -> bytes:
+        return self.page_store.read(self.html_path)
+
+    @lazy_property
+    def mapped(self) -> ByteContent:
+        """Read-only memory map of the page file, for matching bytes without reading or decoding the whole file.
+        Pages of a packed store are read instead.
+        """
+        if self.path is None or 'raw' in self.__dict__:
+            return self.raw
+        return self.page_store.map(self.html_path)
+
+    @lazy_property
+    def html(self) -> str:
+        # don't fail on encoding issues, but replace the faulty characters
+        html = self.raw.decode('utf-8', errors='replace')
+        if self.max_bytes is not None and len(self.raw) > self.max_bytes:
+            html = shrink_html(html, self.max_bytes)
+            self.truncated = True
+            logger.info(f'{self.path} has {len(self.raw)} bytes, shrunk it to {len(html)} characters')
+        return html
+
+    @lazy_property
+    def content_hash(self) -> bytes:
+        return hashlib.blake2b(self.mapped, digest_size=20).digest()
+
+    @lazy_property
+    def detected_services(self) -> FrozenSet[str]:
+        """Names of all services of the detectors catalog used by the page, found in a single scan of its bytes.
+        """
+        return catalog_detector().detect(self.mapped)
+
+    @lazy_property
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.html, 'html.parser')
+
+    @lazy_property
+    def extracted(self) -> PageText:
+        extraction = self.__dict__.pop('_extraction', None)
+        if extraction is not None:
+            # Continue where the scans which stopped early left off
+            return extraction.finish()
+        return self.html_parser.extract(self)
+
+    @lazy_property
+    def _extraction(self) -> IncrementalExtraction:
+        return IncrementalExtraction(self._html_chunks())
+
+    def _html_chunks(self) -> Iterator[str]:
+        """The html in chunks, decoded from the page bytes only as far as it is parsed.
+        """
+        if 'html' in self.__dict__ or (self.max_bytes is not None and len(self.mapped) > self.max_bytes):
+            # Shrinking needs the whole html
+            html = self.html
+            for start in range(0, len(html), PARSE_CHUNK_SIZE):
+                yield html[start:start + PARSE_CHUNK_SIZE]
+            return
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        content = self.mapped
+        for start in range(0, len(content), PARSE_CHUNK_SIZE):
+            yield decoder.decode(content[start:start + PARSE_CHUNK_SIZE])
+        yield decoder.decode(b'', final=True)
+
+    def parse_steps(self) -> Iterator[TextSoFar]:
+        """The text of the page after every chunk parsed (see `IncrementalExtraction.text_so_far`), the last step has
+        the whole text. Callers which stop iterating early spare parsing the rest of the page.
+
+        Without an incremental html parser or once the page was parsed completely, there is a single step.
+        """
+        if 'extracted' in self.__dict__ or not self.html_parser.INCREMENTAL or self._extraction.finished:
+            extracted = self.extracted
+            yield TextSoFar(extracted.strings, [extracted.body_text] if extracted.body_text is not None else None,
+                            extracted.titles)
+            return
+        extraction = self._extraction
+        while not extraction.finished:
+            try:
+                extraction.advance()
+            except BaseException:
+                # Interrupted within a chunk (e.g. by a time budget), the next use of the page parses it anew
+                if self.__dict__.get('_extraction') is extraction:
+                    del self.__dict__['_extraction']
+                raise
+            yield extraction.text_so_far()
+
+    @lazy_property
+    def text(self) -> str:
+        """All strings of the document, one per line.
+
+        Phrases never span a line break, so searching this text is equivalent to searching every string of the
+        soup on its own (which is what `soup.find(string=...)` does).
+        """
+        return '\n'.join(self.extracted.strings)
+
+    @property
+    def body_text(self) -> Optional[str]:
+        """Visible text of the body or None if the document has no body.
+        """
+        return self.extracted.body_text
+
+    @property
+    def titles(self) -> List[str]:
+        return self.extracted.titles
+
+    @property
+    def head_titles(self) -> List[str]:
+        """Titles which are known once the head of the page was parsed. A page which is parsed incrementally is only
+        parsed until its body started, titles within the body (e.g. of svg images) are missing then.
+        """
+        titles: List[str] = list()
+        for page_text in self.parse_steps():
+            titles = page_text.titles
+            if page_text.body_parts is not None:
+                break
+        return list(titles)
+
+    @property
+    def script_srcs(self) -> List[str]:
+        return self.extracted.script_srcs
+
+    def close(self) -> None:
+        mapped = self.__dict__.pop('mapped', None)
+        if isinstance(mapped, mmap.mmap):
+            mapped.close()
+
+    def phrase_matches(self, matcher: PhraseMatcher, keys: Optional[Iterable[str]] = None) -> Set[str]:
+        """Keys (of `keys` or all keys) of `matcher` whose phrases occur in the text of the page. Computed once per
+        matcher and keys; the page is only parsed until all of them were found.
+        """
+        keys = frozenset(matcher.phrases_by_key if keys is None else (key for key in keys if key in matcher))
+        matches_by_keys = self.__dict__.setdefault('_phrase_matches', dict())
+        if (matcher, keys) not in matches_by_keys:
+            found: Set[str] = set()
+            scanned = 0
+            for page_text in (self.parse_steps() if keys else []):
+                # Phrases never span strings, so only the strings completed by the last step need to be searched
+                if len(page_text.strings) > scanned:
+                    found.update(matcher.matches('\n'.join(page_text.strings[scanned:]), keys - found))
+                    scanned = len(page_text.strings)
+                if len(found) == len(keys):
+                    break
+            matches_by_keys[(matcher, keys)] = found
+        return matches_by_keys[(matcher, keys)]
+
+
+class PageCache:
+    """Holds the parsed pages of a single domain so that all checks share one parse per page.
+    """
+
+    def __init__(self, meta_data_filepath: str, page_types: CrawlerDomainMetaData, html_parser: HtmlParser = None,
+                 prefetched_pages: Dict[str, bytes] = None, max_page_bytes: int = None, page_store: PageStore = None):
+        self.base_path = os.path.dirname(meta_data_filepath)
+        # Loose files next to crawler.json unless the pages are read from another store, e.g. a pack
+        self.page_store = page_store if page_store is not None else DirectoryPageStore(self.base_path)
+        self.max_page_bytes = max_page_bytes
+        self.page_types = page_types
+        self.html_parser = html_parser if html_parser is not None else get_html_parser()
+        # Raw content of pages which were already read, by htmlFilePath
+        self.prefetched_pages = prefetched_pages if prefetched_pages is not None else dict()
+        self._pages: Dict[str, ParsedPage] = dict()
+
+    def pages_of(self, page_type: str) -> List[ParsedPage]:
+        pages: List[ParsedPage] = list()
+        for crawled_page in self.page_types.get(page_type, []):
+            html_path = crawled_page['htmlFilePath']
+            if html_path not in self._pages:
+                self._pages[html_path] = ParsedPage(
+                    path=self.page_store.location(html_path), raw=self.prefetched_pages.get(html_path),
+                    html_parser=self.html_parser, max_bytes=self.max_page_bytes, page_store=self.page_store,
+                    html_path=html_path
+                )
+            pages.append(self._pages[html_path])
+        return pages
+
+    def content_hash(self, page_types: Optional[Iterable[str]] = None) -> bytes:
+        """Hash over the content of all pages of `page_types` (or of all crawled page types).
+        """
+        if page_types is None:
+            page_types = sorted(self.page_types, key=str)
+        digest = hashlib.blake2b(digest_size=20)
+        for page_type in page_types:
+            pages = self.pages_of(page_type)
+            digest.update(f'{page_type}\0{len(pages)}\0'.encode('utf-8'))
+            for page in pages:
+                digest.update(page.content_hash)
+        return digest.digest()
+
+    def loaded_pages(self) -> List[ParsedPage]:
+        """Pages which were accessed by a check since the last `clear`.
+        """
+        return list(self._pages.values())
+
+    def clear(self) -> None:
+        for page in self._pages.values():
+            page.close()
+        self._pages.clear()
@@ -0,0 +1,45 @@
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Set
+
+from analyzer.time_budget import check_time_budget
+
+
+class PhraseMatcher:
+    """Finds out which groups of detector phrases occur in a text.
+
+    The phrases of every key are combined into one case insensitive alternation, compiled once per matcher. A text is
+    searched for the keys in question one after the other, each search stops at the first occurrence of the key.
+    """
+
+    def __init__(self, phrases_by_key: Dict[str, List[str]]):
+        self.phrases_by_key: Dict[str, List[str]] = {
+            key: list(phrases) for key, phrases in phrases_by_key.items() if phrases
+        }
+        self._patterns: Dict[str, Pattern] = {
+            key: re.compile('|'.join(f'(?:{phrase})' for phrase in phrases), re.IGNORECASE)
+            for key, phrases in self.phrases_by_key.items()
+        }
+
+    @classmethod
+    def for_checks(cls, checks: Iterable) -> 'PhraseMatcher':
+        """Builds a matcher from the text phrases of the given MetricCheck classes, keyed by their IDENTIFIER.
+        """
+        return cls({check.IDENTIFIER: check.text_phrases() for check in checks})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.phrases_by_key
+
+    def __len__(self) -> int:
+        return len(self.phrases_by_key)
+
+    def matches(self, text: str, keys: Optional[Iterable[str]] = None) -> Set[str]:
+        """Returns the keys (of `keys` or all keys) of which at least one phrase occurs in `text`.
+        """
+        keys = set(self.phrases_by_key if keys is None else keys)
+        found: Set[str] = set()
+        for key, pattern in self._patterns.items():
+            if key in keys:
+                check_time_budget()
+                if pattern.search(text):
+                    found.add(key)
+        return found
@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from analyzer.time_budget import check_time_budget
+
+# Term classes with their terms, as hashable tuples: ((class, (term, ...)), ...)
+TermClasses = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+class ProximityIndex:
+    """Positions of all occurrences of several term classes in a text, e.g. where a data protection officer, an email
+    address or a phone number is mentioned.
+
+    Built by a `ProximityScanner`, which finds the occurrences of all classes in a single scan of the text.
+    """
+
+    def __init__(self, positions: Dict[str, List[int]]):
+        self.positions = positions
+
+    def __getitem__(self, term_class: str) -> List[int]:
+        """Sorted start positions of the occurrences of `term_class`.
+        """
+        return self.positions.get(term_class, [])
+
+    def near(self, anchor: str, other: str, before: int, after: int) -> List[int]:
+        """Positions of `anchor` occurrences with an occurrence of `other` starting at most `before` characters before
+        and at most `after` characters after them.
+
+        Both position lists are sorted and only walked forward, so this takes linear time in the number of occurrences.
+        """
+        anchors, others = self[anchor], self[other]
+        near: List[int] = []
+        j = 0
+        for position in anchors:
+            while j < len(others) and others[j] < position - before:
+                j += 1
+            if j == len(others):
+                break
+            if others[j] <= position + after:
+                near.append(position)
+        return near
+
+    def any_near(self, anchor: str, others: List[str], before: int, after: int) -> bool:
+        """True if any `anchor` occurrence has an occurrence of one of the `others` classes in the given range.
+        """
+        return any(self.near(anchor, other, before, after) for other in others)
+
+
+
+class GrowingIndex:
+    """Index of a text which grows at its end, e.g. the body text of a page which is still being parsed.
+
+    Only the appended text is scanned, together with the end of the previous text where an occurrence might have been
+    cut off. Occurrences starting more than the longest term before the end are settled: more text doesn't change them.
+    """
+
+    def __init__(self, scanner: 'ProximityScanner'):
+        self.scanner = scanner
+        # Occurrences which are recorded in the index of any longer text as well
+        self.settled = ProximityIndex({name: [] for name in scanner.names})
+        # Text from the first position which is not settled yet and the occurrences found in it
+        self._pending = ''
+        self._pending_start = 0
+        self._pending_positions: Dict[str, List[int]] = {name: [] for name in scanner.names}
+
+    def append(self, text: str) -> None:
+        self._pending += text
+        settled_end = len(self._pending) - self.scanner.longest_term
+        positions = self.scanner.index(self._pending).positions
+        for name, pending_positions in positions.items():
+            self.settled.positions[name].extend(
+                self._pending_start + position for position in pending_positions if position <= settled_end
+            )
+            self._pending_positions[name] = [
+                self._pending_start + position for position in pending_positions if position > settled_end
+            ]
+        cut = max(settled_end + 1, 0)
+        self._pending = self._pending[cut:]
+        self._pending_start += cut
+
+    def complete(self) -> ProximityIndex:
+        """Index of the text as it is, if nothing is appended anymore.
+        """
+        return ProximityIndex({
+            name: positions + self._pending_positions[name] for name, positions in self.settled.positions.items()
+        })
+
+
+class ProximityScanner:
+    """Finds the occurrences of term classes (name -> terms) in texts, building a `ProximityIndex` per text.
+
+    All terms are compiled into one alternation with a named group per class. After every match the scan continues at
+    the next character, so overlapping occurrences (e.g. `Mail` within `E-Mail`) are recorded as well. At a position
+    where terms of several classes start, only the first of those classes is recorded.
+    """
+
+    def __init__(self, term_classes: TermClasses, ignore_case: bool = False):
+        self.term_classes = term_classes
+        self.names = [name for name, _ in term_classes]
+        groups = [
+            f'(?P<c{index}>{"|".join(re.escape(term) for term in terms)})'
+            for index, (_, terms) in enumerate(term_classes) if terms
+        ]
+        self._regex = re.compile('|'.join(groups), re.IGNORECASE if ignore_case else 0)
+        # Occurrences closer than this to the end of a text might be recorded differently once more text follows
+        self.longest_term = max((len(term) for _, terms in term_classes for term in terms), default=0)
+
+    def index(self, text: str) -> ProximityIndex:
+        positions: Dict[str, List[int]] = {name: [] for name in self.names}
+        search = self._regex.search
+        match = search(text)
+        number_of_matches = 0
+        while match is not None:
+            start = match.start()
+            positions[self.names[int(match.lastgroup[1:])]].append(start)
+            number_of_matches += 1
+            if number_of_matches % 4096 == 0:
+                check_time_budget()
+            match = search(text, start + 1)
+        return ProximityIndex(positions)
+
+    def growing_index(self) -> GrowingIndex:
+        return GrowingIndex(self)
+
+
+@lru_cache(maxsize=None)
+def proximity_scanner(term_classes: TermClasses, ignore_case: bool = False) -> ProximityScanner:
+    """Compiles the scanner of `term_classes` once per process.
+    """
+    return ProximityScanner(term_classes, ignore_case=ignore_case)
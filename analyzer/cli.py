@@ -1,9 +1,24 @@
+import csv
 import logging
 import os
+import sys
+from collections import Counter
 
 import click
 
 from analyzer.analyze import Analyzer
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER, HTML_PARSERS
+from analyzer.crawler_meta import CrawlerMetaFollower
+from analyzer.page_store import open_page_store, pack_pages
+from analyzer.profiler import Profiler
+from analyzer.result_cache import DEFAULT_RESULT_CACHE_PATH, ResultCache
+from analyzer.results_database import ResultsDatabase
+from analyzer.results_diff import diff_results
+from analyzer.sampling import STRATIFICATIONS, StratifiedSample
+from analyzer.server import DOMAINS_PATH, DomainService, make_server
+from analyzer.sharding import Shard
+
+logger = logging.getLogger(__name__)
 
 
 @click.group()
@@ -11,13 +26,16 @@ def cli():
     pass
 
 
-@click.command()
-@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
-@click.option('--crawler-json', default='../output/crawler.json', help='filepath to crawler.json')
-@click.option('--skip-write', default=False, help='skip writing the results to file', is_flag=True)
-def analyze(debug, crawler_json, skip_write):
-    """ This command analyzes the output of the crawler component. """
-    # Set up logging
+def _parse_shard(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def _set_up_logging(debug: bool) -> None:
     logging.basicConfig(
         level=logging.DEBUG if debug else logging.INFO,
         format='%(asctime)s %(levelname)s\t%(name)s\t%(message)s',
@@ -25,14 +43,212 @@ def analyze(debug, crawler_json, skip_write):
         # filemode='w',
     )
 
+
+def _bound_options(command):
+    """Adds the options bounding the time and memory spent on pathological pages, all of them off by default.
+    """
+    command = click.option('--domain-time-budget', default=0.0, type=click.FloatRange(min=0),
+                           help='seconds after which the remaining checks of a domain are skipped as uncertain, '
+                                '0 (default) disables')(command)
+    command = click.option('--check-time-budget', default=0.0, type=click.FloatRange(min=0),
+                           help='seconds after which a check is aborted with an uncertain result, 0 (default) '
+                                'disables')(command)
+    command = click.option('--max-page-bytes', default=0, type=click.IntRange(min=0),
+                           help='larger pages are shrunk (scripts, styles and data URIs first) before checking, '
+                                '0 (default) disables')(command)
+    return command
+
+
+@click.command()
+@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
+@click.option('--crawler-json', default='../output/crawler.json', help='filepath to crawler.json')
+@click.option('--skip-write', default=False, help='skip writing the results to file', is_flag=True)
+@click.option('--grouped-meta', default=False, is_flag=True,
+              help='crawler.json stores the pages of every domain next to each other, analyze each domain right after '
+                   'its last page and fail on pages of a domain which are not')
+@click.option('--workers', default=1, help='number of processes analyzing domains in parallel', type=click.IntRange(min=1))
+@click.option('--prefetch', default=0, type=click.IntRange(min=0),
+              help='read the pages of this many domains ahead while checking (only with a single worker)')
+@click.option('--resume', default=False, help='continue an interrupted run at the last checkpoint', is_flag=True)
+@click.option('--no-cache', default=False, help='re-run all checks instead of reusing results of unchanged pages',
+              is_flag=True)
+@click.option('--cache-path', default=DEFAULT_RESULT_CACHE_PATH, help='filepath to the result cache database')
+@click.option('--cache-size', default=1_000_000, help='maximum number of results in the result cache')
+@click.option('--html-parser', default=DEFAULT_HTML_PARSER, type=click.Choice(sorted(HTML_PARSERS)),
+              help='engine for extracting the text of html pages, only stream parses pages just as far as the checks '
+                   'need (bs4 always parses them completely)')
+@click.option('--profile', default=False, help='report the time spent per check and domain', is_flag=True)
+@click.option('--profile-top', default=10, help='number of slowest domains in the profile')
+@click.option('--shard', default=None, callback=_parse_shard, metavar='i/N',
+              help='only analyze the i-th of N hash-based subsets of the domains (1 <= i <= N)')
+@click.option('--follow', default=False, is_flag=True,
+              help='analyze domains while the crawler is still writing crawler.json (or a .jsonl feed)')
+@click.option('--quiet-period', default=60.0, help='seconds without new pages after which a followed domain is complete')
+@click.option('--idle-timeout', default=600.0, help='seconds without new pages after which following stops')
+@_bound_options
+@click.option('--pages', default=None,
+              help='directory or pack (.zip, see the pack command) of the crawled pages, defaults to the directory of '
+                   'crawler.json')
+@click.option('--results-db', default=None,
+              help='filepath to a SQLite database which the results are written to as well, for indexed queries')
+@click.option('--sample', default=None, type=click.IntRange(min=1),
+              help='only analyze a stratified random sample of this many domains and estimate the rates')
+@click.option('--sample-fraction', default=None, type=click.FloatRange(min=0, max=1, min_open=True),
+              help='only analyze this fraction of the domains (stratified random sample) and estimate the rates')
+@click.option('--stratify-by', default='tld', type=click.Choice(sorted(STRATIFICATIONS)),
+              help='strata of the sample')
+@click.option('--sample-seed', default=0, help='seed of the sample, the same seed samples the same domains')
+def analyze(debug, crawler_json, skip_write, grouped_meta, workers, prefetch, resume, no_cache, cache_path, cache_size,
+            html_parser, profile, profile_top, shard, follow, quiet_period, idle_timeout, max_page_bytes,
+            check_time_budget, domain_time_budget, pages, results_db, sample, sample_fraction, stratify_by, sample_seed):
+    """ This command analyzes the output of the crawler component. """
+    if workers > 1 and prefetch:
+        raise click.UsageError('--prefetch can only be used with a single worker')
+    if sample is not None and sample_fraction is not None:
+        raise click.UsageError('--sample and --sample-fraction are mutually exclusive')
+    sampled = sample is not None or sample_fraction is not None
+    if sampled and (shard is not None or follow):
+        raise click.UsageError('--sample and --sample-fraction can not be combined with --shard or --follow')
+
+    # Set up logging
+    _set_up_logging(debug)
+
     # Start analyzer
     main_dir = os.path.dirname(os.path.realpath(__file__))
-    analyzer = Analyzer(crawler_metadata_filepath=os.path.join(main_dir, crawler_json))
+    result_cache = None if no_cache else ResultCache(cache_path, max_entries=cache_size)
+    try:
+        page_store = open_page_store(os.path.join(main_dir, pages)) if pages else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--pages')
+    results_database = ResultsDatabase(os.path.join(main_dir, results_db)) if results_db and not skip_write else None
+    analyzer = Analyzer(crawler_metadata_filepath=os.path.join(main_dir, crawler_json), write_results=not skip_write,
+                        result_cache=result_cache, html_parser=html_parser,
+                        profiler=Profiler(top_n=profile_top) if profile else None, shard=shard,
+                        max_page_bytes=max_page_bytes or None, check_time_budget=check_time_budget or None,
+                        domain_time_budget=domain_time_budget or None, page_store=page_store,
+                        results_database=results_database,
+                        sample=StratifiedSample(size=sample, fraction=sample_fraction, stratify_by=stratify_by,
+                                                seed=sample_seed) if sampled else None,
+                        crawler_meta_grouped=grouped_meta)
 
-    analyzer.run()
+    follower = None
+    if follow:
+        follower = CrawlerMetaFollower(analyzer.crawler_metadata_filepath, quiet_period=quiet_period,
+                                       idle_timeout=idle_timeout)
+    analyzer.run(workers=workers, resume=resume, prefetch=prefetch, follow=follower)
 
     if not skip_write:
         analyzer.write_results_to_file()
+    if results_database is not None:
+        results_database.finish_run()
+
+
+@click.command()
+@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
+@click.option('--crawler-json', default='../output/crawler.json', help='filepath to crawler.json')
+@click.option('--shards', default=None, type=click.IntRange(min=1),
+              help='number of shards of the run (if results of several sharded runs are present)')
+@click.option('--results-db', default=None,
+              help='filepath to a SQLite database which the merged results are written to as well')
+def merge(debug, crawler_json, shards, results_db):
+    """ This command merges the results of a sharded analysis into analyzer-results.csv. """
+    _set_up_logging(debug)
+
+    main_dir = os.path.dirname(os.path.realpath(__file__))
+    results_database = ResultsDatabase(os.path.join(main_dir, results_db)) if results_db else None
+    analyzer = Analyzer(crawler_metadata_filepath=os.path.join(main_dir, crawler_json),
+                        results_database=results_database)
+    try:
+        analyzer.merge_shard_results(shard_count=shards)
+    except (ValueError, FileNotFoundError) as e:
+        raise click.ClickException(str(e))
+    if results_database is not None:
+        results_database.finish_run()
+
+
+@click.command()
+@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
+@click.option('--crawler-json', default='../output/crawler.json', help='filepath to crawler.json')
+@click.option('--output', default=None, help='filepath of the pack, defaults to pages.zip next to crawler.json')
+@click.option('--compression-level', default=6, type=click.IntRange(min=0, max=9),
+              help='deflate level of the pages, 0 stores them uncompressed')
+def pack(debug, crawler_json, output, compression_level):
+    """ This command packs the crawled pages into a single archive, to be analyzed with --pages. """
+    _set_up_logging(debug)
+
+    main_dir = os.path.dirname(os.path.realpath(__file__))
+    crawler_metadata_filepath = os.path.join(main_dir, crawler_json)
+    pack_path = os.path.join(main_dir, output) if output else os.path.join(
+        os.path.dirname(crawler_metadata_filepath), 'pages.zip'
+    )
+    number_of_pages, size_of_pages, size_of_pack = pack_pages(crawler_metadata_filepath, pack_path,
+                                                              compression_level=compression_level)
+    logger.info(
+        f'Packed {number_of_pages} pages ({size_of_pages} bytes) into {pack_path} ({size_of_pack} bytes)'
+    )
+
+
+@click.command()
+@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
+@click.option('--output', default=None, help='filepath of the csv with the changed results, defaults to stdout')
+@click.option('--chunk-size', default=200_000, type=click.IntRange(min=1),
+              help='number of results which are sorted in memory at once')
+@click.argument('old_results', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new_results', type=click.Path(exists=True, dir_okay=False))
+def diff(debug, output, chunk_size, old_results, new_results):
+    """ This command lists the results which changed between two analyzer-results.csv files, by check and transition. """
+    _set_up_logging(debug)
+
+    transitions: Counter = Counter()
+    output_file = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+    try:
+        writer = csv.writer(output_file)
+        writer.writerow(['testIdentifier', 'oldPassType', 'newPassType', 'originalDomain'])
+        for change in diff_results(old_results, new_results, chunk_size=chunk_size):
+            writer.writerow(change)
+            transitions[change.identifier, change.old, change.new] += 1
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if output:
+            output_file.close()
+    for (identifier, old, new), count in sorted(transitions.items()):
+        logger.info(f'{identifier}: {old} -> {new}: {count}')
+    logger.info(f'{sum(transitions.values())} changed results')
+
+
+@click.command()
+@click.option('--debug', default=False, help='enable debug log verbosity', is_flag=True)
+@click.option('--crawler-json', default='../output/crawler.json', help='filepath to crawler.json')
+@click.option('--html-parser', default=DEFAULT_HTML_PARSER, type=click.Choice(sorted(HTML_PARSERS)),
+              help='engine for extracting the text of html pages, only stream parses pages just as far as the checks '
+                   'need (bs4 always parses them completely)')
+@click.option('--host', default='127.0.0.1', help='address to listen on')
+@click.option('--port', default=8080, help='port to listen on')
+@click.option('--socket', 'socket_path', default=None, help='listen on this unix socket instead of host and port')
+@_bound_options
+def serve(debug, crawler_json, html_parser, host, port, socket_path, max_page_bytes, check_time_budget,
+          domain_time_budget):
+    """ This command answers GET /domains/<domain> with the check results of the domain as JSON. """
+    _set_up_logging(debug)
+
+    main_dir = os.path.dirname(os.path.realpath(__file__))
+    service = DomainService(os.path.join(main_dir, crawler_json), Analyzer.checks, html_parser=html_parser,
+                            max_page_bytes=max_page_bytes or None, check_time_budget=check_time_budget or None,
+                            domain_time_budget=domain_time_budget or None)
+    service.warm_up()
+    server = make_server(service, host=host, port=port, socket_path=socket_path)
+    logger.info(f'Serving check results on {socket_path or f"http://{host}:{port}"}{DOMAINS_PATH}<domain>')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 cli.add_command(analyze)
+cli.add_command(merge)
+cli.add_command(pack)
+cli.add_command(diff)
+cli.add_command(serve)
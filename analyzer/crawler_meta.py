@@ -0,0 +1,405 @@
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from analyzer.types_definitions import CrawlerDomainMetaData, CrawlerMetaData
+
+logger = logging.getLogger(__name__)
+
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# Matches the originalDomain of every page without decoding the json. Quotes within values are always escaped,
+# so the pattern can't match inside of another value.
+_ORIGINAL_DOMAIN_PATTERN = re.compile(rb'"originalDomain"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_CRAWLED_PAGES_PATTERN = re.compile(r'"crawledPages"\s*:\s*\[')
+
+
+class CrawlerMetaReader:
+    """Reads the pages of a crawler meta data file (`crawler.json` or its JSON-Lines variant) incrementally.
+
+    Pages are grouped by their `originalDomain` while streaming the file. A domain is yielded once `window` pages of
+    other domains followed its last page, so pages of domains crawled at the same time may be mixed. If a domain turns
+    up again after it was yielded, the domains which weren't yielded yet get spilled to temporary partition files by the
+    hash of their domain, which are grouped one after another, so memory stays bounded by the size of a partition.
+    Domains are yielded in the order of their partitions then, not in the order of the file, and the pages of domains
+    which were already yielded are skipped with a warning (as when following a crawl).
+
+    If the file is known to be `grouped` (as the benchmark output is), every domain is yielded as soon as its last page
+    was read and a page of a domain following pages of another domain raises a ValueError.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16, pages_per_partition: int = 10000, grouped: bool = False,
+                 window: int = 10000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.pages_per_partition = pages_per_partition
+        self.grouped = grouped
+        self.window = window
+        self._is_json_lines: Optional[bool] = None
+        self._scan: Optional[Tuple[int, int, bool]] = None
+
+    @property
+    def is_json_lines(self) -> bool:
+        if self._is_json_lines is None:
+            self._is_json_lines = self._detect_json_lines()
+        return self._is_json_lines
+
+    @property
+    def number_of_domains(self) -> int:
+        """Counted while the domains are iterated, the file is scanned if they weren't yet.
+        """
+        return self._scan_domains()[0]
+
+    @property
+    def number_of_pages(self) -> int:
+        return self._scan_domains()[1]
+
+    @property
+    def is_contiguous(self) -> bool:
+        """True if the pages of each domain are stored without pages of other domains in between.
+        """
+        return self.grouped or self._scan_domains()[2]
+
+    def iter_pages(self) -> Iterator[dict]:
+        if self.is_json_lines:
+            yield from self._iter_json_lines_pages()
+        else:
+            yield from self._iter_json_pages()
+
+    def iter_domains(self) -> Iterator[Tuple[str, CrawlerDomainMetaData]]:
+        """Yields every domain with its pages grouped by page type.
+        """
+        if self.grouped:
+            yield from self._group_contiguous(self.iter_pages())
+        else:
+            yield from self._group_streamed(self.iter_pages())
+
+    def load(self) -> CrawlerMetaData:
+        """Reads all domains into memory, in a compact representation.
+        """
+        return CrawlerMetaData(self.iter_domains())
+
+    def _detect_json_lines(self) -> bool:
+        if self.path.endswith(JSON_LINES_EXTENSIONS):
+            return True
+        with open(self.path, encoding='utf-8') as meta_file:
+            first_line = meta_file.readline(self.chunk_size)
+        try:
+            first_object = json.loads(first_line)
+        except ValueError:
+            return False
+        return isinstance(first_object, dict) and 'originalDomain' in first_object
+
+    def _scan_domains(self) -> Tuple[int, int, bool]:
+        """Counts domains and pages and checks whether domains are contiguous by matching the raw bytes of the file.
+        """
+        if self._scan is None:
+            seen_domains = set()
+            current_domain = None
+            number_of_pages = 0
+            contiguous = True
+            if os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as meta_file, \
+                        mmap.mmap(meta_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    for match in _ORIGINAL_DOMAIN_PATTERN.finditer(data):
+                        number_of_pages += 1
+                        domain = match.group(1)
+                        if domain == current_domain:
+                            continue
+                        if domain in seen_domains:
+                            contiguous = False
+                        seen_domains.add(domain)
+                        current_domain = domain
+            self._scan = (len(seen_domains), number_of_pages, contiguous)
+        return self._scan
+
+    def _iter_json_lines_pages(self) -> Iterator[dict]:
+        with open(self.path, encoding='utf-8') as meta_file:
+            for line in meta_file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def _iter_json_pages(self) -> Iterator[dict]:
+        """Decodes the entries of the `crawledPages` array one by one while reading the file in chunks.
+        """
+        decoder = json.JSONDecoder()
+        with open(self.path, encoding='utf-8') as meta_file:
+            buffer = ''
+            position = 0
+
+            def read_more() -> bool:
+                # Drops the consumed part of the buffer and appends the next chunk
+                nonlocal buffer, position
+                chunk = meta_file.read(self.chunk_size)
+                buffer = buffer[position:] + chunk
+                position = 0
+                return bool(chunk)
+
+            # Skip everything up to the start of the array
+            while True:
+                match = _CRAWLED_PAGES_PATTERN.search(buffer)
+                if match:
+                    position = match.end()
+                    break
+                if not read_more():
+                    return
+
+            while True:
+                # Skip whitespace and separators in front of the next entry
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position == len(buffer):
+                    if not read_more():
+                        raise ValueError(f'Unexpected end of {self.path}')
+                    continue
+                if buffer[position] == ']':
+                    return
+                try:
+                    page, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    # Entry is incomplete, read the rest of it
+                    if not read_more():
+                        raise
+                    continue
+                yield page
+                position = end
+
+    @staticmethod
+    def _add_page(page_types: Dict[str, List], page: dict) -> None:
+        page_types.setdefault(page.get('pageType', None), []).append(page)
+
+    def _group_contiguous(self, pages: Iterator[dict]) -> Iterator[Tuple[str, CrawlerDomainMetaData]]:
+        """Groups pages which are stored next to each other by domain, a domain whose pages are not stored next to each
+        other raises a ValueError. The domains and pages are counted while reading them.
+        """
+        current_domain = None
+        page_types: CrawlerDomainMetaData = dict()
+        seen_domains = set()
+        number_of_pages = 0
+        for page in pages:
+            domain = page.get('originalDomain', None)
+            if page_types and domain != current_domain:
+                yield current_domain, page_types
+                page_types = dict()
+            if domain != current_domain:
+                if domain in seen_domains:
+                    raise ValueError(f'Pages of {domain} in {self.path} are not stored next to each other')
+                seen_domains.add(domain)
+            current_domain = domain
+            number_of_pages += 1
+            self._add_page(page_types, page)
+        if page_types:
+            yield current_domain, page_types
+        if self._scan is None:
+            self._scan = (len(seen_domains), number_of_pages, True)
+
+    def _group_streamed(self, pages: Iterator[dict]) -> Iterator[Tuple[str, CrawlerDomainMetaData]]:
+        """Groups pages by domain, holding the domains which got a page within the last `window` pages. Falls back to
+        partitions for the rest of the file once a domain turns up again after it was yielded.
+        """
+        # Domains which weren't yielded yet, by the time of their last page, with the number of that page
+        pending: 'OrderedDict[str, Tuple[CrawlerDomainMetaData, int]]' = OrderedDict()
+        yielded_domains: Set[str] = set()
+        current_domain = None
+        contiguous = True
+        number_of_pages = 0
+        for page in pages:
+            domain = page.get('originalDomain', None)
+            if domain in yielded_domains:
+                logger.info(f'Pages in {self.path} are not grouped by domain, grouping the remaining domains in '
+                            f'temporary partitions')
+                pending_pages = (
+                    pending_page for page_types, _ in pending.values() for pages_of_type in page_types.values()
+                    for pending_page in pages_of_type
+                )
+                yield from self._group_partitioned(chain(pending_pages, [page], pages), yielded_domains)
+                return
+            if domain != current_domain and domain in pending:
+                contiguous = False
+            page_types, _ = pending.pop(domain, (dict(), None))
+            self._add_page(page_types, page)
+            pending[domain] = (page_types, number_of_pages)
+            current_domain = domain
+            number_of_pages += 1
+            while next(iter(pending.values()))[1] < number_of_pages - self.window:
+                oldest_domain, (oldest_page_types, _) = pending.popitem(last=False)
+                yielded_domains.add(oldest_domain)
+                yield oldest_domain, oldest_page_types
+        for domain, (page_types, _) in pending.items():
+            yielded_domains.add(domain)
+            yield domain, page_types
+        if self._scan is None:
+            self._scan = (len(yielded_domains), number_of_pages, contiguous)
+
+    def _group_partitioned(self, pages: Iterable[dict],
+                           yielded_domains: Set[str]) -> Iterator[Tuple[str, CrawlerDomainMetaData]]:
+        """Groups `pages` by spilling them to partition files, skipping the pages of `yielded_domains`.
+        """
+        number_of_partitions = max(1, math.ceil(self.number_of_pages / self.pages_per_partition))
+        skipped_domains: Set[str] = set()
+        with tempfile.TemporaryDirectory(prefix='analyzer-meta-') as tmp_dir:
+            partition_paths = [os.path.join(tmp_dir, f'{i}.jsonl') for i in range(number_of_partitions)]
+            partition_files = [open(path, 'w', encoding='utf-8') for path in partition_paths]
+            try:
+                for page in pages:
+                    domain = page.get('originalDomain', None)
+                    if domain in yielded_domains:
+                        if domain not in skipped_domains:
+                            logger.warning(f'{domain} has pages after more than {self.window} pages of other domains '
+                                           f'in {self.path}, they are ignored')
+                            skipped_domains.add(domain)
+                        continue
+                    partition = zlib.crc32((domain or '').encode('utf-8')) % number_of_partitions
+                    partition_files[partition].write(json.dumps(page) + '\n')
+            finally:
+                for partition_file in partition_files:
+                    partition_file.close()
+
+            for partition_path in partition_paths:
+                grouped_by_domain: Dict[str, CrawlerDomainMetaData] = dict()
+                partition = CrawlerMetaReader(partition_path)
+                for page in partition.iter_pages():
+                    self._add_page(grouped_by_domain.setdefault(page.get('originalDomain', None), dict()), page)
+                yield from grouped_by_domain.items()
+
+
+class CrawlerMetaFollower:
+    """Yields the domains of crawler meta data which is still being written by the crawler.
+
+    The crawler rewrites `crawler.json` after every page, only appending to the pages written before. Whenever it
+    changed, the pages after the offset of the last page seen are decoded. A JSON-Lines feed is tailed instead. A domain is complete once no page of it was added
+    for `quiet_period` seconds, or when the feed contains the end marker `{"originalDomain": ..., "complete": true}`.
+    Following stops at the marker `{"crawlComplete": true}` or when nothing was added for `idle_timeout` seconds;
+    the pending domains are yielded then.
+    """
+
+    READ_AHEAD = 1 << 16
+
+    def __init__(self, path: str, quiet_period: float = 60.0, idle_timeout: float = 600.0, poll_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.path = path
+        self.quiet_period = quiet_period
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.crawl_complete = False
+        self._is_json_lines: Optional[bool] = True if path.endswith(JSON_LINES_EXTENSIONS) else None
+        # Bytes of the file which were read, up to the end of the last complete line or page
+        self._offset = 0
+        self._file_state: Optional[Tuple[int, int]] = None
+
+    def iter_domains(self) -> Iterator[Tuple[str, CrawlerDomainMetaData]]:
+        # Pending domains in the order they were first seen, with the time their last page was added
+        pending: Dict[str, CrawlerDomainMetaData] = dict()
+        last_added: Dict[str, float] = dict()
+        completed: Set[str] = set()
+        last_activity = self.clock()
+        while True:
+            now = self.clock()
+            new_records = self._read_new_records()
+            if new_records:
+                last_activity = now
+            for record in new_records:
+                if record.get('crawlComplete'):
+                    self.crawl_complete = True
+                    continue
+                domain = record.get('originalDomain', None)
+                if domain in completed:
+                    logger.warning(f'{domain} got crawled pages after it was analyzed, they are ignored')
+                    continue
+                if record.get('complete'):
+                    last_added[domain] = -math.inf
+                    pending.setdefault(domain, dict())
+                    continue
+                CrawlerMetaReader._add_page(pending.setdefault(domain, dict()), record)
+                last_added[domain] = now
+
+            finished = self.crawl_complete or now - last_activity >= self.idle_timeout
+            for domain in [d for d in pending if finished or now - last_added[d] >= self.quiet_period]:
+                completed.add(domain)
+                del last_added[domain]
+                page_types = pending.pop(domain)
+                if page_types:
+                    yield domain, page_types
+            if finished:
+                logger.info('Crawl complete' if self.crawl_complete else
+                            f'No crawled pages were added for {self.idle_timeout} seconds, stop following')
+                return
+            self.sleep(self.poll_interval)
+
+    def _read_new_records(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        if self._is_json_lines is None:
+            with open(self.path, 'rb') as meta_file:
+                if b'\n' not in meta_file.read(self.READ_AHEAD):
+                    # Wait for the first line to be written completely
+                    return []
+            self._is_json_lines = CrawlerMetaReader(self.path).is_json_lines
+        if self._is_json_lines:
+            return self._read_new_lines()
+        return self._read_new_pages()
+
+    def _read_new_lines(self) -> List[dict]:
+        with open(self.path, 'rb') as meta_file:
+            meta_file.seek(self._offset)
+            data = meta_file.read()
+        # The last line might still be written
+        end = data.rfind(b'\n') + 1
+        records = []
+        offset = self._offset
+        for line in data[:end].split(b'\n'):
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A broken line must not stop following the crawl
+                    logger.warning(f'Skipping malformed line at offset {offset} of {self.path}: {line[:200]!r}')
+            offset += len(line) + 1
+        self._offset += end
+        return records
+
+    def _read_new_pages(self) -> List[dict]:
+        stat = os.stat(self.path)
+        file_state = (stat.st_size, stat.st_mtime_ns)
+        if file_state == self._file_state:
+            return []
+        self._file_state = file_state
+        with open(self.path, 'rb') as meta_file:
+            meta_file.seek(self._offset)
+            # A character cut off at the end of a file which is being rewritten only ends an incomplete page
+            data = meta_file.read().decode('utf-8', errors='replace')
+        position = 0
+        if self._offset == 0:
+            match = _CRAWLED_PAGES_PATTERN.search(data)
+            if match is None:
+                return []
+            position = match.end()
+        decoder = json.JSONDecoder()
+        pages = []
+        while True:
+            while position < len(data) and data[position] in ' \t\r\n,':
+                position += 1
+            if position == len(data) or data[position] == ']':
+                break
+            try:
+                page, position_after_page = decoder.raw_decode(data, position)
+            except ValueError:
+                # The crawler is rewriting the file, the rest is read at the next poll
+                break
+            pages.append(page)
+            position = position_after_page
+        # The pages are rewritten with the same bytes, so the next read continues after the last complete one
+        self._offset += len(data[:position].encode('utf-8'))
+        return pages
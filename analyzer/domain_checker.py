@@ -0,0 +1,134 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import DomainFacts
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER, get_html_parser
+from analyzer.checks.metrics import MetricCheck
+from analyzer.checks.page_cache import PageCache
+from analyzer.checks.phrase_matcher import PhraseMatcher
+from analyzer.exceptions import InvalidMetricCheckException
+from analyzer.page_store import DirectoryPageStore, PageStore
+from analyzer.profiler import Profiler
+from analyzer.result_cache import ResultCache, result_cache_key
+from analyzer.time_budget import TimeBudgetExceeded, can_interrupt_time_budgets, time_budget
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+
+class DomainChecker:
+    """Runs all checks against the crawled pages of a single domain.
+
+    It holds everything which is shared across domains (the check classes and the phrase matcher), so that it can
+    be set up once per process when domains are analyzed in parallel.
+    """
+
+    def __init__(self, checks: List[MetricCheck], crawler_metadata_filepath: str, result_cache: ResultCache = None,
+                 html_parser: str = DEFAULT_HTML_PARSER, profiler: Profiler = None, max_page_bytes: int = None,
+                 check_time_budget: float = None, domain_time_budget: float = None, page_store: PageStore = None):
+        self.checks = checks
+        self.crawler_metadata_filepath = crawler_metadata_filepath
+        # Resolves the htmlFilePath of crawled pages, by default to the files next to crawler.json
+        self.page_store = page_store if page_store is not None else DirectoryPageStore(
+            os.path.dirname(crawler_metadata_filepath)
+        )
+        self.result_cache = result_cache
+        self.html_parser = get_html_parser(html_parser)
+        # One matcher for the text phrases of all checks, so every page is scanned once for all of them
+        self.phrase_matcher = PhraseMatcher.for_checks(self.checks)
+        # Results settled by preconditions, which neither run the check nor look it up in the result cache
+        self.number_of_settled_results = 0
+        # Timing is only measured with a profiler, so an unprofiled run has no overhead
+        self.profiler = profiler
+        # Bounds for pathological pages: larger pages are shrunk, checks running out of time are UNCERTAIN
+        self.max_page_bytes = max_page_bytes
+        self.check_time_budget = check_time_budget
+        self.domain_time_budget = domain_time_budget
+        self._warned_about_time_budgets = False
+
+    def check_domain(self, domain: str, page_types: CrawlerDomainMetaData,
+                     prefetched_pages: Dict[str, bytes] = None) -> List[CheckResult]:
+        results: List[CheckResult] = list()
+        # All checks of the domain share the parsed pages; they are evicted once the domain is done
+        page_cache = PageCache(self.crawler_metadata_filepath, page_types, html_parser=self.html_parser,
+                               prefetched_pages=prefetched_pages, max_page_bytes=self.max_page_bytes,
+                               page_store=self.page_store)
+        # Facts several checks depend on are computed once for the domain
+        facts = DomainFacts(page_types, page_cache, self.phrase_matcher, checks=self.checks)
+        domain_start = time.perf_counter() if self.profiler is not None else 0
+        deadline = time.monotonic() + self.domain_time_budget if self.domain_time_budget else None
+        try:
+            for check_class in self.checks:
+                check = check_class(domain, page_types, self.crawler_metadata_filepath, page_cache=page_cache,  # noqa
+                                    phrase_matcher=self.phrase_matcher, facts=facts)
+                if not isinstance(check, MetricCheck):
+                    raise InvalidMetricCheckException(f'{check.__class__} is no valid MetricCheck')
+                try:
+                    if self.profiler is None:
+                        result: CheckResult = self._settled_result(check, facts) or self._check(check, page_cache, deadline)
+                    else:
+                        check_start = time.perf_counter()
+                        result: CheckResult = self._settled_result(check, facts) or self._check(check, page_cache, deadline)
+                        self.profiler.record_check(check.IDENTIFIER, time.perf_counter() - check_start)
+                    results.append(result)
+                except Exception as e:
+                    logger.error(f'{domain} {check.IDENTIFIER} CHECK FAILED', exc_info=True)
+                else:
+                    if result.passed is False:
+                        logger.debug(f'{domain} {result.identifier} {result.passed}', extra={'domain': domain, 'check': check.IDENTIFIER})
+        finally:
+            if self.profiler is not None:
+                self.profiler.record_domain(domain, time.perf_counter() - domain_start, page_cache)
+            page_cache.clear()
+            if self.result_cache is not None:
+                self.result_cache.commit()
+        return results
+
+    def _settled_result(self, check: MetricCheck, facts: DomainFacts) -> Optional[CheckResult]:
+        """Returns the result of `check` if one of its preconditions does not hold, without reading any html.
+        """
+        for precondition in check.preconditions():
+            if not facts[precondition.fact]:
+                self.number_of_settled_results += 1
+                return check._get_check_result(precondition.otherwise, precondition.description)
+        return None
+
+    def _check(self, check: MetricCheck, page_cache: PageCache, deadline: float = None) -> CheckResult:
+        """Returns the cached result of `check` if its pages are unchanged, otherwise runs and caches it.
+        """
+        key = None
+        if self.result_cache is not None:
+            key = result_cache_key(check, page_cache)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                pass_type, description = cached
+                return check._get_check_result(CheckResult.PassType(pass_type), description)
+
+        budget = self.check_time_budget
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return check._get_check_result(
+                    CheckResult.PassType.UNCERTAIN,
+                    f'Skipped because the checks of the domain exceeded their time budget of '
+                    f'{self.domain_time_budget} seconds'
+                )
+            budget = min(budget, remaining) if budget else remaining
+        if budget and not self._warned_about_time_budgets and not can_interrupt_time_budgets():
+            logger.info('Outside of the main thread, time budgets of checks are only enforced between parse steps')
+            self._warned_about_time_budgets = True
+        try:
+            with time_budget(budget):
+                result = check.check()
+        except TimeBudgetExceeded:
+            # Not cached, another run might finish in time
+            logger.warning(f'{check.domain} {check.IDENTIFIER} ran out of its time budget of {budget:.1f} seconds')
+            return check._get_check_result(
+                CheckResult.PassType.UNCERTAIN, f'The check ran out of its time budget of {budget:.1f} seconds'
+            )
+        if key is not None:
+            self.result_cache.put(key, result.passed.value, result.description)
+        return result
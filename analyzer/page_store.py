@@ -0,0 +1,142 @@
+import logging
+import mmap
+import os
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from analyzer.checks.detectors import ByteContent
+from analyzer.crawler_meta import CrawlerMetaReader
+
+logger = logging.getLogger(__name__)
+
+PACK_EXTENSIONS = ('.zip',)
+
+
+class PageStore(ABC):
+    """Resolves the `htmlFilePath` of crawled pages (relative to crawler.json) to their content.
+    """
+
+    @abstractmethod
+    def read(self, html_path: str) -> bytes:
+        """Content of the page, raises FileNotFoundError if the store has no such page.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def location(self, html_path: str) -> str:
+        """Path of the page for log messages, e.g. the path of its file.
+        """
+        raise NotImplementedError
+
+    def map(self, html_path: str) -> ByteContent:
+        """Content of the page for matching bytes, memory-mapped where the store supports it.
+        """
+        return self.read(html_path)
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryPageStore(PageStore):
+    """Pages as loose files in the output directory of the crawler, `<domain>/<pageType>/index.html`.
+    """
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+    def location(self, html_path: str) -> str:
+        return os.path.join(self.base_path, html_path)
+
+    def read(self, html_path: str) -> bytes:
+        with open(self.location(html_path), 'rb') as f:
+            return f.read()
+
+    def map(self, html_path: str) -> ByteContent:
+        with open(self.location(html_path), 'rb') as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped
+                return b''
+
+
+class ZipPageStore(PageStore):
+    """Pages packed into a single zip archive by `pack_pages`, named by their `htmlFilePath`.
+
+    The central directory of the archive is read once, afterwards a page is read with a seek instead of an open() per
+    file. Every process opens the archive on its own (a handle inherited by a forked worker would share its file offset
+    with the parent), so the store can be handed to worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip_file: zipfile.ZipFile = None
+        self._pid: int = None
+
+    @property
+    def zip_file(self) -> zipfile.ZipFile:
+        if self._zip_file is None or self._pid != os.getpid():
+            self._zip_file = zipfile.ZipFile(self.path)
+            self._pid = os.getpid()
+        return self._zip_file
+
+    def location(self, html_path: str) -> str:
+        return os.path.join(self.path, html_path)
+
+    def read(self, html_path: str) -> bytes:
+        try:
+            return self.zip_file.read(html_path.replace(os.sep, '/'))
+        except KeyError:
+            raise FileNotFoundError(f'{html_path} is not in {self.path}')
+
+    def close(self) -> None:
+        if self._zip_file is not None and self._pid == os.getpid():
+            self._zip_file.close()
+        self._zip_file = None
+
+    def __getstate__(self):
+        return {'path': self.path, '_zip_file': None, '_pid': None}
+
+
+def open_page_store(path: str) -> PageStore:
+    """Page store of a directory of loose pages or of a packed archive.
+    """
+    if os.path.isdir(path):
+        return DirectoryPageStore(path)
+    if path.endswith(PACK_EXTENSIONS):
+        return ZipPageStore(path)
+    raise ValueError(f'{path} is neither a directory nor a pack ({", ".join(PACK_EXTENSIONS)})')
+
+
+def pack_pages(crawler_metadata_filepath: str, pack_path: str, compression_level: int = 6) -> Tuple[int, int, int]:
+    """Packs all pages of crawler.json into a zip archive, each page compressed on its own so it can be read directly.
+
+    Pages which are missing in the crawler output are skipped. With `compression_level` 0 the pages are stored
+    uncompressed. The archive is written to a temporary file first, so an interrupted run leaves no broken pack.
+
+    :return: number of packed pages, their size and the size of the pack in bytes
+    """
+    base_path = os.path.dirname(os.path.abspath(crawler_metadata_filepath))
+    compression = zipfile.ZIP_DEFLATED if compression_level else zipfile.ZIP_STORED
+    temporary_path = f'{pack_path}.tmp'
+    number_of_pages, size_of_pages = 0, 0
+    packed = set()
+    with zipfile.ZipFile(temporary_path, 'w', compression=compression,
+                         compresslevel=compression_level or None) as pack:
+        for domain, page_types in CrawlerMetaReader(crawler_metadata_filepath).iter_domains():
+            for crawled_pages in page_types.values():
+                for crawled_page in crawled_pages:
+                    html_path = crawled_page['htmlFilePath']
+                    if html_path in packed:
+                        continue
+                    packed.add(html_path)
+                    file_path = os.path.join(base_path, html_path)
+                    if not os.path.isfile(file_path):
+                        logger.warning(f'{domain}: {html_path} is missing, not packed')
+                        continue
+                    pack.write(file_path, arcname=html_path.replace(os.sep, '/'))
+                    number_of_pages += 1
+                    size_of_pages += os.path.getsize(file_path)
+    os.replace(temporary_path, pack_path)
+    return number_of_pages, size_of_pages, os.path.getsize(pack_path)
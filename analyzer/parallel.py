@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing.util import Finalize
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER
+from analyzer.checks.metrics import MetricCheck
+from analyzer.domain_checker import DomainChecker
+from analyzer.page_store import PageStore
+from analyzer.profiler import Profiler
+from analyzer.result_cache import ResultCache
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+# Set up once per worker process by `_init_worker`
+_domain_checker: DomainChecker = None
+
+_DONE = object()
+
+
+def _init_worker(checks: List[MetricCheck], crawler_metadata_filepath: str, result_cache_path: Optional[str],
+                 html_parser: str, profile_top_n: Optional[int], max_page_bytes: Optional[int],
+                 check_time_budget: Optional[float], domain_time_budget: Optional[float],
+                 page_store: Optional[PageStore]) -> None:
+    global _domain_checker
+    # Every worker opens its own connection to the result cache
+    result_cache = ResultCache(result_cache_path) if result_cache_path else None
+    if result_cache is not None:
+        # Pool workers leave through os._exit, which skips atexit handlers but runs finalizers with an exit priority
+        Finalize(result_cache, result_cache.close, exitpriority=10)
+    profiler = Profiler(top_n=profile_top_n) if profile_top_n else None
+    _domain_checker = DomainChecker(checks, crawler_metadata_filepath, result_cache=result_cache,
+                                    html_parser=html_parser, profiler=profiler, max_page_bytes=max_page_bytes,
+                                    check_time_budget=check_time_budget, domain_time_budget=domain_time_budget,
+                                    page_store=page_store)
+
+
+def _check_domains(domains: List[Tuple[str, CrawlerDomainMetaData]]) -> Tuple[List[Tuple[str, List[tuple]]],
+                                                                                 Optional[Dict]]:
+    # Results are sent back as plain tuples, which are much cheaper to pickle than CheckResult instances
+    results = [
+        (domain, [result.to_tuple() for result in _domain_checker.check_domain(domain, page_types)])
+        for domain, page_types in domains
+    ]
+    profile = None
+    if _domain_checker.profiler is not None:
+        # The profile of every chunk is sent along and merged by the parent process
+        profile = _domain_checker.profiler.to_dict()
+        _domain_checker.profiler = Profiler(top_n=_domain_checker.profiler.top_n)
+    return results, profile
+
+
+def check_domains_in_parallel(domains: Iterable[Tuple[str, CrawlerDomainMetaData]], checks: List[MetricCheck],
+                              crawler_metadata_filepath: str, workers: int, result_cache_path: str = None,
+                              html_parser: str = DEFAULT_HTML_PARSER, chunksize: int = 10,
+                              profiler: Profiler = None, max_page_bytes: int = None,
+                              check_time_budget: float = None,
+                              domain_time_budget: float = None,
+                              page_store: PageStore = None) -> Iterator[Tuple[str, List[CheckResult]]]:
+    """Runs the checks for `domains` in a pool of `workers` processes.
+
+    Domains are sent to the workers in chunks of `chunksize`. Only a bounded number of chunks is in flight at a time
+    and results are yielded in the order of `domains`, so the output is identical to a serial run.
+    The chunks are submitted by a separate thread, so results are yielded while it waits for the next domains (e.g. of
+    a followed crawl). The profiles of the workers are merged into `profiler`, if given. Time budgets are enforced in
+    every worker.
+    """
+    domains = iter(domains)
+    # Submitted chunks in the order of `domains`, ended by _DONE or the exception raised while reading `domains`
+    pending: queue.Queue = queue.Queue(maxsize=workers * 4)
+    stopped = threading.Event()
+
+    def put(item) -> None:
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def submit_chunks(executor: ProcessPoolExecutor) -> None:
+        outcome = _DONE
+        try:
+            while not stopped.is_set():
+                chunk = list(islice(domains, chunksize))
+                if not chunk:
+                    break
+                put(executor.submit(_check_domains, chunk))
+        except BaseException as e:
+            # Re-raised in the consumer's thread
+            outcome = e
+        put(outcome)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(checks, crawler_metadata_filepath, result_cache_path, html_parser,
+                                       profiler.top_n if profiler is not None else None, max_page_bytes,
+                                       check_time_budget, domain_time_budget, page_store)) as executor:
+        thread = threading.Thread(target=submit_chunks, args=(executor,), name='submit-chunks', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pending.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                results, profile = item.result()
+                if profile is not None:
+                    profiler.merge(profile)
+                for domain, rows in results:
+                    yield domain, [CheckResult.from_tuple(row) for row in rows]
+        finally:
+            # Unblocks the submitting thread if the consumer stops early
+            stopped.set()
+            thread.join()
+            while not pending.empty():
+                item = pending.get()
+                if not isinstance(item, BaseException) and item is not _DONE:
+                    item.cancel()
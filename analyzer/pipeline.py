@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.domain_checker import DomainChecker
+from analyzer.page_store import PageStore
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _read_pages(page_store: PageStore, page_types: CrawlerDomainMetaData,
+                read_page_types: Optional[Set[str]]) -> Dict[str, bytes]:
+    pages: Dict[str, bytes] = dict()
+    for page_type, crawled_pages in page_types.items():
+        if read_page_types is not None and page_type not in read_page_types:
+            continue
+        for crawled_page in crawled_pages:
+            html_path = crawled_page['htmlFilePath']
+            try:
+                pages[html_path] = page_store.read(html_path)
+            except OSError:
+                # Left to the check, which reports the missing page like in a serial run
+                pass
+    return pages
+
+
+class DomainPipeline:
+    """Checks domains in three stages connected by bounded queues, so reading pages overlaps with checking them.
+
+    1. prefetch: the pages of the next `prefetch` domains are read by a pool of `io_threads` threads
+    2. check: the domains are parsed and checked one after another on a separate thread
+    3. write: the results are handed to the consumer of `__iter__` (which writes them)
+
+    The stages run on an asyncio event loop in a background thread. When a stage is slower than the next one, the
+    queue in between fills up and blocks it, so at most `prefetch` domains are held in memory. Only the page types
+    which the checks declare in `PAGE_TYPES` are read ahead.
+    """
+
+    def __init__(self, domains: Iterable[Tuple[str, CrawlerDomainMetaData]], domain_checker: DomainChecker,
+                 prefetch: int = 32, io_threads: int = 8):
+        self.domains = iter(domains)
+        self.domain_checker = domain_checker
+        self.prefetch = max(prefetch, 1)
+        self.io_threads = io_threads
+        self.page_store = domain_checker.page_store
+        self.read_page_types: Optional[Set[str]] = set()
+        for check in domain_checker.checks:
+            if check.PAGE_TYPES is None:
+                self.read_page_types = None
+                break
+            self.read_page_types.update(check.PAGE_TYPES)
+        self._results: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        self._stopped = threading.Event()
+
+    def __iter__(self) -> Iterator[Tuple[str, List[CheckResult]]]:
+        thread = threading.Thread(target=asyncio.run, args=(self._run(),), name='domain-pipeline', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = self._results.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Unblocks the stages if the consumer stops early
+            self._stopped.set()
+            while thread.is_alive():
+                try:
+                    self._results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        prefetched: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        outcome = _DONE
+        with ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix='prefetch') as io_executor, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='check') as check_executor:
+            prefetcher = asyncio.ensure_future(self._prefetch(loop, io_executor, prefetched))
+            try:
+                await self._check(loop, check_executor, prefetched)
+            except BaseException as e:
+                # Re-raised in the consumer's thread, including InvalidMetricCheckException
+                outcome = e
+            finally:
+                # The prefetcher may still wait for space in the queue when the run was stopped
+                prefetcher.cancel()
+                await asyncio.gather(prefetcher, return_exceptions=True)
+        await loop.run_in_executor(None, self._put_result, outcome)
+
+    async def _prefetch(self, loop, io_executor, prefetched: asyncio.Queue) -> None:
+        try:
+            while not self._stopped.is_set():
+                # Reading crawler meta data is I/O as well
+                entry = await loop.run_in_executor(io_executor, next, self.domains, None)
+                if entry is None:
+                    break
+                domain, page_types = entry
+                # The read starts right away; the queue only bounds how many domains are read ahead
+                pages = loop.run_in_executor(io_executor, _read_pages, self.page_store, page_types,
+                                             self.read_page_types)
+                await prefetched.put((domain, page_types, pages))
+        except Exception as e:
+            # Re-raised by the check stage
+            await prefetched.put(e)
+        else:
+            await prefetched.put(None)
+
+    async def _check(self, loop, check_executor, prefetched: asyncio.Queue) -> None:
+        while not self._stopped.is_set():
+            entry = await prefetched.get()
+            if entry is None:
+                break
+            if isinstance(entry, Exception):
+                raise entry
+            domain, page_types, pages = entry
+            results = await loop.run_in_executor(check_executor, self.domain_checker.check_domain, domain,
+                                                 page_types, await pages)
+            await loop.run_in_executor(None, self._put_result, (domain, results))
+
+    def _put_result(self, item) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
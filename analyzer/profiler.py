@@ -0,0 +1,124 @@
+import heapq
+import json
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from analyzer.checks.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in milliseconds; a last bucket takes everything slower
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Profiler:
+    """Collects the time spent per check and per domain as well as the bytes read and pages parsed.
+
+    Latencies of every check are counted in fixed histogram buckets and only the `top_n` slowest domains are kept,
+    so the memory used is independent of the number of domains. Profiles of worker processes are combined with
+    `merge`.
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.check_histograms: Dict[str, List[int]] = defaultdict(lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+        self.check_seconds: Dict[str, float] = defaultdict(float)
+        self.check_max_seconds: Dict[str, float] = defaultdict(float)
+        self.number_of_domains = 0
+        self.domain_seconds = 0.0
+        self.bytes_read = 0
+        self.pages_parsed = 0
+        # Min-heap of (seconds, domain, bytes read, pages parsed)
+        self.slowest_domains: List[Tuple[float, str, int, int]] = list()
+
+    def record_check(self, identifier: str, seconds: float) -> None:
+        self.check_histograms[identifier][bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+        self.check_seconds[identifier] += seconds
+        self.check_max_seconds[identifier] = max(self.check_max_seconds[identifier], seconds)
+
+    def record_domain(self, domain: str, seconds: float, page_cache: PageCache) -> None:
+        """Records a checked domain; has to be called before the page cache is cleared.
+        """
+        bytes_read = 0
+        pages_parsed = 0
+        for page in page_cache.loaded_pages():
+            loaded = page.__dict__.get('mapped', page.__dict__.get('raw'))
+            if loaded is not None:
+                bytes_read += len(loaded)
+            # Pages which were parsed only partially count as well
+            if any(parsed in page.__dict__ for parsed in ('extracted', 'soup', '_extraction')):
+                pages_parsed += 1
+        self.number_of_domains += 1
+        self.domain_seconds += seconds
+        self.bytes_read += bytes_read
+        self.pages_parsed += pages_parsed
+        self._push_domain((seconds, domain, bytes_read, pages_parsed))
+
+    def _push_domain(self, entry: Tuple[float, str, int, int]) -> None:
+        if len(self.slowest_domains) < self.top_n:
+            heapq.heappush(self.slowest_domains, entry)
+        elif entry > self.slowest_domains[0]:
+            heapq.heapreplace(self.slowest_domains, entry)
+
+    def merge(self, profile: Dict) -> None:
+        """Adds a profile in the format of `to_dict` (e.g. of a worker process).
+        """
+        for identifier, check in profile['checks'].items():
+            histogram = self.check_histograms[identifier]
+            for i, count in enumerate(check['histogram']):
+                histogram[i] += count
+            self.check_seconds[identifier] += check['seconds']
+            self.check_max_seconds[identifier] = max(self.check_max_seconds[identifier], check['max_seconds'])
+        self.number_of_domains += profile['domains']
+        self.domain_seconds += profile['domain_seconds']
+        self.bytes_read += profile['bytes_read']
+        self.pages_parsed += profile['pages_parsed']
+        for domain in profile['slowest_domains']:
+            self._push_domain((domain['seconds'], domain['domain'], domain['bytes_read'], domain['pages_parsed']))
+
+    def to_dict(self) -> Dict:
+        return {
+            'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+            'checks': {
+                identifier: {
+                    'count': sum(histogram),
+                    'seconds': self.check_seconds[identifier],
+                    'max_seconds': self.check_max_seconds[identifier],
+                    'histogram': list(histogram),
+                } for identifier, histogram in self.check_histograms.items()
+            },
+            'domains': self.number_of_domains,
+            'domain_seconds': self.domain_seconds,
+            'bytes_read': self.bytes_read,
+            'pages_parsed': self.pages_parsed,
+            'slowest_domains': [
+                {'domain': domain, 'seconds': seconds, 'bytes_read': bytes_read, 'pages_parsed': pages_parsed}
+                for seconds, domain, bytes_read, pages_parsed in sorted(self.slowest_domains, reverse=True)
+            ],
+        }
+
+    def dump(self, path) -> None:
+        with open(path, 'w', encoding='utf-8') as profile_file:
+            json.dump(self.to_dict(), profile_file, indent=2)
+
+    def report(self) -> str:
+        """Human readable latency histograms per check and the slowest domains.
+        """
+        labels = [f'<{bound}ms' for bound in HISTOGRAM_BOUNDS_MS] + [f'>={HISTOGRAM_BOUNDS_MS[-1]}ms']
+        lines = [
+            f'Profiled {self.number_of_domains} domains in {self.domain_seconds:.2f} seconds, '
+            f'{self.bytes_read / 1024 / 1024:.1f} MB read, {self.pages_parsed} pages parsed',
+            'Check latencies (count per bucket, mean, max):',
+            '\t'.join(['check'] + labels + ['mean', 'max']),
+        ]
+        for identifier in sorted(self.check_histograms, key=lambda i: self.check_seconds[i], reverse=True):
+            histogram = self.check_histograms[identifier]
+            mean_ms = self.check_seconds[identifier] * 1000 / max(sum(histogram), 1)
+            lines.append('\t'.join([identifier] + [str(count) for count in histogram]
+                                   + [f'{mean_ms:.2f}ms', f'{self.check_max_seconds[identifier] * 1000:.2f}ms']))
+        lines.append(f'{len(self.slowest_domains)} slowest domains (seconds, bytes read, pages parsed):')
+        for seconds, domain, bytes_read, pages_parsed in sorted(self.slowest_domains, reverse=True):
+            lines.append(f'{domain}\t{seconds:.3f}\t{bytes_read}\t{pages_parsed}')
+        return '\n'.join(lines)
@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional, Tuple
+
+from analyzer.checks.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_CACHE_PATH = os.path.expanduser(os.path.join('~', '.cache', 'gdpr-scanner', 'analyzer-cache.sqlite'))
+
+
+def result_cache_key(check_class, page_cache: PageCache) -> bytes:
+    """Key of a check result: the check (IDENTIFIER and VERSION), the html parser, the page size limit and the content
+    of all pages it reads.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f'{check_class.IDENTIFIER}\0{check_class.VERSION}\0{page_cache.html_parser.NAME}\0'
+                  f'{page_cache.max_page_bytes}\0'.encode('utf-8'))
+    digest.update(page_cache.content_hash(check_class.PAGE_TYPES))
+    return digest.digest()
+
+
+class ResultCache:
+    """Persistent cache of check results across analyzer runs, stored in a local SQLite database.
+
+    Only the pass type and description are stored, the severity is taken from the check and the domain from the run.
+    When the cache holds more than `max_entries` results, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULT_CACHE_PATH, max_entries: int = 1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Worker processes share the database, WAL mode lets them read while another one writes.
+        # The pipelined run checks domains on another thread than the one which opened the cache, but never
+        # uses the connection from two threads at once.
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key BLOB PRIMARY KEY, pass_type TEXT NOT NULL, description TEXT NOT NULL, last_used INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self.connection.commit()
+        self._now = int(time.time())
+
+    def get(self, key: bytes) -> Optional[Tuple[str, str]]:
+        """Returns the pass type value and description stored for `key`.
+        """
+        row = self.connection.execute('SELECT pass_type, description FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (self._now, key))
+        return row
+
+    def put(self, key: bytes, pass_type: str, description: str) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO results (key, pass_type, description, last_used) VALUES (?, ?, ?, ?)',
+            (key, pass_type, description, self._now)
+        )
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def evict(self) -> None:
+        """Deletes the least recently used results exceeding `max_entries`.
+        """
+        number_of_entries = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        exceeding = number_of_entries - self.max_entries
+        if exceeding > 0:
+            logger.info(f'Evicting {exceeding} results from the result cache')
+            self.connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)', (exceeding,)
+            )
+            self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,121 @@
+from array import array
+from collections import Counter, defaultdict
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.severity import Severity
+
+_PASS_TYPES: List[CheckResult.PassType] = list(CheckResult.PassType)
+_PASS_TYPE_CODES: Dict[CheckResult.PassType, int] = {pass_type: code for code, pass_type in enumerate(_PASS_TYPES)}
+
+
+class _StringTable:
+    """Stores every distinct string once and refers to it by an integer code.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = list()
+        self.codes: Dict[str, int] = dict()
+
+    def code(self, string: str) -> int:
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+        return code
+
+
+class ResultStore:
+    """Compact, indexed collection of check results.
+
+    Results are stored column-wise as integer codes (domains, identifiers and descriptions are interned in string
+    tables, pass types and severities are stored as enum codes). Counters per identifier, pass type and severity and an
+    index per identifier and pass type are updated when results are added, so statistics don't scan all results.
+    """
+
+    def __init__(self, results: Iterable[CheckResult] = ()):
+        self._domains = _StringTable()
+        self._identifiers = _StringTable()
+        self._descriptions = _StringTable()
+        self._domain_codes = array('I')
+        self._identifier_codes = array('H')
+        self._description_codes = array('I')
+        self._pass_type_codes = array('B')
+        self._severity_codes = array('B')
+        # Keys are (identifier, pass type, severity) codes, None matches any value
+        self._counts: Counter = Counter()
+        # Row numbers by (identifier, pass type) code
+        self._index: Dict[Tuple[int, int], array] = defaultdict(lambda: array('I'))
+        self.extend(results)
+
+    def append(self, result: CheckResult) -> None:
+        row = len(self._identifier_codes)
+        identifier_code = self._identifiers.code(result.identifier)
+        pass_type_code = _PASS_TYPE_CODES[result.passed]
+        severity_code = result.severity.value
+        self._domain_codes.append(self._domains.code(result.domain))
+        self._identifier_codes.append(identifier_code)
+        self._description_codes.append(self._descriptions.code(result.description))
+        self._pass_type_codes.append(pass_type_code)
+        self._severity_codes.append(severity_code)
+
+        for key in product((identifier_code, None), (pass_type_code, None), (severity_code, None)):
+            self._counts[key] += 1
+        self._index[(identifier_code, pass_type_code)].append(row)
+
+    def extend(self, results: Iterable[CheckResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    def count(self, identifier: Optional[str] = None, passed: Optional[CheckResult.PassType] = None,
+              severity: Optional[Severity] = None) -> int:
+        """Number of results matching all given criteria.
+        """
+        if identifier is not None and identifier not in self._identifiers.codes:
+            return 0
+        key = (
+            self._identifiers.codes[identifier] if identifier is not None else None,
+            _PASS_TYPE_CODES[passed] if passed is not None else None,
+            severity.value if severity is not None else None,
+        )
+        return self._counts[key]
+
+    def filter(self, identifier: Optional[str] = None,
+               passed: Optional[CheckResult.PassType] = None) -> List[CheckResult]:
+        """Results matching all given criteria in the order they were added.
+        """
+        if identifier is None and passed is None:
+            return list(self)
+        if identifier is not None and identifier not in self._identifiers.codes:
+            return []
+        identifier_codes = [self._identifiers.codes[identifier]] if identifier is not None \
+            else range(len(self._identifiers.strings))
+        pass_type_codes = [_PASS_TYPE_CODES[passed]] if passed is not None else range(len(_PASS_TYPES))
+        rows = [
+            row
+            for key in product(identifier_codes, pass_type_codes) if key in self._index
+            for row in self._index[key]
+        ]
+        return [self._result(row) for row in sorted(rows)]
+
+    def _result(self, row: int) -> CheckResult:
+        return CheckResult(
+            domain=self._domains.strings[self._domain_codes[row]],
+            identifier=self._identifiers.strings[self._identifier_codes[row]],
+            passed=_PASS_TYPES[self._pass_type_codes[row]],
+            description=self._descriptions.strings[self._description_codes[row]],
+            severity=Severity(self._severity_codes[row]),
+        )
+
+    def __len__(self) -> int:
+        return len(self._identifier_codes)
+
+    def __iter__(self) -> Iterator[CheckResult]:
+        for row in range(len(self)):
+            yield self._result(row)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[CheckResult, List[CheckResult]]:
+        if isinstance(item, slice):
+            return [self._result(row) for row in range(len(self))[item]]
+        return self._result(range(len(self))[item])
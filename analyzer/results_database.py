@@ -0,0 +1,120 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.severity import Severity
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS runs ('
+    'id INTEGER PRIMARY KEY, crawler_json TEXT NOT NULL, shard TEXT, started_at INTEGER NOT NULL, finished_at INTEGER'
+    ')',
+    'CREATE TABLE IF NOT EXISTS domains (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS checks (id INTEGER PRIMARY KEY, identifier TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS results ('
+    'run_id INTEGER NOT NULL REFERENCES runs (id), domain_id INTEGER NOT NULL REFERENCES domains (id), '
+    'check_id INTEGER NOT NULL REFERENCES checks (id), passed INTEGER NOT NULL, pass_type TEXT NOT NULL, '
+    'severity INTEGER NOT NULL, description TEXT NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS results_domain ON results (domain_id, run_id)',
+    'CREATE INDEX IF NOT EXISTS results_check ON results (check_id, pass_type, run_id)',
+    'CREATE INDEX IF NOT EXISTS results_pass_type ON results (pass_type)',
+    'CREATE INDEX IF NOT EXISTS results_severity ON results (severity)',
+    'CREATE INDEX IF NOT EXISTS results_run ON results (run_id)',
+    # Same columns as analyzer-results.csv, for querying without joins
+    'CREATE VIEW IF NOT EXISTS results_view AS '
+    'SELECT results.run_id, domains.name AS originalDomain, checks.identifier AS testIdentifier, results.passed, '
+    'results.pass_type AS passType, results.severity, results.description '
+    'FROM results JOIN domains ON domains.id = results.domain_id JOIN checks ON checks.id = results.check_id',
+]
+
+
+class ResultsDatabase:
+    """Check results of all runs in a local SQLite database, an indexed alternative to reading analyzer-results.csv.
+
+    Domains and check identifiers are stored once in their own tables and referenced by id, the results are indexed by
+    domain, check, pass type and severity. `results_view` has the columns of the csv, e.g. all domains failing a check:
+    `SELECT originalDomain FROM results_view WHERE testIdentifier = ? AND passType = 'failed'`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            for statement in _SCHEMA:
+                self.connection.execute(statement)
+        self.run_id: Optional[int] = None
+        self._domain_ids: Dict[str, int] = dict()
+        self._check_ids: Dict[str, int] = dict()
+
+    def start_run(self, crawler_json: str, shard: str = None) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (crawler_json, shard, started_at) VALUES (?, ?, ?)',
+                (crawler_json, shard, int(time.time()))
+            )
+        self.run_id = cursor.lastrowid
+        logger.info(f'Writing results of run {self.run_id} to {self.path}')
+        return self.run_id
+
+    def finish_run(self) -> None:
+        """Marks the current run as finished, results appended afterwards belong to a new run.
+        """
+        with self.connection:
+            self.connection.execute('UPDATE runs SET finished_at = ? WHERE id = ?', (int(time.time()), self.run_id))
+        self.run_id = None
+
+    def append(self, results: Iterable[CheckResult]) -> None:
+        """Inserts `results` into the current run, all of them in a single transaction.
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO results (run_id, domain_id, check_id, passed, pass_type, severity, description) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (self.run_id, self._id_of('domains', 'name', self._domain_ids, result.domain),
+                     self._id_of('checks', 'identifier', self._check_ids, result.identifier), result.passed.passed,
+                     result.passed.value, result.severity.value, result.description)
+                    for result in results
+                ]
+            )
+
+    def _id_of(self, table: str, column: str, ids: Dict[str, int], value: str) -> int:
+        if value not in ids:
+            self.connection.execute(f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)', (value,))
+            ids[value] = self.connection.execute(f'SELECT id FROM {table} WHERE {column} = ?', (value,)).fetchone()[0]
+        return ids[value]
+
+    def latest_run_id(self) -> Optional[int]:
+        return self.connection.execute('SELECT MAX(id) FROM runs').fetchone()[0]
+
+    def results(self, run_id: int = None, domain: str = None, identifier: str = None,
+                passed: CheckResult.PassType = None) -> List[CheckResult]:
+        """Results of a run (the latest one by default), optionally only of a domain, check or pass type.
+        """
+        conditions = ['run_id = ?']
+        parameters: list = [run_id if run_id is not None else self.latest_run_id()]
+        for column, value in (('originalDomain', domain), ('testIdentifier', identifier),
+                              ('passType', passed.value if passed is not None else None)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                parameters.append(value)
+        rows = self.connection.execute(
+            'SELECT originalDomain, testIdentifier, passType, description, severity FROM results_view '
+            f'WHERE {" AND ".join(conditions)}', parameters
+        )
+        return [
+            CheckResult(domain=domain, identifier=identifier, passed=CheckResult.PassType(pass_type),
+                        description=description, severity=Severity(severity))
+            for domain, identifier, pass_type, description, severity in rows
+        ]
+
+    def close(self) -> None:
+        self.connection.close()
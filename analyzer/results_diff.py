@@ -0,0 +1,124 @@
+import csv
+import heapq
+import logging
+import os
+import tempfile
+from contextlib import closing
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pass type of a result which only one of the result sets has
+ABSENT = 'absent'
+
+COLUMNS = ('originalDomain', 'testIdentifier', 'passType')
+
+
+class Change(NamedTuple):
+    """Result of a check for a domain whose pass type differs between two result sets. Ordered by check and transition.
+    """
+    identifier: str
+    old: str
+    new: str
+    domain: str
+
+
+def _read_results(path: str) -> Iterator[Tuple[str, str, str]]:
+    """(originalDomain, testIdentifier, passType) of every row of a results csv.
+    """
+    with open(path, encoding='utf-8', newline='') as results_file:
+        reader = csv.reader(results_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing_columns = [column for column in COLUMNS if column not in header]
+        if missing_columns:
+            raise ValueError(f'{path} is missing the column(s) {", ".join(missing_columns)}')
+        domain_column, identifier_column, pass_type_column = (header.index(column) for column in COLUMNS)
+        for row in reader:
+            if row:
+                yield row[domain_column], row[identifier_column], row[pass_type_column]
+
+
+def _external_sort(rows: Iterable[tuple], tmp_dir: str, chunk_size: int) -> Iterator[tuple]:
+    """Sorts tuples of strings with at most `chunk_size` of them in memory.
+
+    Chunks are sorted on their own and spilled to temporary files, which are merged while reading them back. Input that
+    fits into a single chunk is sorted in memory. The run files are closed and removed once the generator is exhausted
+    or closed.
+    """
+    rows = iter(rows)
+    run_paths: List[str] = []
+    run_files = []
+    try:
+        while True:
+            chunk = sorted(islice(rows, chunk_size))
+            if not run_paths and len(chunk) < chunk_size:
+                yield from chunk
+                return
+            if not chunk:
+                break
+            fd, run_path = tempfile.mkstemp(suffix='.csv', dir=tmp_dir)
+            run_paths.append(run_path)
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as run_file:
+                csv.writer(run_file).writerows(chunk)
+            del chunk
+
+        for run_path in run_paths:
+            run_files.append(open(run_path, encoding='utf-8', newline=''))
+        yield from heapq.merge(*(map(tuple, csv.reader(run_file)) for run_file in run_files))
+    finally:
+        for run_file in run_files:
+            run_file.close()
+        for run_path in run_paths:
+            os.remove(run_path)
+
+
+def _reject_duplicates(rows: Iterator[Tuple[str, str, str]], path: str) -> Iterator[Tuple[str, str, str]]:
+    """Passes through sorted rows of the results csv at `path`, which must have one result per domain and check.
+    """
+    previous_key: Optional[tuple] = None
+    for row in rows:
+        if row[:2] == previous_key:
+            raise ValueError(f'{path} has more than one result of {row[1]} for {row[0]}')
+        previous_key = row[:2]
+        yield row
+
+
+def _merge_join(old: Iterator[Tuple[str, str, str]], new: Iterator[Tuple[str, str, str]]) -> Iterator[Change]:
+    """Changed results of two result sets, both sorted by (originalDomain, testIdentifier).
+    """
+    old_row: Optional[tuple] = next(old, None)
+    new_row: Optional[tuple] = next(new, None)
+    while old_row is not None or new_row is not None:
+        if new_row is None or (old_row is not None and old_row[:2] < new_row[:2]):
+            yield Change(old_row[1], old_row[2], ABSENT, old_row[0])
+            old_row = next(old, None)
+        elif old_row is None or new_row[:2] < old_row[:2]:
+            yield Change(new_row[1], ABSENT, new_row[2], new_row[0])
+            new_row = next(new, None)
+        else:
+            if old_row[2] != new_row[2]:
+                yield Change(new_row[1], old_row[2], new_row[2], new_row[0])
+            old_row = next(old, None)
+            new_row = next(new, None)
+
+
+def diff_results(old_path: str, new_path: str, chunk_size: int = 200_000) -> Iterator[Change]:
+    """Results whose pass type differs between the results csv files `old_path` and `new_path`, including results which
+    only one of them has, grouped by check and transition.
+
+    Both files are sorted by (originalDomain, testIdentifier) in chunks of `chunk_size` rows and merge-joined while
+    streaming, the changes are sorted the same way, so memory stays bounded by the chunk size.
+    Raises ValueError if a file lacks one of the columns or has more than one result of a check for a domain.
+    """
+    with tempfile.TemporaryDirectory(prefix='analyzer-diff-') as tmp_dir:
+        # The sorts are closed before the directory of their run files is removed, also when the diff stops early
+        with closing(_external_sort(_read_results(old_path), tmp_dir, chunk_size)) as old_sorted, \
+                closing(_external_sort(_read_results(new_path), tmp_dir, chunk_size)) as new_sorted:
+            old = _reject_duplicates(old_sorted, old_path)
+            new = _reject_duplicates(new_sorted, new_path)
+            with closing(_external_sort(_merge_join(old, new), tmp_dir, chunk_size)) as changes:
+                for change in changes:
+                    yield Change(*change)
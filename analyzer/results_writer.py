@@ -0,0 +1,116 @@
+import csv
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.severity import Severity
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsWriter:
+    """Appends check results to the results csv and records the finished domains in a checkpoint file.
+
+    Results of a domain are always flushed before the domain is added to the checkpoint. When resuming, rows of domains
+    which are not in the checkpoint (the run was interrupted while writing them) are dropped.
+    """
+    field_names = ['originalDomain', 'testIdentifier', 'passed', 'passType', 'severity', 'description']
+
+    def __init__(self, results_csv_path: Path, checkpoint_path: Path):
+        self.results_csv_path = results_csv_path
+        self.checkpoint_path = checkpoint_path
+        self.completed_domains: Set[str] = set()
+        self._started = False
+
+    def start(self) -> None:
+        """Starts a new run; existing results and checkpoint are overwritten.
+        """
+        with self.results_csv_path.open('w', encoding='utf-8', newline='') as results_file:
+            self._csv_writer(results_file).writeheader()
+        self.checkpoint_path.write_text('', encoding='utf-8')
+        self.completed_domains = set()
+        self._started = True
+
+    def resume(self) -> List[CheckResult]:
+        """Continues a previous run and returns the results of the domains it completed.
+        """
+        if not self.results_csv_path.exists() or not self.checkpoint_path.exists():
+            logger.info(f'No previous run to resume at {str(self.checkpoint_path)}')
+            self.start()
+            return []
+
+        results = self.completed_results()
+
+        # Rewrite both files, so that rows of unfinished domains and incomplete lines are gone
+        tmp_path = self.results_csv_path.with_suffix('.tmp')
+        with tmp_path.open('w', encoding='utf-8', newline='') as results_file:
+            writer = self._csv_writer(results_file)
+            writer.writeheader()
+            writer.writerows(self._row_from_result(result) for result in results)
+        os.replace(str(tmp_path), str(self.results_csv_path))
+        self.checkpoint_path.write_text(''.join(f'{domain}\n' for domain in self.completed_domains), encoding='utf-8')
+
+        logger.info(f'Resuming after {len(self.completed_domains)} completed domains')
+        self._started = True
+        return results
+
+    def completed_results(self) -> List[CheckResult]:
+        """Reads the results of the domains which are in the checkpoint, without changing the files.
+        """
+        with self.checkpoint_path.open(encoding='utf-8') as checkpoint_file:
+            # A line without line break is an interrupted write
+            self.completed_domains = {line[:-1] for line in checkpoint_file if line.endswith('\n')}
+
+        results: List[CheckResult] = list()
+        with self.results_csv_path.open(encoding='utf-8', newline='') as results_file:
+            for row in csv.DictReader(results_file):
+                if row['originalDomain'] in self.completed_domains:
+                    results.append(self._result_from_row(row))
+        return results
+
+    def append(self, results: Iterable[CheckResult], domains: Iterable[str]) -> None:
+        """Appends `results` and afterwards marks `domains` as completed.
+        """
+        if not self._started:
+            self.start()
+        with self.results_csv_path.open('a', encoding='utf-8', newline='') as results_file:
+            self._csv_writer(results_file).writerows(self._row_from_result(result) for result in results)
+            results_file.flush()
+            os.fsync(results_file.fileno())
+        domains = [domain for domain in domains if domain not in self.completed_domains]
+        with self.checkpoint_path.open('a', encoding='utf-8') as checkpoint_file:
+            checkpoint_file.writelines(f'{domain}\n' for domain in domains)
+        self.completed_domains.update(domains)
+
+    def _csv_writer(self, results_file) -> csv.DictWriter:
+        return csv.DictWriter(
+            results_file,
+            delimiter=',',
+            quotechar='"',
+            quoting=csv.QUOTE_MINIMAL,
+            fieldnames=self.field_names
+        )
+
+    @staticmethod
+    def _row_from_result(result: CheckResult) -> dict:
+        return {
+            'originalDomain': result.domain,
+            'testIdentifier': result.identifier,
+            'passed': result.passed.passed,
+            'passType': result.passed.value,
+            'severity': result.severity,
+            'description': result.description,
+        }
+
+    @staticmethod
+    def _result_from_row(row: dict) -> CheckResult:
+        return CheckResult(
+            domain=row['originalDomain'],
+            identifier=row['testIdentifier'],
+            passed=CheckResult.PassType(row['passType']),
+            description=row['description'],
+            # Severities are written as `Severity.<NAME>`
+            severity=Severity[row['severity'].split('.')[-1]],
+        )
@@ -0,0 +1,147 @@
+import logging
+import math
+import random
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from analyzer.types_definitions import CrawlerDomainMetaData
+
+logger = logging.getLogger(__name__)
+
+# Normal quantile of a two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+# Strata which would get fewer sampled domains are pooled, a stratum needs two of them for a variance estimate
+MIN_DOMAINS_PER_STRATUM = 2
+OTHER_STRATUM = '(other)'
+
+
+def _tld(domain: str, page_types: CrawlerDomainMetaData) -> str:
+    return domain.rsplit('.', 1)[-1].lower()
+
+
+def _privacy_page(domain: str, page_types: CrawlerDomainMetaData) -> str:
+    return 'privacy page' if 'privacy' in page_types else 'no privacy page'
+
+
+STRATIFICATIONS: Dict[str, Callable[[str, CrawlerDomainMetaData], str]] = {
+    'tld': _tld,
+    'privacy-page': _privacy_page,
+}
+
+
+class Estimate(NamedTuple):
+    """Estimated share of the domains with a 95% confidence interval.
+    """
+    rate: float
+    low: float
+    high: float
+
+    def __str__(self) -> str:
+        return f'{self.rate:.4f} [{self.low:.4f}, {self.high:.4f}]'
+
+
+class StratifiedSample:
+    """A random sample of the crawled domains, drawn separately from every stratum (e.g. every TLD).
+
+    Either `size` domains or a `fraction` of them are sampled, allocated to the strata in proportion to their size.
+    Strata which would get fewer than two sampled domains are pooled into one. The sample only depends on the domains
+    and the `seed`, so a resumed run samples the same domains.
+    """
+
+    def __init__(self, size: int = None, fraction: float = None, stratify_by: str = 'tld', seed: int = 0):
+        if (size is None) == (fraction is None):
+            raise ValueError('Either the size or the fraction of the sample has to be given')
+        if stratify_by not in STRATIFICATIONS:
+            raise ValueError(f'Unknown stratification {stratify_by}, expected one of {", ".join(STRATIFICATIONS)}')
+        self.size = size
+        self.fraction = fraction
+        self.stratify_by = stratify_by
+        self.seed = seed
+        # Number of domains per stratum and the stratum of every sampled domain
+        self.population: Dict[str, int] = dict()
+        self.strata: Dict[str, str] = dict()
+        self.selected = False
+
+    @property
+    def number_of_domains(self) -> int:
+        return sum(self.population.values())
+
+    def select(self, domains: Iterable[Tuple[str, CrawlerDomainMetaData]]) -> None:
+        """Draws the sample from all `domains`.
+        """
+        stratum_of = STRATIFICATIONS[self.stratify_by]
+        domains_by_stratum: Dict[str, List[str]] = dict()
+        for domain, page_types in domains:
+            domains_by_stratum.setdefault(stratum_of(domain, page_types), []).append(domain)
+        number_of_domains = sum(len(stratum_domains) for stratum_domains in domains_by_stratum.values())
+        size = self.size if self.size is not None else round(self.fraction * number_of_domains)
+        size = min(size, number_of_domains)
+
+        # Pool the strata which are too small to be sampled on their own
+        pooled: Dict[str, List[str]] = dict()
+        for stratum in sorted(domains_by_stratum):
+            stratum_domains = domains_by_stratum[stratum]
+            if size * len(stratum_domains) / max(number_of_domains, 1) < MIN_DOMAINS_PER_STRATUM:
+                stratum = OTHER_STRATUM
+            pooled.setdefault(stratum, []).extend(stratum_domains)
+
+        rng = random.Random(self.seed)
+        self.population = {stratum: len(stratum_domains) for stratum, stratum_domains in pooled.items()}
+        self.strata = dict()
+        for stratum, allocated in self._allocate(size).items():
+            for domain in rng.sample(sorted(pooled[stratum]), allocated):
+                self.strata[domain] = stratum
+        self.selected = True
+        logger.info(f'Sampled {len(self.strata)} of {number_of_domains} domains from {len(self.population)} strata '
+                    f'by {self.stratify_by}')
+
+    def _allocate(self, size: int) -> Dict[str, int]:
+        """Proportional allocation of `size` domains to the strata, rounded by largest remainder.
+        """
+        number_of_domains = self.number_of_domains
+        shares = {stratum: size * count / number_of_domains for stratum, count in self.population.items()}
+        allocation = {stratum: int(share) for stratum, share in shares.items()}
+        by_remainder = sorted(shares, key=lambda stratum: (allocation[stratum] - shares[stratum], stratum))
+        for stratum in by_remainder[:size - sum(allocation.values())]:
+            allocation[stratum] += 1
+        return allocation
+
+    def includes(self, domain: str) -> bool:
+        return domain in self.strata
+
+    def estimate(self, matching_domains: Iterable[str], checked_domains: Iterable[str]) -> Estimate:
+        """Share of all domains which match, estimated from the sampled `checked_domains` of which `matching_domains`
+        match (e.g. failed a check).
+
+        The rates of the strata are weighted by their size. The interval is a Wilson score interval for the effective
+        sample size of the stratified estimator (its variance includes the finite population correction), so rates
+        close to 0 or 1 still get an interval of non-zero width.
+        """
+        checked: Dict[str, int] = dict()
+        for domain in checked_domains:
+            stratum = self.strata[domain]
+            checked[stratum] = checked.get(stratum, 0) + 1
+        matching: Dict[str, int] = dict()
+        for domain in set(matching_domains):
+            stratum = self.strata[domain]
+            matching[stratum] = matching.get(stratum, 0) + 1
+
+        number_of_domains = sum(self.population[stratum] for stratum in checked)
+        rate, variance = 0.0, 0.0
+        for stratum, sampled in checked.items():
+            weight = self.population[stratum] / number_of_domains
+            stratum_rate = matching.get(stratum, 0) / sampled
+            finite_population_correction = 1 - sampled / self.population[stratum]
+            rate += weight * stratum_rate
+            variance += (weight ** 2 * finite_population_correction * stratum_rate * (1 - stratum_rate)
+                         / max(sampled - 1, 1))
+        if variance > 0:
+            effective_size = rate * (1 - rate) / variance
+        else:
+            effective_size = sum(checked.values())
+        if not effective_size:
+            return Estimate(rate, 0.0, 1.0)
+        z_squared = Z_95 ** 2
+        center = (rate + z_squared / (2 * effective_size)) / (1 + z_squared / effective_size)
+        margin = (Z_95 * math.sqrt(rate * (1 - rate) / effective_size + z_squared / (4 * effective_size ** 2))
+                  / (1 + z_squared / effective_size))
+        return Estimate(rate, max(center - margin, 0.0), min(center + margin, 1.0))
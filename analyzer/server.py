@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER
+from analyzer.checks.metrics import MetricCheck
+from analyzer.crawler_meta import CrawlerMetaReader
+from analyzer.domain_checker import DomainChecker
+from analyzer.types_definitions import CrawlerMetaData
+
+logger = logging.getLogger(__name__)
+
+DOMAINS_PATH = '/domains/'
+
+
+def result_to_json(result: CheckResult) -> dict:
+    """A check result with the columns of analyzer-results.csv.
+    """
+    return {
+        'originalDomain': result.domain,
+        'testIdentifier': result.identifier,
+        'passed': result.passed.passed,
+        'passType': result.passed.value,
+        'severity': result.severity.name,
+        'description': result.description,
+    }
+
+
+class DomainService:
+    """Checks single domains on demand. The checks, their compiled matchers and the crawler meta data stay in memory
+    between requests, only the pages of the requested domain are read.
+
+    The crawler meta data is reloaded when crawler.json changed since it was loaded, e.g. after a domain was re-crawled.
+    Requests are handled one after another, checks are not thread-safe.
+    """
+
+    def __init__(self, crawler_metadata_filepath: str, checks: List[MetricCheck],
+                 html_parser: str = DEFAULT_HTML_PARSER, max_page_bytes: int = None, check_time_budget: float = None,
+                 domain_time_budget: float = None):
+        self.crawler_metadata_filepath = os.path.abspath(crawler_metadata_filepath)
+        # Requests are handled in threads, so time budgets are only enforced between parse steps
+        self.domain_checker = DomainChecker(checks, self.crawler_metadata_filepath, html_parser=html_parser,
+                                            max_page_bytes=max_page_bytes, check_time_budget=check_time_budget,
+                                            domain_time_budget=domain_time_budget)
+        self._crawler_meta_data: Optional[CrawlerMetaData] = None
+        self._crawler_meta_version: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def crawler_meta_data(self) -> CrawlerMetaData:
+        stat = os.stat(self.crawler_metadata_filepath)
+        version = (stat.st_size, stat.st_mtime_ns)
+        if version != self._crawler_meta_version:
+            logger.info(f'Loading {self.crawler_metadata_filepath}')
+            self._crawler_meta_data = CrawlerMetaReader(self.crawler_metadata_filepath).load()
+            self._crawler_meta_version = version
+        return self._crawler_meta_data
+
+    def warm_up(self) -> None:
+        """Loads the crawler meta data and checks the first domain, so the first request doesn't pay for it.
+        """
+        for domain in self.crawler_meta_data:
+            self.check_domain(domain)
+            break
+
+    def check_domain(self, domain: str) -> Optional[List[CheckResult]]:
+        """Results of all checks for `domain`, None if it wasn't crawled.
+        """
+        with self._lock:
+            page_types = self.crawler_meta_data.get(domain)
+            if page_types is None:
+                return None
+            return self.domain_checker.check_domain(domain, page_types)
+
+
+class DomainRequestHandler(BaseHTTPRequestHandler):
+    """`GET /domains/<domain>` returns the results of all checks for the domain as JSON.
+    """
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if not path.startswith(DOMAINS_PATH) or len(path) == len(DOMAINS_PATH):
+            self._send_json(404, {'error': f'Unknown path {path}, expected {DOMAINS_PATH}<domain>'})
+            return
+        domain = unquote(path[len(DOMAINS_PATH):])
+        try:
+            results = self.server.service.check_domain(domain)
+        except Exception as e:
+            logger.exception(f'Checking {domain} failed')
+            self._send_json(500, {'error': str(e)})
+            return
+        if results is None:
+            self._send_json(404, {'error': f'{domain} was not crawled'})
+            return
+        self._send_json(200, {'domain': domain, 'results': [result_to_json(result) for result in results]})
+
+    def _send_json(self, status: int, body: dict) -> None:
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self) -> str:
+        # Clients of a unix socket have no address
+        return self.client_address[0] if self.client_address else 'unix socket'
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f'{self.address_string()} {format % args}')
+
+
+class DomainHTTPServer(HTTPServer):
+
+    def __init__(self, address: Tuple[str, int], service: DomainService):
+        super().__init__(address, DomainRequestHandler)
+        self.service = service
+
+
+class DomainUnixHTTPServer(socketserver.UnixStreamServer):
+
+    def __init__(self, socket_path: str, service: DomainService):
+        if os.path.exists(socket_path):
+            # Left behind by a previous server
+            os.remove(socket_path)
+        super().__init__(socket_path, DomainRequestHandler)
+        self.service = service
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(service: DomainService, host: str = '127.0.0.1', port: int = 8080,
+                socket_path: str = None) -> socketserver.BaseServer:
+    """HTTP server answering requests of `service`, on a unix socket if `socket_path` is given.
+    """
+    if socket_path is not None:
+        return DomainUnixHTTPServer(socket_path, service)
+    return DomainHTTPServer((host, port), service)
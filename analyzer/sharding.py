@@ -0,0 +1,58 @@
+import glob
+import logging
+import re
+import zlib
+from pathlib import Path
+from typing import List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+_SHARD_FILE_PATTERN = re.compile(r'\.shard-(\d+)-of-(\d+)\.csv$')
+
+
+class Shard(NamedTuple):
+    """Shard `index` (1-based) of `count` shards. Domains are assigned by a hash of their name, so every machine
+    analyzing the same crawler.json picks the same, disjoint subset.
+    """
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Shard':
+        """Parses `i/N`, e.g. `2/4` for the second of four shards.
+        """
+        match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+        if match is None:
+            raise ValueError(f'Invalid shard {spec}, expected i/N')
+        shard = cls(int(match.group(1)), int(match.group(2)))
+        if not 1 <= shard.index <= shard.count:
+            raise ValueError(f'Invalid shard {spec}, i has to be between 1 and N')
+        return shard
+
+    def includes(self, domain: str) -> bool:
+        # crc32 is stable across processes and python versions, unlike hash()
+        return zlib.crc32(domain.encode('utf-8')) % self.count == self.index - 1
+
+    @property
+    def suffix(self) -> str:
+        return f'.shard-{self.index}-of-{self.count}'
+
+    def path_of(self, path: Path) -> Path:
+        """Path of the shard's variant of an output file, e.g. `analyzer-results.shard-1-of-4.csv`.
+        """
+        return path.with_name(f'{path.stem}{self.suffix}{path.suffix}')
+
+
+def find_shards(results_csv_path: Path) -> List[Shard]:
+    """Shards which wrote a variant of `results_csv_path`, ordered by shard. Missing shards are logged.
+    """
+    pattern = str(results_csv_path.with_name(f'{glob.escape(results_csv_path.stem)}.shard-*-of-*.csv'))
+    shards = set()
+    for path in glob.glob(pattern):
+        match = _SHARD_FILE_PATTERN.search(path)
+        shards.add(Shard(int(match.group(1)), int(match.group(2))))
+    for count in sorted({shard.count for shard in shards}):
+        missing = [str(i) for i in range(1, count + 1) if Shard(i, count) not in shards]
+        if missing:
+            logger.warning(f'Results of shards {", ".join(missing)} of {count} are missing')
+    return sorted(shards, key=lambda shard: (shard.count, shard.index))
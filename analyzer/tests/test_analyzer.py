@@ -0,0 +1,222 @@
+import csv
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from analyzer import parallel
+from analyzer.analyze import Analyzer
+from analyzer.pipeline import DomainPipeline
+from analyzer.profiler import Profiler
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.html_parsers import DEFAULT_HTML_PARSER
+from analyzer.crawler_meta import CrawlerMetaReader
+from analyzer.result_cache import ResultCache
+from analyzer.results_database import ResultsDatabase
+from analyzer.sharding import Shard
+
+
+def _put_into_result_cache_of_worker(metadata_filepath: str, result_cache_path: str) -> None:
+    parallel._init_worker([], metadata_filepath, result_cache_path, DEFAULT_HTML_PARSER, None, None, None, None, None)
+    parallel._domain_checker.result_cache.put(b'key', 'passed', 'description')
+
+
+class AnalyzerTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.metadata_filepath = os.path.join(tests_dir, 'test-output/crawler.json')
+
+    @staticmethod
+    def _result_rows(analyzer: Analyzer):
+        return [(r.domain, r.identifier, r.passed, r.severity, r.description) for r in analyzer.results]
+
+    def test_parallel_run_equals_serial_run(self):
+        serial = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        serial.run()
+        parallel = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        parallel.run(workers=2)
+        self.assertEqual(self._result_rows(serial), self._result_rows(parallel))
+        self.assertEqual(parallel.number_of_processed_domains, len(parallel.crawler_meta_data))
+
+    def test_parallel_results_are_yielded_while_waiting_for_domains(self):
+        domains = list(CrawlerMetaReader(self.metadata_filepath).iter_domains())
+        first_results_received = threading.Event()
+        waited_in_vain = []
+
+        def followed_domains():
+            yield domains[0]
+            # Like the domains of a followed crawl, the next one is only complete after a while
+            waited_in_vain.append(not first_results_received.wait(timeout=10))
+            yield domains[1]
+
+        domain_results = parallel.check_domains_in_parallel(followed_domains(), Analyzer.checks,
+                                                            self.metadata_filepath, workers=2, chunksize=1)
+        first_domain, _ = next(domain_results)
+        first_results_received.set()
+        second_domain, _ = next(domain_results)
+        self.assertEqual([first_domain, second_domain], [domains[0][0], domains[1][0]])
+        self.assertEqual(list(domain_results), [])
+        self.assertEqual(waited_in_vain, [False])
+
+    def test_run_of_specific_domain(self):
+        analyzer = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        analyzer.run(specific_domain='heise.de')
+        self.assertEqual(analyzer.number_of_processed_domains, 1)
+        self.assertEqual({result.domain for result in analyzer.results}, {'heise.de'})
+        self.assertEqual(len(analyzer.results), len(analyzer.checks))
+        with self.assertRaises(ValueError):
+            analyzer.run(specific_domain='unknown.de')
+
+    def test_pipelined_run_equals_serial_run(self):
+        serial = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        serial.run()
+        pipelined = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        pipelined.run(prefetch=2)
+        self.assertEqual(self._result_rows(serial), self._result_rows(pipelined))
+
+    def test_pipeline_stops_when_consumer_stops(self):
+        analyzer = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        pipeline = DomainPipeline(analyzer.crawler_meta.iter_domains(), analyzer.domain_checker, prefetch=1)
+        domain_results = iter(pipeline)
+        next(domain_results)
+        domain_results.close()
+        self.assertTrue(pipeline._stopped.is_set())
+
+    def test_profile_of_parallel_run_equals_serial_run(self):
+        serial = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                          profiler=Profiler(top_n=3))
+        serial.run()
+        parallel = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                            profiler=Profiler(top_n=3))
+        parallel.run(workers=2)
+        for profiler in (serial.profiler, parallel.profiler):
+            profile = profiler.to_dict()
+            self.assertEqual(profile['domains'], len(serial.crawler_meta_data))
+            self.assertEqual(len(profile['slowest_domains']), 3)
+            for check in serial.checks:
+                self.assertEqual(profile['checks'][check.IDENTIFIER]['count'], len(serial.crawler_meta_data))
+        self.assertEqual(serial.profiler.bytes_read, parallel.profiler.bytes_read)
+        self.assertEqual(serial.profiler.pages_parsed, parallel.profiler.pages_parsed)
+        self.assertGreater(serial.profiler.pages_parsed, 0)
+
+    def test_resume_interrupted_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_dir = os.path.join(tmp_dir, 'output')
+            shutil.copytree(os.path.dirname(self.metadata_filepath), output_dir)
+            metadata_filepath = os.path.join(output_dir, 'crawler.json')
+
+            complete = Analyzer(crawler_metadata_filepath=metadata_filepath)
+            complete.run()
+            complete.write_results_to_file()
+
+            # Simulate a run which got interrupted while writing the checkpoint
+            checkpoint_path = os.path.join(output_dir, 'analyzer-checkpoint.txt')
+            with open(checkpoint_path) as checkpoint_file:
+                domains = checkpoint_file.read().splitlines()
+            with open(checkpoint_path, 'w') as checkpoint_file:
+                checkpoint_file.write('\n'.join(domains[:4]) + '\n' + domains[4][:3])
+
+            resumed = Analyzer(crawler_metadata_filepath=metadata_filepath)
+            resumed.run(resume=True)
+            resumed.write_results_to_file()
+            self.assertEqual(resumed.number_of_processed_domains, len(domains))
+            self.assertCountEqual(self._result_rows(resumed), self._result_rows(complete))
+            with open(os.path.join(output_dir, 'analyzer-results.csv')) as results_file:
+                self.assertEqual(len(list(csv.DictReader(results_file))), len(complete.results))
+
+    def test_merged_shards_equal_unsharded_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_dir = os.path.join(tmp_dir, 'output')
+            shutil.copytree(os.path.dirname(self.metadata_filepath), output_dir)
+            metadata_filepath = os.path.join(output_dir, 'crawler.json')
+
+            complete = Analyzer(crawler_metadata_filepath=metadata_filepath, write_results=False)
+            complete.run()
+            for i in range(1, 4):
+                shard = Analyzer(crawler_metadata_filepath=metadata_filepath, shard=Shard(i, 3))
+                shard.run()
+                shard.write_results_to_file()
+                self.assertTrue(os.path.isfile(os.path.join(output_dir, f'analyzer-results.shard-{i}-of-3.csv')))
+
+            merged = Analyzer(crawler_metadata_filepath=metadata_filepath)
+            merged.merge_shard_results()
+            self.assertEqual(merged.number_of_processed_domains, len(complete.crawler_meta_data))
+            self.assertCountEqual(self._result_rows(merged), self._result_rows(complete))
+            with open(os.path.join(output_dir, 'analyzer-results.csv')) as results_file:
+                self.assertEqual(len(list(csv.DictReader(results_file))), len(complete.results))
+
+    def test_results_database_has_results_of_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_dir = os.path.join(tmp_dir, 'output')
+            shutil.copytree(os.path.dirname(self.metadata_filepath), output_dir)
+            metadata_filepath = os.path.join(output_dir, 'crawler.json')
+            results_database = ResultsDatabase(os.path.join(tmp_dir, 'results.sqlite'))
+
+            for _ in range(2):
+                analyzer = Analyzer(crawler_metadata_filepath=metadata_filepath, results_database=results_database)
+                analyzer.run()
+                analyzer.write_results_to_file()
+                run_id = results_database.run_id
+                results_database.finish_run()
+
+            self.assertEqual(results_database.latest_run_id(), run_id)
+            self.assertCountEqual(self._result_rows(analyzer), [
+                (r.domain, r.identifier, r.passed, r.severity, r.description) for r in results_database.results()
+            ])
+            identifier = 'privacy-statement-missing'
+            failed = results_database.results(identifier=identifier, passed=CheckResult.PassType.FAILED)
+            self.assertCountEqual([r.domain for r in failed], [r.domain for r in analyzer.failed_checks(identifier)])
+            domain = analyzer.results[0].domain
+            self.assertEqual(len(results_database.results(domain=domain)), len(analyzer.checks))
+            number_of_rows = results_database.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            self.assertEqual(number_of_rows, 2 * len(analyzer.results))
+            results_database.close()
+
+    def test_result_cache_reuses_results_of_unchanged_pages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache.sqlite')
+            first = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                             result_cache=ResultCache(cache_path))
+            first.run()
+            # Domains with identical pages already share results; results settled by preconditions skip the cache
+            number_of_cached_results = len(first.results) - first.domain_checker.number_of_settled_results
+            self.assertEqual(first.result_cache.hits + first.result_cache.misses, number_of_cached_results)
+
+            second = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                              result_cache=ResultCache(cache_path))
+            second.run()
+            self.assertEqual(second.result_cache.misses, 0)
+            self.assertEqual(second.result_cache.hits, number_of_cached_results)
+            self.assertEqual(self._result_rows(first), self._result_rows(second))
+            first.result_cache.close()
+            second.result_cache.close()
+
+    def test_workers_close_result_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache.sqlite')
+            worker = multiprocessing.Process(target=_put_into_result_cache_of_worker,
+                                             args=(self.metadata_filepath, cache_path))
+            worker.start()
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+            # The result was never committed by the worker itself, only by closing the cache at its exit
+            result_cache = ResultCache(cache_path)
+            self.assertEqual(result_cache.get(b'key'), ('passed', 'description'))
+            result_cache.close()
+
+    def test_result_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result_cache = ResultCache(os.path.join(tmp_dir, 'cache.sqlite'), max_entries=10)
+            analyzer = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                                result_cache=result_cache)
+            analyzer.run()
+            number_of_entries = result_cache.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            self.assertEqual(number_of_entries, 10)
+            result_cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
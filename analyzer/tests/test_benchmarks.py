@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from analyzer.analyze import Analyzer
+from analyzer.benchmarks.generator import CrawlOutputGenerator
+from analyzer.benchmarks.runner import compare_to_baseline, load_baseline, run_benchmark, store_baseline
+
+
+class CrawlOutputGeneratorTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _generate(self, name: str, seed: int = 42) -> str:
+        output_dir = os.path.join(self.tmp_dir.name, name)
+        os.makedirs(output_dir)
+        CrawlOutputGenerator(output_dir, 20, seed=seed).generate()
+        return output_dir
+
+    @staticmethod
+    def _files(output_dir: str):
+        files = dict()
+        for directory, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                with open(path, 'rb') as file:
+                    files[os.path.relpath(path, output_dir)] = file.read()
+        return files
+
+    def test_output_is_deterministic(self):
+        first = self._files(self._generate('first'))
+        self.assertEqual(self._files(self._generate('second')), first)
+        self.assertNotEqual(self._files(self._generate('other-seed', seed=7)), first)
+
+    def test_benchmark_of_generated_crawl(self):
+        meta_data_path = os.path.join(self._generate('crawl'), 'crawler.json')
+        report = run_benchmark(meta_data_path)
+        self.assertEqual(report['domains'], 20)
+        self.assertEqual(set(report['check_seconds']), {check.IDENTIFIER for check in Analyzer.checks})
+        self.assertGreater(report['domains_per_second'], 0)
+
+        baseline_path = os.path.join(self.tmp_dir.name, 'baseline.json')
+        store_baseline(report, baseline_path)
+        self.assertEqual(load_baseline(baseline_path), report)
+        self.assertEqual(compare_to_baseline(report, load_baseline(baseline_path)), [])
+
+
+class CompareToBaselineTestCase(unittest.TestCase):
+
+    baseline = {
+        'domains': 100,
+        'domains_per_second': 50.0,
+        'peak_rss_mb': 100.0,
+        'check_seconds': {'privacy-statement-missing': 1.0, 'privacy-missing-complaint': 2.0},
+    }
+
+    def _report(self, **changes):
+        report = dict(self.baseline, check_seconds=dict(self.baseline['check_seconds']))
+        report.update(changes)
+        return report
+
+    def test_changes_within_tolerance(self):
+        report = self._report(domains_per_second=41.0, peak_rss_mb=119.0)
+        self.assertEqual(compare_to_baseline(report, self.baseline), [])
+
+    def test_regressions(self):
+        report = self._report(domains_per_second=39.0, peak_rss_mb=121.0)
+        report['check_seconds']['privacy-missing-complaint'] = 2.5
+        regressions = compare_to_baseline(report, self.baseline)
+        self.assertEqual(len(regressions), 3)
+        self.assertIn('domains/sec dropped from 50.0 to 39.0', regressions)
+        self.assertIn('peak RSS grew from 100.0 MB to 121.0 MB', regressions)
+        self.assertIn('privacy-missing-complaint got slower from 20.000 ms to 25.000 ms per domain', regressions)
+
+    def test_check_seconds_are_compared_per_domain(self):
+        # Twice the domains in twice the time is no regression
+        report = self._report(domains=200, check_seconds={'privacy-statement-missing': 2.0,
+                                                          'privacy-missing-complaint': 4.0})
+        self.assertEqual(compare_to_baseline(report, self.baseline), [])
+        report['check_seconds']['privacy-statement-missing'] = 3.0
+        self.assertEqual(len(compare_to_baseline(report, self.baseline)), 1)
+
+    def test_checks_missing_from_baseline_are_skipped(self):
+        report = self._report()
+        report['check_seconds']['privacy-missing-revocation'] = 10.0
+        self.assertEqual(compare_to_baseline(report, self.baseline), [])
+        self.assertEqual(compare_to_baseline(report, self._report(check_seconds={})), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
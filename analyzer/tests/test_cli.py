@@ -0,0 +1,69 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from analyzer.cli import cli
+
+
+class CliTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp_dir.name, 'output')
+        shutil.copytree(os.path.join(tests_dir, 'test-output'), self.output_dir)
+        self.metadata_filepath = os.path.join(self.output_dir, 'crawler.json')
+        self.runner = CliRunner()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _invoke(self, *args):
+        result = self.runner.invoke(cli, list(args), catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result
+
+    def _number_of_results(self, filename: str) -> int:
+        with open(os.path.join(self.output_dir, filename), encoding='utf-8') as results_file:
+            return len(list(csv.DictReader(results_file)))
+
+    def test_analyze_shards_and_merge(self):
+        self._invoke('analyze', '--crawler-json', self.metadata_filepath, '--no-cache')
+        number_of_results = self._number_of_results('analyzer-results.csv')
+        os.remove(os.path.join(self.output_dir, 'analyzer-results.csv'))
+
+        for i in range(1, 3):
+            self._invoke('analyze', '--crawler-json', self.metadata_filepath, '--no-cache', '--shard', f'{i}/2')
+        self._invoke('merge', '--crawler-json', self.metadata_filepath)
+        self.assertEqual(self._number_of_results('analyzer-results.csv'), number_of_results)
+
+    def test_analyze_grouped_meta(self):
+        self._invoke('analyze', '--crawler-json', self.metadata_filepath, '--no-cache')
+        number_of_results = self._number_of_results('analyzer-results.csv')
+        self._invoke('analyze', '--crawler-json', self.metadata_filepath, '--no-cache', '--grouped-meta')
+        self.assertEqual(self._number_of_results('analyzer-results.csv'), number_of_results)
+
+    def test_merge_without_shard_results_fails(self):
+        result = self.runner.invoke(cli, ['merge', '--crawler-json', self.metadata_filepath])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIsInstance(result.exception, SystemExit)
+
+    def test_analyze_sample(self):
+        self._invoke('analyze', '--crawler-json', self.metadata_filepath, '--no-cache', '--sample', '3')
+        self.assertTrue(os.path.isfile(os.path.join(self.output_dir, 'analyzer-results.sample.csv')))
+
+    def test_diff_of_file_without_results_columns_fails(self):
+        not_results = os.path.join(self.output_dir, 'not-results.csv')
+        with open(not_results, 'w', encoding='utf-8') as not_results_file:
+            not_results_file.write('domain,result\na.de,passed\n')
+        result = self.runner.invoke(cli, ['diff', not_results, not_results])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn(f'{not_results} is missing the column(s) originalDomain, testIdentifier, passType', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
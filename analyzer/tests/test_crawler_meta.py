@@ -0,0 +1,230 @@
+import json
+import os
+import tempfile
+import unittest
+
+from analyzer.crawler_meta import CrawlerMetaFollower, CrawlerMetaReader
+from analyzer.types_definitions import CrawlerMetaData
+
+
+class CrawlerMetaReaderTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.metadata_filepath = os.path.join(tests_dir, 'test-output/crawler.json')
+        with open(self.metadata_filepath) as meta_file:
+            self.pages = json.load(meta_file)['crawledPages']
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _expected_domains(self, pages=None):
+        grouped_by_domain = dict()
+        for page in pages or self.pages:
+            grouped_by_domain.setdefault(page['originalDomain'], dict()).setdefault(page['pageType'], []).append(page)
+        return grouped_by_domain
+
+    def test_streams_contiguous_domains(self):
+        # A small chunk size makes sure entries spanning multiple chunks are decoded correctly
+        reader = CrawlerMetaReader(self.metadata_filepath, chunk_size=64)
+        self.assertTrue(reader.is_contiguous)
+        self.assertEqual(reader.number_of_domains, len(self._expected_domains()))
+        self.assertEqual(list(reader.iter_pages()), self.pages)
+        self.assertEqual(dict(reader.iter_domains()), self._expected_domains())
+
+    def test_json_lines(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        with open(path, 'w') as meta_file:
+            meta_file.writelines(json.dumps(page) + '\n' for page in self.pages)
+        reader = CrawlerMetaReader(path)
+        self.assertTrue(reader.is_json_lines)
+        self.assertEqual(reader.load(), self._expected_domains())
+
+    def test_non_contiguous_domains_are_grouped(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        pages = self.pages[::2] + self.pages[1::2]
+        with open(path, 'w') as meta_file:
+            json.dump({'crawledPages': pages}, meta_file)
+        reader = CrawlerMetaReader(path, pages_per_partition=5)
+        self.assertFalse(reader.is_contiguous)
+        domains = list(reader.iter_domains())
+        self.assertEqual(len(domains), reader.number_of_domains)
+        self.assertEqual(dict(domains), self._expected_domains(pages))
+
+    def test_domains_are_streamed_without_scan(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        pages = self.pages[::2] + self.pages[1::2]
+        with open(path, 'w') as meta_file:
+            json.dump({'crawledPages': pages}, meta_file)
+        reader = CrawlerMetaReader(path)
+        domains = reader.iter_domains()
+        first_domain = next(domains)
+        self.assertIsNone(reader._scan)
+        self.assertEqual(dict([first_domain, *domains]), self._expected_domains(pages))
+        self.assertEqual(reader.number_of_domains, len(self._expected_domains()))
+        self.assertEqual(reader.number_of_pages, len(self.pages))
+        self.assertFalse(reader.is_contiguous)
+
+    def test_domains_repeating_after_the_window_are_grouped_in_partitions(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        pages = [{'originalDomain': domain, 'pageType': 'index', 'htmlFilePath': f'{domain}/{n}.html'}
+                 for domain, n in [('a.de', 1), ('b.de', 1), ('c.de', 1), ('d.de', 1), ('a.de', 2), ('e.de', 1),
+                                   ('d.de', 2), ('f.de', 1), ('e.de', 2)]]
+        with open(path, 'w') as meta_file:
+            json.dump({'crawledPages': pages}, meta_file)
+        reader = CrawlerMetaReader(path, pages_per_partition=2, window=2)
+        with self.assertLogs('analyzer.crawler_meta', 'WARNING') as logs:
+            domains = list(reader.iter_domains())
+        self.assertIn('a.de has pages after more than 2 pages of other domains', logs.output[0])
+        self.assertEqual([domain for domain, _ in domains[:2]], ['a.de', 'b.de'])
+        expected = self._expected_domains(pages[:4] + pages[5:])
+        self.assertEqual(dict(domains), expected)
+        self.assertEqual(len(domains), len(expected))
+
+    def test_grouped_domains_are_streamed_without_scan(self):
+        reader = CrawlerMetaReader(self.metadata_filepath, grouped=True)
+        domains = reader.iter_domains()
+        first_domain = next(domains)
+        self.assertIsNone(reader._scan)
+        self.assertEqual(dict([first_domain, *domains]), self._expected_domains())
+        # Counted while streaming
+        self.assertEqual(reader.number_of_domains, len(self._expected_domains()))
+        self.assertEqual(reader.number_of_pages, len(self.pages))
+
+    def test_grouped_domains_which_are_not_contiguous_are_rejected(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        with open(path, 'w') as meta_file:
+            json.dump({'crawledPages': self.pages[::2] + self.pages[1::2]}, meta_file)
+        with self.assertRaisesRegex(ValueError, 'are not stored next to each other'):
+            list(CrawlerMetaReader(path, grouped=True).iter_domains())
+
+
+class CrawlerMetaDataTestCase(unittest.TestCase):
+    setUp = CrawlerMetaReaderTestCase.setUp
+    tearDown = CrawlerMetaReaderTestCase.tearDown
+    _expected_domains = CrawlerMetaReaderTestCase._expected_domains
+
+    def test_same_pages_as_read(self):
+        expected = self._expected_domains()
+        meta_data = CrawlerMetaReader(self.metadata_filepath).load()
+        self.assertIsInstance(meta_data, CrawlerMetaData)
+        self.assertEqual(len(meta_data), len(expected))
+        self.assertEqual(meta_data.number_of_pages, len(self.pages))
+        self.assertEqual(list(meta_data), list(expected))
+        for domain, page_types in expected.items():
+            self.assertIn(domain, meta_data)
+            self.assertEqual(meta_data[domain], page_types)
+            self.assertEqual(list(meta_data[domain]), list(page_types))
+        self.assertIsNone(meta_data.get('unknown.de'))
+        with self.assertRaises(KeyError):
+            meta_data['unknown.de']
+
+    def test_pages_with_other_fields_are_kept(self):
+        pages = [
+            {'originalDomain': 'a.de', 'pageType': 'index', 'htmlFilePath': 'a.de/index/index.html'},
+            {'originalDomain': 'a.de', 'actualDomain': 'www.a.de', 'pageType': 'privacy', 'url': 'https://www.a.de/ds',
+             'htmlFilePath': 'a.de/privacy/index.html', 'statusCode': 200},
+            {'originalDomain': 'b.de', 'actualDomain': 'b.de', 'pageType': None, 'url': 'https://b.de/',
+             'htmlFilePath': 'b.de/index/index.html'},
+        ]
+        expected = self._expected_domains(pages)
+        self.assertEqual(CrawlerMetaData(expected.items()), expected)
+
+
+class CrawlerMetaFollowerTestCase(unittest.TestCase):
+    setUp = CrawlerMetaReaderTestCase.setUp
+    tearDown = CrawlerMetaReaderTestCase.tearDown
+    _expected_domains = CrawlerMetaReaderTestCase._expected_domains
+
+    def _follow(self, path, write_next, **kwargs):
+        """Follows `path` with a simulated clock, `write_next` is called instead of sleeping between polls.
+        """
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+            write_next()
+
+        follower = CrawlerMetaFollower(path, clock=lambda: clock[0], sleep=sleep, poll_interval=1, **kwargs)
+        return follower, follower.iter_domains()
+
+    def test_follows_json_lines_feed(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.jsonl')
+        lines = [json.dumps(page) + '\n' for page in self.pages] + ['{"crawlComplete": true}\n']
+        written = []
+
+        def write_next():
+            if len(written) < len(lines):
+                with open(path, 'a') as meta_file:
+                    # Lines are written in two parts, the reader must only take complete ones
+                    line = lines[len(written)]
+                    meta_file.write(line[:10])
+                    meta_file.flush()
+                    meta_file.write(line[10:])
+                written.append(line)
+
+        follower, domains = self._follow(path, write_next, quiet_period=3)
+        first_domain, _ = next(domains)
+        # The first domain is analyzed while the crawl is still running
+        self.assertLess(len(written), len(lines))
+        self.assertEqual(first_domain, self.pages[0]['originalDomain'])
+        followed = dict([(first_domain, _)] + list(domains))
+        self.assertTrue(follower.crawl_complete)
+        self.assertEqual(followed, self._expected_domains())
+
+    def test_malformed_lines_of_feed_are_skipped(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.jsonl')
+        with open(path, 'w') as meta_file:
+            meta_file.write(json.dumps(self.pages[0]) + '\n{"originalDomain": \n')
+            for page in self.pages[1:]:
+                meta_file.write(json.dumps(page) + '\n')
+            meta_file.write('{"crawlComplete": true}\n')
+
+        follower, domains = self._follow(path, lambda: None, quiet_period=3)
+        with self.assertLogs('analyzer.crawler_meta', level='WARNING') as logs:
+            followed = dict(domains)
+        self.assertIn(f'offset {len(json.dumps(self.pages[0])) + 1}', logs.output[0])
+        self.assertTrue(follower.crawl_complete)
+        self.assertEqual(followed, self._expected_domains())
+
+    def test_follows_rewritten_crawler_json_until_idle(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        number_of_written_pages = [0]
+
+        def write_next():
+            # The crawler rewrites the whole file after every page
+            number_of_written_pages[0] = min(number_of_written_pages[0] + 1, len(self.pages))
+            with open(path, 'w') as meta_file:
+                json.dump({'crawledPages': self.pages[:number_of_written_pages[0]]}, meta_file, indent=2)
+
+        follower, domains = self._follow(path, write_next, quiet_period=100, idle_timeout=5)
+        followed = list(domains)
+        self.assertFalse(follower.crawl_complete)
+        self.assertEqual(dict(followed), self._expected_domains())
+        self.assertEqual([domain for domain, _ in followed], list(self._expected_domains()))
+
+    def test_only_pages_appended_to_crawler_json_are_decoded(self):
+        path = os.path.join(self.tmp_dir.name, 'crawler.json')
+        follower = CrawlerMetaFollower(path)
+        content = json.dumps({'crawledPages': self.pages[:3]}, indent=2)
+        with open(path, 'w') as meta_file:
+            meta_file.write(content)
+        self.assertEqual(follower._read_new_records(), self.pages[:3])
+
+        # The crawler is still writing the next page
+        rewritten = json.dumps({'crawledPages': self.pages[:5]}, indent=2)
+        with open(path, 'w') as meta_file:
+            meta_file.write(rewritten[:len(content) + 20])
+        self.assertEqual(follower._read_new_records(), [])
+
+        # Pages before the offset are not decoded again, even if they were garbled
+        prefix_length = rewritten.index(json.dumps(self.pages[3], indent=2).splitlines()[0], len(content) - 10)
+        with open(path, 'w') as meta_file:
+            meta_file.write(' ' * prefix_length + rewritten[prefix_length:])
+        self.assertEqual(follower._read_new_records(), self.pages[3:5])
+        self.assertEqual(follower._read_new_records(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.facts import DomainFacts
+from analyzer.checks.html_parsers import StreamingHtmlParser
+from analyzer.checks.metrics import privacy_missing_paragraph, privacy_missing_third_party
+from analyzer.analyze import Analyzer
+from analyzer.checks.page_cache import PARSE_CHUNK_SIZE, PageCache, ParsedPage
+from analyzer.checks.phrase_matcher import PhraseMatcher
+from analyzer.checks.metrics.privacy_statement_missing import PrivacyStatementMissingCheck
+from analyzer.domain_checker import DomainChecker
+from analyzer.profiler import Profiler
+from analyzer.tests.test_metric_checks import BaseMetricCheckTestCase
+
+
+class SlowCheck(PrivacyStatementMissingCheck):
+    IDENTIFIER = 'slow-check'
+
+    def check(self) -> CheckResult:
+        time.sleep(5)
+        return super().check()
+
+
+class EndlessParseCheck(PrivacyStatementMissingCheck):
+    IDENTIFIER = 'endless-parse-check'
+
+    def check(self) -> CheckResult:
+        page = ParsedPage.from_html('<p>' + 'a long paragraph ' * 100000 + '</p>')
+        start = time.monotonic()
+        while time.monotonic() - start < 5:
+            StreamingHtmlParser().extract(page)
+        return super().check()
+
+
+class ParsedPagesProbe(PrivacyStatementMissingCheck):
+    """Runs after the other checks and records which privacy pages they parsed completely.
+    """
+    IDENTIFIER = 'parsed-pages-probe'
+    completely_parsed = None
+
+    def check(self) -> CheckResult:
+        ParsedPagesProbe.completely_parsed = ['extracted' in page.__dict__ for page in self.get_pages_of('privacy')]
+        return super().check()
+
+
+class DomainCheckerTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_settled_preconditions_read_no_html(self):
+        profiler = Profiler()
+        domain_checker = DomainChecker(privacy_missing_paragraph.ALL_METRICS, self.metadata_filepath,
+                                       profiler=profiler)
+        results = domain_checker.check_domain('hohenbogen.de', self.metadata.get('hohenbogen.de'))
+        self.assertEqual(len(results), len(privacy_missing_paragraph.ALL_METRICS))
+        for result in results:
+            self.assertEqual(result.passed, CheckResult.PassType.PRECONDITION_FAILED)
+        self.assertEqual(domain_checker.number_of_settled_results, len(results))
+        self.assertEqual(profiler.bytes_read, 0)
+        self.assertEqual(profiler.pages_parsed, 0)
+
+    def test_settled_results_equal_results_of_checks(self):
+        domain_checker = DomainChecker(privacy_missing_paragraph.ALL_METRICS, self.metadata_filepath)
+        for domain, page_types in self.metadata.items():
+            planned = domain_checker.check_domain(domain, page_types)
+            checked = [check_class(domain, page_types, self.metadata_filepath).check()
+                       for check_class in privacy_missing_paragraph.ALL_METRICS]
+            self.assertEqual([r.to_tuple() for r in planned], [r.to_tuple() for r in checked])
+
+    def _domain_with_privacy_page(self):
+        return next((domain, page_types) for domain, page_types in self.metadata.items() if 'privacy' in page_types)
+
+    def test_phrases_are_only_searched_for_checks_which_run(self):
+        checks = privacy_missing_paragraph.ALL_METRICS + privacy_missing_third_party.ALL_METRICS
+        domain = 'kristalltherme-altenau.de'
+        page_types = self.metadata.get(domain)
+        facts = DomainFacts(page_types, PageCache(self.metadata_filepath, page_types), PhraseMatcher.for_checks(checks),
+                            checks=checks)
+        # Of the third parties only Google Analytics is used
+        self.assertIn('privacy-missing-thirdparty-googleanalytics', facts.phrase_keys)
+        self.assertNotIn('privacy-missing-thirdparty-matomo', facts.phrase_keys)
+        self.assertIn('privacy-missing-revocation', facts.phrase_keys)
+        self.assertLessEqual(facts.privacy_phrase_matches, facts.phrase_keys)
+
+    def test_checks_parse_policy_mentioning_everything_at_its_top_only_partially(self):
+        policy = ('<html><head><title>Datenschutzerklärung</title></head><body><h1>Datenschutz</h1>'
+                  '<p>Auskunft, Berichtigung, Löschung, Widerruf, Widerspruch, Datenübertragbarkeit, Beschwerde und '
+                  'Übermittlung in Drittstaaten. Google Analytics mit anonymizeIp.</p>'
+                  '<p>Unser Datenschutzbeauftragter: E-Mail datenschutz@example.de, Telefon 0123 456789</p>'
+                  + '<p>Weitere Hinweise zur Verarbeitung Ihrer Daten.</p>\n' * 10000 + '</body></html>')
+        index = "<html><head><script>ga('create', 'UA-1-1', 'auto');ga('set', 'anonymizeIp', true);" \
+                "ga('send', 'pageview');</script></head><body>Start</body></html>"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pages = list()
+            for page_type, html in (('index', index), ('privacy', policy)):
+                html_file_path = os.path.join('example.de', page_type, 'index.html')
+                os.makedirs(os.path.join(tmp_dir, os.path.dirname(html_file_path)))
+                with open(os.path.join(tmp_dir, html_file_path), 'w', encoding='utf-8') as html_file:
+                    html_file.write(html)
+                pages.append({'originalDomain': 'example.de', 'pageType': page_type, 'htmlFilePath': html_file_path})
+            metadata_filepath = os.path.join(tmp_dir, 'crawler.json')
+            with open(metadata_filepath, 'w', encoding='utf-8') as meta_file:
+                json.dump({'crawledPages': pages}, meta_file)
+            self.assertGreater(len(policy), 2 * PARSE_CHUNK_SIZE)
+
+            domain_checker = DomainChecker(Analyzer.checks + [ParsedPagesProbe], metadata_filepath,
+                                           html_parser='stream')
+            results = domain_checker.check_domain('example.de', {page['pageType']: [page] for page in pages})
+        for result in results:
+            self.assertIn(result.passed, (CheckResult.PassType.PASSED, CheckResult.PassType.NOT_APPLICABLE),
+                          result.identifier)
+        self.assertEqual(ParsedPagesProbe.completely_parsed, [False])
+
+    def test_check_exceeding_its_time_budget_is_uncertain(self):
+        domain_checker = DomainChecker([SlowCheck, PrivacyStatementMissingCheck], self.metadata_filepath,
+                                       check_time_budget=0.2)
+        start = time.monotonic()
+        slow, regular = domain_checker.check_domain(*self._domain_with_privacy_page())
+        self.assertLess(time.monotonic() - start, 4)
+        self.assertEqual(slow.passed, CheckResult.PassType.UNCERTAIN)
+        self.assertEqual(slow.description, 'The check ran out of its time budget of 0.2 seconds')
+        self.assertEqual(regular.passed, CheckResult.PassType.PASSED)
+
+    def test_time_budget_is_enforced_outside_of_the_main_thread(self):
+        domain_checker = DomainChecker([EndlessParseCheck, PrivacyStatementMissingCheck], self.metadata_filepath,
+                                       html_parser='stream', check_time_budget=0.2)
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(
+            domain_checker.check_domain(*self._domain_with_privacy_page())))
+        start = time.monotonic()
+        thread.start()
+        thread.join()
+        self.assertLess(time.monotonic() - start, 4)
+        endless, regular = results
+        self.assertEqual(endless.passed, CheckResult.PassType.UNCERTAIN)
+        self.assertEqual(regular.passed, CheckResult.PassType.PASSED)
+
+    def test_checks_after_domain_time_budget_are_skipped(self):
+        domain_checker = DomainChecker([SlowCheck, SlowCheck], self.metadata_filepath, domain_time_budget=0.2)
+        first, second = domain_checker.check_domain(*self._domain_with_privacy_page())
+        self.assertEqual(first.passed, CheckResult.PassType.UNCERTAIN)
+        self.assertEqual(second.passed, CheckResult.PassType.UNCERTAIN)
+        self.assertIn('checks of the domain exceeded their time budget', second.description)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import glob
+import os
+import time
+import unittest
+
+from analyzer.analyze import Analyzer
+from analyzer.checks.html_parsers import BeautifulSoupHtmlParser, IncrementalExtraction, StreamingHtmlParser, \
+    shrink_html
+from analyzer.checks.page_cache import PARSE_CHUNK_SIZE, ParsedPage
+from analyzer.checks.phrase_matcher import PhraseMatcher
+from analyzer.time_budget import TimeBudgetExceeded, time_budget
+
+
+class StreamingHtmlParserEquivalenceTestCase(unittest.TestCase):
+    """The streaming parser has to produce the same text and verdicts as BeautifulSoup for all test pages.
+    """
+
+    def setUp(self) -> None:
+        self.tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.metadata_filepath = os.path.join(self.tests_dir, 'test-output/crawler.json')
+
+    def test_same_text_as_beautiful_soup(self):
+        html_paths = glob.glob(os.path.join(self.tests_dir, 'test-output', '*', '*', '*.html'))
+        self.assertTrue(html_paths)
+        for html_path in html_paths:
+            with self.subTest(html_path=html_path):
+                expected = ParsedPage(path=html_path, html_parser=BeautifulSoupHtmlParser()).extracted
+                actual = ParsedPage(path=html_path, html_parser=StreamingHtmlParser()).extracted
+                self.assertEqual(actual.strings, expected.strings)
+                self.assertEqual(actual.body_text, expected.body_text)
+                self.assertEqual(actual.titles, expected.titles)
+                self.assertEqual(actual.script_srcs, expected.script_srcs)
+
+    def test_same_verdicts_as_beautiful_soup(self):
+        verdicts = dict()
+        for html_parser in [BeautifulSoupHtmlParser.NAME, StreamingHtmlParser.NAME]:
+            analyzer = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False,
+                                html_parser=html_parser)
+            analyzer.run()
+            verdicts[html_parser] = [(r.domain, r.identifier, r.passed, r.description) for r in analyzer.results]
+        self.assertEqual(verdicts[StreamingHtmlParser.NAME], verdicts[BeautifulSoupHtmlParser.NAME])
+
+
+class IncrementalExtractionTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tests_dir = os.path.dirname(os.path.realpath(__file__))
+        # Privacy policy which mentions everything near its top
+        self.html = ('<html><head><title>Datenschutz</title></head><body><h1>Datenschutzerklärung</h1>'
+                     '<p>Sie haben ein Recht auf Auskunft und Löschung.</p>'
+                     + '<p>Weitere Hinweise zur Verarbeitung Ihrer Daten.</p>\n' * 10000 + '</body></html>')
+        self.matcher = PhraseMatcher({'request': ['Auskunft'], 'deletion': ['Löschung'], 'revocation': ['Widerruf']})
+
+    def test_same_text_as_streaming_parser(self):
+        for html_path in glob.glob(os.path.join(self.tests_dir, 'test-output', '*', '*', '*.html')):
+            with self.subTest(html_path=html_path):
+                expected = ParsedPage(path=html_path, html_parser=StreamingHtmlParser()).extracted
+                html = ParsedPage(path=html_path).html
+                extraction = IncrementalExtraction(html[start:start + 1000] for start in range(0, len(html), 1000))
+                body_texts = list()
+                while not extraction.finished:
+                    extraction.advance()
+                    body_parts = extraction.text_so_far().body_parts
+                    body_texts.append(''.join(body_parts) if body_parts is not None else None)
+                self.assertEqual(extraction.finish(), expected)
+                # The body text grows while parsing
+                for body_text in body_texts:
+                    if body_text is not None:
+                        self.assertTrue(expected.body_text.startswith(body_text))
+
+    def test_parsing_stops_once_all_phrases_were_found(self):
+        page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser())
+        self.assertGreater(len(page.raw), 2 * PARSE_CHUNK_SIZE)
+        self.assertEqual(page.phrase_matches(self.matcher, ['request', 'deletion']), {'request', 'deletion'})
+        self.assertNotIn('extracted', page.__dict__)
+        self.assertFalse(page._extraction.finished)
+        # Further use of the page continues parsing where it stopped
+        self.assertEqual(page.phrase_matches(self.matcher), {'request', 'deletion'})
+        self.assertEqual(page.extracted, ParsedPage.from_html(self.html, StreamingHtmlParser()).extracted)
+
+    def test_head_titles_are_known_after_the_first_chunk(self):
+        page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser())
+        self.assertEqual(page.head_titles, ['Datenschutz'])
+        self.assertNotIn('extracted', page.__dict__)
+        self.assertEqual(page.head_titles, page.titles)
+
+    def test_steps_of_completely_parsed_page(self):
+        page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser())
+        # Revocation is not mentioned, so the whole page is parsed
+        self.assertEqual(page.phrase_matches(self.matcher), {'request', 'deletion'})
+        steps = list(page.parse_steps())
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(''.join(steps[0].body_parts), page.body_text)
+
+    def test_interrupted_parse_starts_anew(self):
+        class InterruptedPage(ParsedPage):
+            interrupted = False
+
+            def _html_chunks(self):
+                for number, chunk in enumerate(super()._html_chunks()):
+                    if number == 2 and not self.interrupted:
+                        self.interrupted = True
+                        raise TimeBudgetExceeded()
+                    yield chunk
+
+        page = InterruptedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser())
+        with self.assertRaises(TimeBudgetExceeded):
+            page.phrase_matches(self.matcher)
+        self.assertNotIn('_extraction', page.__dict__)
+        self.assertEqual(page.phrase_matches(self.matcher), {'request', 'deletion'})
+        self.assertEqual(page.extracted, ParsedPage.from_html(self.html, StreamingHtmlParser()).extracted)
+
+    def test_parse_interrupted_within_a_chunk_starts_anew(self):
+        expected = ParsedPage.from_html(self.html, StreamingHtmlParser()).extracted
+        for budget in (0.001, 0.005, 0.02):
+            with self.subTest(budget=budget):
+                page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser())
+                try:
+                    with time_budget(budget):
+                        page.phrase_matches(self.matcher)
+                except TimeBudgetExceeded:
+                    pass
+                self.assertEqual(page.extracted, expected)
+
+    def test_whole_page_is_parsed_without_incremental_parser(self):
+        page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=BeautifulSoupHtmlParser())
+        self.assertEqual(page.phrase_matches(self.matcher, ['request']), {'request'})
+        self.assertIn('soup', page.__dict__)
+
+
+class ShrinkHtmlTestCase(unittest.TestCase):
+    html = ('<html><head><style>body { background: url("data:image/png;base64,AAAA"); }</style></head>'
+            '<body><img src="data:image/png;base64,BBBBBBBBBBBBBBBB"><script>var x = 1;</script>'
+            '<p>Datenschutzerklärung</p></body></html>')
+
+    def test_short_html_is_unchanged(self):
+        self.assertEqual(shrink_html(self.html, len(self.html)), self.html)
+
+    def test_data_uris_are_dropped_first(self):
+        shrunk = shrink_html(self.html, len(self.html) - 1)
+        self.assertNotIn('BBBB', shrunk)
+        self.assertIn('var x = 1;', shrunk)
+        self.assertIn('<p>Datenschutzerklärung</p>', shrunk)
+
+    def test_scripts_and_styles_are_dropped_before_cutting(self):
+        shrunk = shrink_html(self.html, 120)
+        self.assertNotIn('var x', shrunk)
+        self.assertNotIn('background', shrunk)
+        self.assertIn('<p>Datenschutzerklärung</p>', shrunk)
+        self.assertLessEqual(len(shrunk), 120)
+
+    def test_contents_of_all_closed_scripts_and_styles_are_dropped(self):
+        html = '<SCRIPT type="a">one</script ><p>kept</p><style>two</STYLE><script>three</script><p>also kept</p>'
+        self.assertEqual(shrink_html(html, len(html) - 1),
+                         '<SCRIPT type="a"></script ><p>kept</p><style></STYLE><script></script><p>also kept</p>')
+
+    def test_unclosed_scripts_are_kept(self):
+        html = '<script>dropped</script><p>text</p><script>unclosed<p>rest</p><style>not dropped</style>'
+        self.assertEqual(shrink_html(html, len(html) - 1),
+                         '<script></script><p>text</p><script>unclosed<p>rest</p><style>not dropped</style>')
+
+    def test_many_unclosed_scripts_are_shrunk_in_linear_time(self):
+        html = '<p>Datenschutz</p>' + '<script>x' * 200000
+        start = time.monotonic()
+        shrunk = shrink_html(html, 1000)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(shrunk, html[:1000])
+
+    def test_text_of_truncated_page(self):
+        page = ParsedPage(raw=self.html.encode('utf-8'), html_parser=StreamingHtmlParser(), max_bytes=120)
+        self.assertIn('Datenschutzerklärung', page.extracted.body_text)
+        self.assertTrue(page.truncated)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@ from analyzer.checks.metrics.privacy_missing_paragraph import ProtectionOfficerM
     GDPRInformationRequestMissingCheck, GDPRInformationDeletionMissingCheck, GDPRRevocationMissingCheck, \
     GDPRObjectMissingCheck, GDPRComplaintMissingCheck, GDPRPortabilityMissingCheck, GDPRNonEuTransmissionMissingCheck
 from analyzer.checks.metrics.privacy_missing_third_party import PrivacyMissingGoogleAnalyticsCheck, \
-    PrivacyMissingTwitterCheck, PrivacyMissingMatomoCheck, PrivacyMissingHubspotCheck, PrivacyMissingFacebookPixelCheck
+    PrivacyMissingTwitterCheck, PrivacyMissingMatomoCheck, PrivacyMissingHubspotCheck, PrivacyMissingFacebookPixelCheck, \
+    PrivacyMissingAdSenseCheck, PrivacyMissingDisqusCheck, PrivacyMissingInstagramCheck, PrivacyMissingIntercomCheck
 from analyzer.checks.metrics.privacy_statement_missing import PrivacyStatementMissingCheck
 from analyzer.checks.metrics.tracking_service_ip_not_anonymized import GoogleAnalyticsIPNotAnonymizedCheck
 
@@ -18,7 +19,8 @@ class BaseMetricCheckTestCase:
         tests_dir = os.path.dirname(os.path.realpath(__file__))
         # Analyzer is only used for getting the meta data in the correct format.
         # Afterwards we're calling the check classes directly
-        analyzer = Analyzer(crawler_metadata_filepath=os.path.join(tests_dir, 'test-output/crawler.json'))
+        analyzer = Analyzer(crawler_metadata_filepath=os.path.join(tests_dir, 'test-output/crawler.json'),
+                            write_results=False)
         self.metadata = analyzer.crawler_meta_data
         self.metadata_filepath = analyzer.crawler_metadata_filepath
 
@@ -161,6 +163,66 @@ class PrivacyMissingFacebookMentionTestCase(BaseMetricCheckTestCase, unittest.Te
         self.assertEqual(result.passed, CheckResult.PassType.NOT_APPLICABLE)
 
 
+class PrivacyMissingAdSenseMentionTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_adsense_used_with_mention(self):
+        domain = 'widget-cafe.de'
+        check = PrivacyMissingAdSenseCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.PASSED)
+
+    def test_adsense_not_used(self):
+        domain = 'logbuch-netzpolitik.de'
+        check = PrivacyMissingAdSenseCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.NOT_APPLICABLE)
+
+
+class PrivacyMissingDisqusMentionTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_disqus_used_without_mention(self):
+        domain = 'widget-cafe.de'
+        check = PrivacyMissingDisqusCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.FAILED)
+
+    def test_disqus_not_used(self):
+        domain = 'logbuch-netzpolitik.de'
+        check = PrivacyMissingDisqusCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.NOT_APPLICABLE)
+
+
+class PrivacyMissingInstagramMentionTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_instagram_used_with_mention(self):
+        domain = 'widget-cafe.de'
+        check = PrivacyMissingInstagramCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.PASSED)
+
+    def test_instagram_not_used(self):
+        domain = 'logbuch-netzpolitik.de'
+        check = PrivacyMissingInstagramCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.NOT_APPLICABLE)
+
+
+class PrivacyMissingIntercomMentionTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_intercom_used_without_mention(self):
+        domain = 'widget-cafe.de'
+        check = PrivacyMissingIntercomCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.FAILED)
+
+    def test_intercom_not_used(self):
+        domain = 'logbuch-netzpolitik.de'
+        check = PrivacyMissingIntercomCheck(domain, self.metadata.get(domain), self.metadata_filepath)
+        result = check.check()
+        self.assertEqual(result.passed, CheckResult.PassType.NOT_APPLICABLE)
+
+
 class PrivacyPhrasesMissingTestCase(BaseMetricCheckTestCase, unittest.TestCase):
 
     def test_officer_present_with_email(self):
@@ -0,0 +1,63 @@
+import os
+import unittest
+
+from analyzer.checks import detectors
+from analyzer.checks.metrics.privacy_missing_paragraph import GDPRInformationRequestMissingCheck, \
+    GDPRComplaintMissingCheck
+from analyzer.checks.page_cache import PageCache
+from analyzer.tests.test_metric_checks import BaseMetricCheckTestCase
+
+
+class PageCacheTestCase(BaseMetricCheckTestCase, unittest.TestCase):
+
+    def test_pages_are_shared_across_checks(self):
+        domain = 'heise.de'
+        page_cache = PageCache(self.metadata_filepath, self.metadata.get(domain))
+        first = GDPRInformationRequestMissingCheck(domain, self.metadata.get(domain), self.metadata_filepath,
+                                                   page_cache=page_cache)
+        second = GDPRComplaintMissingCheck(domain, self.metadata.get(domain), self.metadata_filepath,
+                                           page_cache=page_cache)
+        first.check()
+        second.check()
+        page = page_cache.pages_of('privacy')[0]
+        self.assertIs(first.get_pages_of('privacy')[0], page)
+        self.assertIs(second.get_pages_of('privacy')[0], page)
+        self.assertIn('soup', page.__dict__)
+
+    def test_clear_evicts_pages(self):
+        domain = 'heise.de'
+        page_cache = PageCache(self.metadata_filepath, self.metadata.get(domain))
+        page = page_cache.pages_of('privacy')[0]
+        self.assertTrue(os.path.isfile(page.path))
+        page_cache.clear()
+        self.assertIsNot(page_cache.pages_of('privacy')[0], page)
+
+    def test_detectors_match_mapped_bytes_like_decoded_html(self):
+        catalog = [detectors.GOOGLE_ANALYTICS, detectors.GOOGLE_ANALYTICS_ANONYMIZATION, detectors.MATOMO,
+                   detectors.HUBSPOT, detectors.TWITTER, detectors.FACEBOOK]
+        for domain, page_types in self.metadata.items():
+            page_cache = PageCache(self.metadata_filepath, page_types)
+            page = page_cache.pages_of('index')[0]
+            for detector_strings in catalog:
+                self.assertEqual(detectors.page_uses_service(page.mapped, detector_strings),
+                                 detectors.page_uses_service(page.html, detector_strings))
+            page_cache.clear()
+            self.assertNotIn('mapped', page.__dict__)
+
+    def test_catalog_detector_equals_detecting_every_service(self):
+        for domain, page_types in self.metadata.items():
+            page_cache = PageCache(self.metadata_filepath, page_types)
+            page = page_cache.pages_of('index')[0]
+            expected = {name for name, detector_strings in detectors.CATALOG.items()
+                        if detectors.page_uses_service(page.html, detector_strings)}
+            self.assertEqual(page.detected_services, expected)
+            page_cache.clear()
+
+    def test_service_detector_finds_overlapping_and_nested_detector_strings(self):
+        detector = detectors.ServiceDetector({'short': ['abc'], 'long': ['abcdef'], 'overlap': ['cde'], 'none': ['x']})
+        self.assertEqual(detector.detect(b'zzabcdefzz'), {'short', 'long', 'overlap'})
+        self.assertEqual(detector.detect('abcd'), {'short'})
+
+
+if __name__ == '__main__':
+    unittest.main()
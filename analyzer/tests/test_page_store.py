@@ -0,0 +1,81 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from analyzer.analyze import Analyzer
+from analyzer.checks.page_cache import PageCache
+from analyzer.crawler_meta import CrawlerMetaReader
+from analyzer.page_store import DirectoryPageStore, ZipPageStore, open_page_store, pack_pages
+
+
+class PageStoreTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.metadata_filepath = os.path.join(self.tests_dir, 'test-output/crawler.json')
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.pack_path = os.path.join(self.temporary_directory.name, 'pages.zip')
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def _html_paths(self):
+        return sorted({
+            crawled_page['htmlFilePath']
+            for _, page_types in CrawlerMetaReader(self.metadata_filepath).iter_domains()
+            for crawled_pages in page_types.values() for crawled_page in crawled_pages
+        })
+
+    def test_pack_has_same_pages_as_directory(self):
+        number_of_pages, _, _ = pack_pages(self.metadata_filepath, self.pack_path)
+        directory_store = open_page_store(os.path.dirname(self.metadata_filepath))
+        pack_store = open_page_store(self.pack_path)
+        self.assertIsInstance(directory_store, DirectoryPageStore)
+        self.assertIsInstance(pack_store, ZipPageStore)
+        packed = 0
+        for html_path in self._html_paths():
+            if os.path.isfile(directory_store.location(html_path)):
+                self.assertEqual(pack_store.read(html_path), directory_store.read(html_path))
+                packed += 1
+            else:
+                with self.assertRaises(FileNotFoundError):
+                    pack_store.read(html_path)
+        self.assertEqual(packed, number_of_pages)
+        pack_store.close()
+
+    def test_pack_store_can_be_pickled(self):
+        pack_pages(self.metadata_filepath, self.pack_path, compression_level=0)
+        store = ZipPageStore(self.pack_path)
+        html_path = self._html_paths()[0]
+        content = store.read(html_path)
+        unpickled = pickle.loads(pickle.dumps(store))
+        self.assertEqual(unpickled.read(html_path), content)
+        store.close()
+        unpickled.close()
+
+    def test_pages_of_page_cache_are_read_from_store(self):
+        pack_pages(self.metadata_filepath, self.pack_path)
+        page_types = CrawlerMetaReader(self.metadata_filepath).load()['heise.de']
+        page = PageCache(self.metadata_filepath, page_types, page_store=ZipPageStore(self.pack_path)).pages_of('privacy')[0]
+        expected = PageCache(self.metadata_filepath, page_types).pages_of('privacy')[0]
+        self.assertEqual(page.path, os.path.join(self.pack_path, page.html_path))
+        self.assertEqual(page.raw, expected.raw)
+        self.assertEqual(page.content_hash, expected.content_hash)
+
+    def test_same_results_as_directory(self):
+        pack_pages(self.metadata_filepath, self.pack_path)
+        expected = Analyzer(self.metadata_filepath, write_results=False)
+        expected.run()
+        analyzer = Analyzer(self.metadata_filepath, write_results=False, page_store=ZipPageStore(self.pack_path))
+        analyzer.run()
+        self.assertEqual(sorted(result.to_tuple() for result in analyzer.results),
+                         sorted(result.to_tuple() for result in expected.results))
+
+    def test_unknown_store(self):
+        with self.assertRaises(ValueError):
+            open_page_store(self.metadata_filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import gc
+import unittest
+import weakref
+
+from analyzer.analyze import Analyzer
+from analyzer.checks.phrase_matcher import PhraseMatcher
+
+
+class PhraseMatcherTestCase(unittest.TestCase):
+
+    def test_matches_case_insensitive(self):
+        matcher = PhraseMatcher({'complaint': ['Beschwerde'], 'object': ['Widerspruch']})
+        self.assertEqual(matcher.matches('Ihr WIDERSPRUCH ist uns wichtig'), {'object'})
+
+    def test_overlapping_phrases_of_different_keys(self):
+        matcher = PhraseMatcher({
+            'portability': ['Recht auf Datenübertragung'],
+            'non-eu': ['Datenübertragung in Drittstaaten'],
+            'information': ['Art. 15'],
+        })
+        text = 'Das Recht auf Datenübertragung in Drittstaaten regelt Art. 15'
+        self.assertEqual(matcher.matches(text), {'portability', 'non-eu', 'information'})
+
+    def test_phrases_of_different_keys_at_same_position(self):
+        matcher = PhraseMatcher({'short': ['Widerruf'], 'long': ['Widerrufsrecht']})
+        self.assertEqual(matcher.matches('Ihr Widerrufsrecht'), {'short', 'long'})
+
+    def test_restrict_to_keys(self):
+        matcher = PhraseMatcher({'complaint': ['Beschwerde'], 'object': ['Widerspruch']})
+        self.assertEqual(matcher.matches('Beschwerde und Widerspruch', keys=['object', 'unknown']), {'object'})
+
+    def test_patterns_are_compiled_once_per_matcher(self):
+        matcher = PhraseMatcher({'complaint': ['Beschwerde'], 'object': ['Widerspruch']})
+        patterns = dict(matcher._patterns)
+        matcher.matches('Beschwerde und Widerspruch')
+        matcher.matches('Widerspruch', keys=['object'])
+        self.assertEqual(matcher._patterns, patterns)
+        self.assertEqual(set(patterns), {'complaint', 'object'})
+
+        reference = weakref.ref(matcher)
+        del matcher
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_built_from_registered_checks(self):
+        matcher = PhraseMatcher.for_checks(Analyzer.checks)
+        self.assertIn('privacy-missing-complaint', matcher)
+        self.assertIn('privacy-missing-thirdparty-matomo', matcher)
+        self.assertNotIn('ip-not-anonymized-googleanalytics', matcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
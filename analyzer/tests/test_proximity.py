@@ -0,0 +1,56 @@
+import unittest
+
+from analyzer.checks.proximity import ProximityScanner
+
+TERM_CLASSES = (
+    ('officer', ('Datenschutzbeauftragter',)),
+    ('email', ('E-Mail', 'Mail')),
+    ('at', ('@',)),
+)
+
+
+class ProximityIndexTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scanner = ProximityScanner(TERM_CLASSES)
+
+    def test_positions_of_all_occurrences(self):
+        index = self.scanner.index('Datenschutzbeauftragter: E-Mail a@b.de, Datenschutzbeauftragter')
+        self.assertEqual(index['officer'], [0, 40])
+        # Overlapping occurrences are recorded as well
+        self.assertEqual(index['email'], [25, 27])
+        self.assertEqual(index['at'], [33])
+        self.assertEqual(index['unknown'], [])
+
+    def test_near(self):
+        text = 'Datenschutzbeauftragter' + ' ' * 100 + '@' + ' ' * 100 + 'Datenschutzbeauftragter'
+        index = self.scanner.index(text)
+        self.assertEqual(index.near('officer', 'at', before=0, after=150), [0])
+        self.assertEqual(index.near('officer', 'at', before=150, after=0), [224])
+        self.assertEqual(index.near('officer', 'at', before=150, after=150), [0, 224])
+        self.assertEqual(index.near('officer', 'at', before=10, after=10), [])
+        self.assertFalse(index.any_near('officer', ['email'], before=1000, after=1000))
+        self.assertTrue(index.any_near('officer', ['email', 'at'], before=150, after=150))
+
+    def test_later_mention_of_officer_with_contact_details(self):
+        text = 'Datenschutzbeauftragter' + ' ' * 5000 + 'Datenschutzbeauftragter, Mail: dsb@example.com'
+        index = self.scanner.index(text)
+        self.assertEqual(index.near('officer', 'email', before=200, after=1500), [5023])
+
+    def test_growing_index_equals_index_of_whole_text(self):
+        text = ('Datenschutzbeauftragter: E-Mail a@b.de, ' + ' ' * 30) * 20
+        expected = self.scanner.index(text).positions
+        for piece_length in (1, 5, 23, 24, 100, len(text)):
+            with self.subTest(piece_length=piece_length):
+                growing_index = self.scanner.growing_index()
+                for start in range(0, len(text), piece_length):
+                    growing_index.append(text[start:start + piece_length])
+                    # Settled occurrences are never changed by more text
+                    for name, positions in growing_index.settled.positions.items():
+                        self.assertEqual(positions, expected[name][:len(positions)])
+                        self.assertTrue(all(position <= start + piece_length - self.scanner.longest_term
+                                            for position in positions))
+                self.assertEqual(growing_index.complete().positions, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from analyzer.checks.check_result import CheckResult
+from analyzer.checks.severity import Severity
+from analyzer.result_store import ResultStore
+
+
+class ResultStoreTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.results = [
+            CheckResult('a.de', 'check-one', CheckResult.PassType.FAILED, '', Severity.LOW),
+            CheckResult('a.de', 'check-two', CheckResult.PassType.PASSED, 'found', Severity.HIGH),
+            CheckResult('b.de', 'check-one', CheckResult.PassType.PRECONDITION_FAILED, 'no policy', Severity.LOW),
+            CheckResult('b.de', 'check-two', CheckResult.PassType.FAILED, '', Severity.HIGH),
+            CheckResult('c.de', 'check-one', CheckResult.PassType.FAILED, '', Severity.LOW),
+        ]
+        self.store = ResultStore(self.results)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.store), len(self.results))
+        self.assertEqual(list(self.store), self.results)
+        self.assertEqual(self.store[2:], self.results[2:])
+        self.assertEqual(self.store[-1], self.results[-1])
+
+    def test_counts(self):
+        self.assertEqual(self.store.count(), 5)
+        self.assertEqual(self.store.count(identifier='check-one', passed=CheckResult.PassType.FAILED), 2)
+        self.assertEqual(self.store.count(passed=CheckResult.PassType.FAILED), 3)
+        self.assertEqual(self.store.count(severity=Severity.HIGH), 2)
+        self.assertEqual(self.store.count(identifier='unknown'), 0)
+
+    def test_filter_keeps_order(self):
+        failed = self.store.filter(passed=CheckResult.PassType.FAILED)
+        self.assertEqual(failed, [self.results[0], self.results[3], self.results[4]])
+        self.assertEqual(self.store.filter(identifier='check-two'), [self.results[1], self.results[3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import csv
+import gc
+import os
+import sys
+import tempfile
+import unittest
+
+from analyzer.results_diff import ABSENT, Change, diff_results
+
+
+class ResultsDiffTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # Exceptions raised while cleaning up (e.g. in the finally block of a generator) would go unnoticed otherwise
+        self.unraisable_exceptions = list()
+        self._unraisablehook = sys.unraisablehook
+        sys.unraisablehook = self.unraisable_exceptions.append
+
+    def tearDown(self) -> None:
+        gc.collect()
+        sys.unraisablehook = self._unraisablehook
+        self.tmp_dir.cleanup()
+        self.assertEqual([(u.exc_type, u.exc_value) for u in self.unraisable_exceptions], [])
+
+    def _write_results(self, name, rows):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as results_file:
+            writer = csv.DictWriter(results_file, fieldnames=[
+                'originalDomain', 'testIdentifier', 'passed', 'passType', 'severity', 'description'
+            ])
+            writer.writeheader()
+            for domain, identifier, pass_type in rows:
+                writer.writerow({'originalDomain': domain, 'testIdentifier': identifier, 'passed': True,
+                                 'passType': pass_type, 'severity': 'Severity.LOW', 'description': ''})
+        return path
+
+    def test_changed_results_by_check_and_transition(self):
+        old = self._write_results('old.csv', [
+            ('b.de', 'privacy-statement-missing', 'failed'),
+            ('b.de', 'privacy-missing-complaint', 'passed'),
+            ('a.de', 'privacy-statement-missing', 'passed'),
+            ('a.de', 'privacy-missing-complaint', 'failed'),
+            ('c.de', 'privacy-statement-missing', 'failed'),
+            ('d.de', 'privacy-statement-missing', 'passed'),
+        ])
+        new = self._write_results('new.csv', [
+            ('e.de', 'privacy-statement-missing', 'failed'),
+            ('a.de', 'privacy-statement-missing', 'passed'),
+            ('a.de', 'privacy-missing-complaint', 'passed'),
+            ('c.de', 'privacy-statement-missing', 'passed'),
+            ('b.de', 'privacy-statement-missing', 'passed'),
+            ('b.de', 'privacy-missing-complaint', 'passed'),
+        ])
+        expected = [
+            Change('privacy-missing-complaint', 'failed', 'passed', 'a.de'),
+            Change('privacy-statement-missing', ABSENT, 'failed', 'e.de'),
+            Change('privacy-statement-missing', 'failed', 'passed', 'b.de'),
+            Change('privacy-statement-missing', 'failed', 'passed', 'c.de'),
+            Change('privacy-statement-missing', 'passed', ABSENT, 'd.de'),
+        ]
+        self.assertEqual(list(diff_results(old, new)), expected)
+        # Sorting in chunks which are spilled to disk gives the same changes
+        self.assertEqual(list(diff_results(old, new, chunk_size=2)), expected)
+
+    def test_identical_results_have_no_changes(self):
+        rows = [(f'{i}.de', 'privacy-statement-missing', 'passed') for i in range(10)]
+        path = self._write_results('results.csv', rows)
+        self.assertEqual(list(diff_results(path, path, chunk_size=3)), [])
+
+    def test_duplicate_results_are_rejected(self):
+        old = self._write_results('old.csv', [(f'{i}.de', 'privacy-statement-missing', 'passed') for i in range(5)])
+        new = self._write_results('new.csv', [
+            ('a.de', 'privacy-statement-missing', 'passed'),
+            ('b.de', 'privacy-statement-missing', 'passed'),
+            ('a.de', 'privacy-statement-missing', 'failed'),
+        ])
+        for chunk_size in (2, 200_000):
+            with self.assertRaisesRegex(ValueError, 'new.csv has more than one result of privacy-statement-missing'):
+                list(diff_results(old, new, chunk_size=chunk_size))
+
+    def test_missing_columns_are_named(self):
+        old = self._write_results('old.csv', [('a.de', 'privacy-statement-missing', 'passed')])
+        new = os.path.join(self.tmp_dir.name, 'new.csv')
+        with open(new, 'w', encoding='utf-8', newline='') as results_file:
+            csv.writer(results_file).writerows([['domain', 'testIdentifier', 'passed'], ['a.de', 'x', 'True']])
+        with self.assertRaisesRegex(ValueError, 'new.csv is missing the column\\(s\\) originalDomain, passType'):
+            list(diff_results(old, new))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import unittest
+
+from analyzer.analyze import Analyzer
+from analyzer.sampling import OTHER_STRATUM, StratifiedSample
+
+
+def _domains(number_by_tld):
+    return [
+        (f'domain-{i}.{tld}', {'index': [], 'privacy': []} if i % 2 else {'index': []})
+        for tld, number in number_by_tld.items() for i in range(number)
+    ]
+
+
+class StratifiedSampleTestCase(unittest.TestCase):
+
+    def test_proportional_allocation(self):
+        domains = _domains({'de': 600, 'com': 300, 'org': 95, 'at': 5})
+        sample = StratifiedSample(size=100)
+        sample.select(domains)
+        self.assertEqual(len(sample.strata), 100)
+        self.assertEqual(sample.number_of_domains, 1000)
+        sampled_by_stratum = {}
+        for stratum in sample.strata.values():
+            sampled_by_stratum[stratum] = sampled_by_stratum.get(stratum, 0) + 1
+        # .at would only get half a domain, so it is pooled
+        self.assertEqual(sampled_by_stratum, {'de': 60, 'com': 30, 'org': 9, OTHER_STRATUM: 1})
+        self.assertEqual(sample.population[OTHER_STRATUM], 5)
+
+    def test_same_seed_samples_same_domains(self):
+        domains = _domains({'de': 50, 'com': 50})
+        first, second, other = StratifiedSample(fraction=0.2), StratifiedSample(fraction=0.2), \
+            StratifiedSample(fraction=0.2, seed=1)
+        for sample in (first, second, other):
+            sample.select(domains)
+        self.assertEqual(first.strata, second.strata)
+        self.assertNotEqual(first.strata, other.strata)
+
+    def test_stratified_by_privacy_page(self):
+        sample = StratifiedSample(size=10, stratify_by='privacy-page')
+        sample.select(_domains({'de': 20}))
+        self.assertEqual(sorted(sample.population), ['no privacy page', 'privacy page'])
+
+    def test_estimate(self):
+        domains = _domains({'de': 50, 'com': 50})
+        sample = StratifiedSample(size=20)
+        sample.select(domains)
+        checked = list(sample.strata)
+        # Every sampled .de domain matches, no .com domain
+        estimate = sample.estimate([domain for domain in checked if domain.endswith('.de')], checked)
+        self.assertAlmostEqual(estimate.rate, 0.5)
+        self.assertLess(estimate.low, 0.5)
+        self.assertGreater(estimate.high, 0.5)
+
+        estimate = sample.estimate(checked[:5], checked)
+        self.assertAlmostEqual(estimate.rate, 0.25)
+        self.assertTrue(0 < estimate.low < 0.25 < estimate.high < 1)
+
+        estimate = sample.estimate([], checked)
+        self.assertEqual(estimate.rate, 0)
+        self.assertGreater(estimate.high, 0)
+
+    def test_census_has_exact_rate(self):
+        domains = _domains({'de': 30, 'com': 10})
+        sample = StratifiedSample(fraction=1)
+        sample.select(domains)
+        checked = list(sample.strata)
+        estimate = sample.estimate(checked[:10], checked)
+        self.assertAlmostEqual(estimate.rate, 0.25)
+
+    def test_sample_run(self):
+        tests_dir = os.path.dirname(os.path.realpath(__file__))
+        metadata_filepath = os.path.join(tests_dir, 'test-output/crawler.json')
+        analyzer = Analyzer(crawler_metadata_filepath=metadata_filepath, write_results=False,
+                            sample=StratifiedSample(size=5, stratify_by='privacy-page'))
+        analyzer.run()
+        self.assertEqual(analyzer.number_of_processed_domains, 5)
+        self.assertEqual({result.domain for result in analyzer.results}, set(analyzer.sample.strata))
+        self.assertEqual(analyzer.results_writer.results_csv_path.name, 'analyzer-results.sample.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
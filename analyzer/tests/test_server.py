@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from analyzer.analyze import Analyzer
+from analyzer.server import DomainService, make_server, result_to_json
+
+
+class DomainServerTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        tests_dir = os.path.dirname(os.path.realpath(__file__))
+        self.metadata_filepath = os.path.join(tests_dir, 'test-output/crawler.json')
+        self.service = DomainService(self.metadata_filepath, Analyzer.checks)
+        self.server = make_server(self.service, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_results_of_domain(self):
+        domain = 'heise.de'
+        analyzer = Analyzer(crawler_metadata_filepath=self.metadata_filepath, write_results=False)
+        analyzer.run(specific_domain=domain)
+        with urllib.request.urlopen(f'{self.url}/domains/{domain}') as response:
+            body = json.loads(response.read())
+        self.assertEqual(body['domain'], domain)
+        self.assertEqual(body['results'], [result_to_json(result) for result in analyzer.results])
+
+    def test_unknown_domain(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(f'{self.url}/domains/unknown.de')
+        self.assertEqual(context.exception.code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from analyzer.sharding import Shard
+
+
+class ShardTestCase(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(Shard.parse('2/4'), Shard(2, 4))
+        for spec in ('0/4', '5/4', '2', 'a/b'):
+            with self.assertRaises(ValueError):
+                Shard.parse(spec)
+
+    def test_shards_partition_domains(self):
+        domains = [f'domain-{i}.de' for i in range(1000)]
+        shards = [Shard(i, 4) for i in range(1, 5)]
+        for domain in domains:
+            self.assertEqual(sum(shard.includes(domain) for shard in shards), 1)
+        # Roughly balanced
+        for shard in shards:
+            self.assertGreater(sum(shard.includes(domain) for domain in domains), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
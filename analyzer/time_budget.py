@@ -0,0 +1,65 @@
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Deadline (time.monotonic) of the innermost budget of every thread
+_deadlines = threading.local()
+
+
+class TimeBudgetExceeded(Exception):
+    pass
+
+
+def _raise_time_budget_exceeded(signum, frame):
+    raise TimeBudgetExceeded()
+
+
+def can_interrupt_time_budgets() -> bool:
+    """Budgets interrupt the enclosed block with SIGALRM, which is only available on unix and in the main thread of a
+    process. Elsewhere they are only enforced at the `check_time_budget` calls of the long running loops.
+    """
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+def check_time_budget() -> None:
+    """Raises TimeBudgetExceeded if the budget of the current thread ran out.
+
+    Called between the steps of long running loops (e.g. parsing a page chunk by chunk), so that budgets are enforced
+    where SIGALRM can't interrupt.
+    """
+    deadline = getattr(_deadlines, 'deadline', None)
+    if deadline is not None and time.monotonic() >= deadline:
+        raise TimeBudgetExceeded()
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]) -> Iterator[None]:
+    """Raises TimeBudgetExceeded in the enclosed block once it ran for `seconds` of wall-clock time.
+
+    In the main thread, long running C calls (e.g. a single regex search) are only interrupted after they returned.
+    In other threads the block is only interrupted at `check_time_budget`. Without a budget the block runs unbounded.
+    """
+    if not seconds:
+        yield
+        return
+    previous_deadline = getattr(_deadlines, 'deadline', None)
+    deadline = time.monotonic() + seconds
+    _deadlines.deadline = deadline if previous_deadline is None else min(deadline, previous_deadline)
+    try:
+        if not can_interrupt_time_budgets():
+            yield
+            return
+        previous_handler = signal.signal(signal.SIGALRM, _raise_time_budget_exceeded)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    finally:
+        _deadlines.deadline = previous_deadline
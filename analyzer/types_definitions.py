@@ -1,4 +1,106 @@
-from typing import Dict, List
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 CrawlerDomainMetaData = Dict[str, List]  # pageType->crawledPages
-CrawlerMetaData = Dict[str, CrawlerDomainMetaData]  # CrawlerDomainMetaData
+
+
+class _StringColumn:
+    """Strings stored back to back in one buffer, instead of one python object (~50 bytes overhead) per string.
+    """
+    __slots__ = ('_data', '_ends')
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array('Q')
+
+    def append(self, value: str) -> None:
+        self._data += value.encode('utf-8')
+        self._ends.append(len(self._data))
+
+    def __getitem__(self, index: int) -> str:
+        start = self._ends[index - 1] if index else 0
+        return self._data[start:self._ends[index]].decode('utf-8')
+
+
+class CrawlerMetaData(Mapping):
+    """The crawled pages of all domains (domain -> CrawlerDomainMetaData), held in compact columns.
+
+    Every page is a row: page types and actual domains are stored as codes into tables of their distinct values, urls
+    and html file paths in string columns, and each domain keeps the range of its rows. The pages of a domain are only
+    turned into dicts (as read from crawler.json) when the domain is accessed. Pages with other fields than those of the
+    crawler are kept as they are.
+    """
+    FIELDS = ('originalDomain', 'actualDomain', 'pageType', 'url', 'htmlFilePath')
+
+    def __init__(self, domains: Iterable[Tuple[str, CrawlerDomainMetaData]] = ()):
+        self._rows: Dict[Optional[str], Tuple[int, int]] = dict()
+        self._values: List[Optional[str]] = []
+        self._page_type_codes = array('L')
+        self._actual_domain_codes = array('L')
+        self._urls = _StringColumn()
+        self._html_file_paths = _StringColumn()
+        # Pages which don't fit in the columns, by row
+        self._irregular_pages: Dict[int, dict] = dict()
+
+        codes: Dict[Optional[str], int] = dict()
+
+        def code_of(value: Optional[str]) -> int:
+            if value not in codes:
+                codes[value] = len(self._values)
+                self._values.append(value)
+            return codes[value]
+
+        number_of_rows = 0
+        for domain, page_types in domains:
+            start = number_of_rows
+            for page_type, pages in page_types.items():
+                for page in pages:
+                    self._page_type_codes.append(code_of(page_type))
+                    if self._is_regular(page, domain, page_type):
+                        self._actual_domain_codes.append(code_of(page['actualDomain']))
+                        self._urls.append(page['url'])
+                        self._html_file_paths.append(page['htmlFilePath'])
+                    else:
+                        self._actual_domain_codes.append(0)
+                        self._urls.append('')
+                        self._html_file_paths.append('')
+                        self._irregular_pages[number_of_rows] = page
+                    number_of_rows += 1
+            self._rows[domain] = (start, number_of_rows)
+
+    def _is_regular(self, page: dict, domain: Optional[str], page_type: Optional[str]) -> bool:
+        return (
+            len(page) == len(self.FIELDS) and all(isinstance(page.get(field), str) for field in self.FIELDS)
+            and page['originalDomain'] == domain and page['pageType'] == page_type
+        )
+
+    @property
+    def number_of_pages(self) -> int:
+        return len(self._page_type_codes)
+
+    def __getitem__(self, domain: str) -> CrawlerDomainMetaData:
+        start, end = self._rows[domain]
+        page_types: CrawlerDomainMetaData = dict()
+        for row in range(start, end):
+            page_type = self._values[self._page_type_codes[row]]
+            page = self._irregular_pages.get(row)
+            if page is None:
+                page = {
+                    'originalDomain': domain,
+                    'actualDomain': self._values[self._actual_domain_codes[row]],
+                    'pageType': page_type,
+                    'url': self._urls[row],
+                    'htmlFilePath': self._html_file_paths[row],
+                }
+            page_types.setdefault(page_type, []).append(page)
+        return page_types
+
+    def __contains__(self, domain: object) -> bool:
+        return domain in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)